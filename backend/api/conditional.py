@@ -0,0 +1,162 @@
+# backend/api/conditional.py
+"""
+Conditional GET and response caching for the read endpoints.
+
+Each data scope ("historical" bars, "forecasts") has a version counter in the
+`api_meta` collection that writers bump (`bump_version`) after changing it.
+Responses carry a strong ETag derived from that version and the request, so a
+poll with a matching If-None-Match gets a 304. Versions are held in process
+for DATA_VERSION_TTL seconds, so within that window a 304 (or a repeat of a
+cached response) does not touch the database; an ingest in another process is
+picked up once the window expires, or at once by a request that sends
+`Cache-Control: no-cache`.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, request
+from pymongo import ReturnDocument
+
+META_COLLECTION = "api_meta"
+HISTORICAL_SCOPE = "historical"
+FORECASTS_SCOPE = "forecasts"
+
+# Seconds a version read from Mongo is trusted before it is read again
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "5"))
+# Clients may store responses but must revalidate before every reuse: a page
+# re-read right after an ingest has to see it, and the 304 costs no query
+CACHE_CONTROL = "no-cache"
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl, max_entries=None, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while self.max_entries and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+VERSIONS = TTLCache(DATA_VERSION_TTL)
+RESPONSE_CACHE = TTLCache(RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def read_version(db, scope):
+    doc = db.get_collection(META_COLLECTION).find_one({"_id": scope}, {"version": 1})
+    return doc["version"] if doc else 0
+
+
+def data_version(db, scope, fresh=False):
+    """Current version of `scope`, from the in-process cache when fresh (and not `fresh`)."""
+    version = None if fresh else VERSIONS.get(scope)
+    if version is None:
+        version = read_version(db, scope)
+        VERSIONS.put(scope, version)
+    return version
+
+
+def bump_version(db, scope):
+    """Mark `scope` as changed; returns the new version."""
+    doc = db.get_collection(META_COLLECTION).find_one_and_update(
+        {"_id": scope},
+        {"$inc": {"version": 1}, "$currentDate": {"updated_at": True}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    VERSIONS.put(scope, doc["version"])
+    return doc["version"]
+
+
+def reset():
+    VERSIONS.clear()
+    RESPONSE_CACHE.clear()
+
+
+def make_etag(scope, version, req=None):
+    """Strong validator for the response to `req` at `version` of `scope`."""
+    req = req or request
+    args = sorted(req.args.items(multi=True))
+    key = json.dumps([scope, version, req.path, args, req.headers.get("Accept", "")])
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def etag_matches(etag, req=None):
+    req = req or request
+    tags = req.if_none_match
+    if tags.star_tag:
+        return True
+    # compress_response appends the content coding ("<etag>-gzip")
+    return any(t.split("-", 1)[0] == etag for t in tags.as_set(include_weak=True))
+
+
+def _with_validators(resp, etag):
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = CACHE_CONTROL
+    resp.vary.add("Accept")
+    return resp
+
+
+def _freeze(rv):
+    """(body bytes, status, mimetype) for a Resource return value."""
+    if isinstance(rv, Response):
+        return rv.get_data(), rv.status_code, rv.mimetype
+    data, status = (rv, 200) if not isinstance(rv, tuple) else (rv[0], rv[1] if len(rv) > 1 else 200)
+    return (json.dumps(data) + "\n").encode(), status, "application/json"
+
+
+def cached_response(scope, db, build, req=None):
+    """
+    Serve `build()` (a Resource return value) with ETag/Cache-Control for the
+    current version of `scope`: 304 when the client's copy is current, the
+    cached body when this request was answered recently, else build it (and
+    cache it if it is a 200). A request with `Cache-Control: no-cache` re-reads
+    the version from the database.
+    """
+    req = req or request
+    etag = make_etag(scope, data_version(db, scope, fresh=bool(req.cache_control.no_cache)), req)
+    if etag_matches(etag, req):
+        return _with_validators(Response(status=304), etag)
+    frozen = RESPONSE_CACHE.get(etag)
+    if frozen is None:
+        frozen = _freeze(build())
+        if frozen[1] != 200:
+            body, status, mimetype = frozen
+            return Response(body, status=status, mimetype=mimetype)
+        RESPONSE_CACHE.put(etag, frozen)
+    body, status, mimetype = frozen
+    return _with_validators(Response(body, status=status, mimetype=mimetype), etag)
@@ -1,8 +1,191 @@
 import os
-from pymongo import MongoClient
+import threading
+from datetime import datetime
 
-def get_db():
-    mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-    db_name = os.getenv("MONGO_DB", "bitcoin_db")
-    client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
-    return client[db_name]
+import numpy as np
+from pymongo import MongoClient, errors, monitoring
+
+from backend.api.schema import CLOSE_FIELD, DATE_FIELD, HIST_COLLECTION, SERIES_INDEX
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Counts connection pool events so connection reuse can be observed."""
+
+    FIELDS = (
+        "pools_created", "connections_created", "connections_closed",
+        "checked_out", "checked_in", "checkout_failed", "pools_cleared",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def _inc(self, field):
+        with self._lock:
+            self._counts[field] += 1
+
+    def pool_created(self, event):
+        self._inc("pools_created")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._inc("pools_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._inc("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._inc("connections_closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._inc("checkout_failed")
+
+    def connection_checked_out(self, event):
+        self._inc("checked_out")
+
+    def connection_checked_in(self, event):
+        self._inc("checked_in")
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        counts["open_connections"] = counts["connections_created"] - counts["connections_closed"]
+        counts["in_use"] = counts["checked_out"] - counts["checked_in"]
+        # checkouts served by an existing connection rather than a new one
+        counts["reuse_ratio"] = (
+            round(1 - counts["connections_created"] / counts["checked_out"], 4)
+            if counts["checked_out"] else None
+        )
+        return counts
+
+
+POOL_STATS = PoolStats()
+
+_clients = {}
+_clients_pid = os.getpid()
+_clients_lock = threading.Lock()
+
+
+def client_options():
+    """MongoClient pool/timeout options, overridable through the environment."""
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+        "waitQueueTimeoutMS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+        "socketTimeoutMS": int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000")),
+    }
+
+
+def get_client(mongo_uri=None):
+    """
+    Return the process-wide MongoClient for `mongo_uri` (default: MONGO_URI).
+
+    Clients are created lazily (connect=False) so that one built before a
+    gunicorn fork never shares sockets with the child: after a fork the child
+    starts with an empty registry and builds its own pool on first use.
+    """
+    mongo_uri = mongo_uri or os.getenv("MONGO_URI", "mongodb://localhost:27017")
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _reset_after_fork()
+        client = _clients.get(mongo_uri)
+        if client is None:
+            client = MongoClient(
+                mongo_uri, connect=False, event_listeners=[POOL_STATS], **client_options()
+            )
+            _clients[mongo_uri] = client
+        return client
+
+
+def get_db(db_name=None):
+    return get_client()[db_name or os.getenv("MONGO_DB", "bitcoin_db")]
+
+
+def close_clients():
+    """Close every pooled client (e.g. on worker shutdown)."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def client_count():
+    with _clients_lock:
+        return len(_clients)
+
+
+def _reset_after_fork():
+    # The parent's clients and counters are not valid in the child; drop them
+    # without closing (closing would touch the parent's sockets).
+    global _clients_pid
+    _clients.clear()
+    POOL_STATS.reset()
+    _clients_pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _parse_date(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", ""))
+        except Exception:
+            return None
+    return value
+
+
+def fetch_close_points(coll, limit=100):
+    """
+    Return (series, dates) for the latest `limit` closes in chronological order,
+    read with one query covered by the (Date, Close) index.
+    series is None when the collection holds no numeric closes.
+    """
+    query = dict(
+        filter={},
+        projection={"_id": 0, DATE_FIELD: 1, CLOSE_FIELD: 1},
+        sort=[(DATE_FIELD, -1)],
+        limit=limit,
+    )
+    try:
+        data = list(coll.find(hint=SERIES_INDEX, **query))
+    except errors.OperationFailure:
+        # index not created yet (ensure_indexes has not run against this db)
+        data = list(coll.find(**query))
+
+    points = [
+        (_parse_date(d.get(DATE_FIELD)), d[CLOSE_FIELD]) for d in reversed(data)
+        if isinstance(d.get(CLOSE_FIELD), (int, float))
+    ]
+    if not points:
+        return None, []
+    dates, closes = zip(*points)
+    return np.array(closes), list(dates)
+
+
+def fetch_close_series(coll, limit=100):
+    """Return (series, last_date) for the latest `limit` closes, see fetch_close_points."""
+    series, dates = fetch_close_points(coll, limit)
+    if series is None:
+        return None, None
+    last_date = dates[-1] if dates[-1] is not None else datetime.utcnow()
+    return series, last_date
@@ -0,0 +1,131 @@
+# backend/api/encoding.py
+"""
+Wire formats for tabular API payloads, chosen by the request's Accept header.
+
+- application/json (default): the usual list of row objects
+- application/vnd.btc.columnar+json: one array per field ("columns")
+- application/msgpack: the columnar payload as MessagePack (needs `msgpack`)
+- application/vnd.apache.arrow.stream: an Arrow IPC stream, one record batch,
+  with the non-tabular fields as JSON schema metadata (needs `pyarrow`)
+
+`?format=json|columnar|msgpack|arrow` overrides the header. msgpack and pyarrow
+are optional; formats whose package is missing are simply not offered.
+
+`compress_response` gzip/brotli-encodes large responses (registered on the app
+as an after_request hook).
+"""
+import gzip
+import importlib.util
+import json
+import os
+from datetime import datetime
+
+from flask import Response
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.btc.columnar+json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+FORMAT_ALIASES = {"json": JSON, "columnar": COLUMNAR_JSON, "msgpack": MSGPACK, "arrow": ARROW,
+                  "application/x-msgpack": MSGPACK}
+
+# optional packages are imported on first use
+_HAVE = {MSGPACK: importlib.util.find_spec("msgpack") is not None,
+         ARROW: importlib.util.find_spec("pyarrow") is not None}
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def available_types():
+    return [JSON, COLUMNAR_JSON] + [t for t in (MSGPACK, ARROW) if _HAVE[t]]
+
+
+def negotiate(request):
+    """
+    Media type to answer `request` with, or None if nothing acceptable can be
+    produced (the caller should return 406).
+    """
+    fmt = request.args.get("format")
+    if fmt:
+        media_type = FORMAT_ALIASES.get(fmt, fmt)
+        return media_type if media_type in available_types() else None
+    accept = request.accept_mimetypes
+    if not accept:
+        return JSON
+    offered = available_types() + (["application/x-msgpack"] if _HAVE[MSGPACK] else [])
+    best = accept.best_match(offered)
+    return FORMAT_ALIASES.get(best, best)
+
+
+def columns_from_docs(docs):
+    """
+    {field: [value per document]} over the union of the documents' keys,
+    lowercased like to_api_record. Dates stay datetimes until encoding.
+    """
+    keys = {}
+    for doc in docs:
+        for key in doc:
+            keys.setdefault(key, None)
+    return {key.lower(): [doc.get(key) for doc in docs] for key in keys}
+
+
+def _iso(values):
+    return [v.isoformat() if isinstance(v, datetime) else v for v in values]
+
+
+def encode(meta, columns, media_type):
+    """Body bytes for `meta` (scalar fields) plus `columns` in `media_type`."""
+    if media_type == ARROW:
+        import pyarrow as pa
+        table = pa.table(columns, metadata={"meta": json.dumps(meta, default=str)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    body = dict(meta, columns={k: _iso(v) for k, v in columns.items()})
+    if media_type == MSGPACK:
+        import msgpack
+        return msgpack.packb(body, use_bin_type=True)
+    return json.dumps(body, separators=(",", ":"), default=str).encode()
+
+
+def tabular_response(meta, columns, media_type, status=200):
+    """Flask response carrying `meta` and `columns` in a non-row media type."""
+    resp = Response(encode(meta, columns, media_type), status=status, mimetype=media_type)
+    resp.vary.add("Accept")
+    return resp
+
+
+def not_acceptable():
+    return {"error": "Not acceptable", "available": available_types()}, 406
+
+
+def compress_response(response, request):
+    """gzip/brotli-encode `response` if it is large and the client accepts it."""
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code >= 300 or "Content-Encoding" in response.headers):
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    accept = request.accept_encodings
+    if BROTLI_AVAILABLE and accept["br"]:
+        import brotli
+        data, encoding = brotli.compress(data, quality=BROTLI_QUALITY), "br"
+    elif accept["gzip"]:
+        data, encoding = gzip.compress(data, compresslevel=GZIP_LEVEL), "gzip"
+    else:
+        return response
+    response.set_data(data)
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # a strong validator is per representation, so per content coding
+        response.set_etag(f"{etag}-{encoding}")
+    response.vary.add("Accept-Encoding")
+    return response
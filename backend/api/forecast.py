@@ -1,122 +1,295 @@
 # backend/api/forecast.py
-import numpy as np
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from flask import request
 from flask_restful import Resource
-from datetime import datetime, timedelta
-from pymongo import MongoClient
+from datetime import datetime
 
-from backend.models.moving_average import MovingAverageModel
-from backend.models.arima_model import ARIMAModel
-from backend.models.ensemble import combine_predictions
+from backend.api.conditional import FORECASTS_SCOPE, bump_version, cached_response
+from backend.api.db import fetch_close_points, get_db
+from backend.api.encoding import JSON, negotiate, not_acceptable, tabular_response
+from backend.api.schema import DEFAULT_INTERVAL, INTERVALS, hist_collection
+from backend.models.ensemble import EnsembleWeights, combine_predictions, weight_matrix
+from backend.models.cache import MODEL_CACHE, series_fingerprint
+from backend.models.metrics import evaluate_many
+from backend.training import (
+    ARTIFACT_STORE,
+    GRU_AVAILABLE,
+    SERIES_LIMIT,
+    artifact_store,
+    available_models,
+    extend_model,
+    fit_model,
+    new_observations,
+)
 
-try:
-    from backend.models.gru_model import GRUForecaster
-    use_gru = True
-except ImportError:
-    GRUForecaster = None
-    use_gru = False
+use_gru = GRU_AVAILABLE
 
+# Bar interval forecast on when the request does not name one
+FORECAST_INTERVAL = os.getenv("FORECAST_INTERVAL", DEFAULT_INTERVAL)
 
-def get_db():
-    mongo_uri = "mongodb://localhost:27017"
-    db_name = "bitcoin_db"
-    client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
-    return client[db_name]
+# Forecast quantiles returned (and stored) unless the request names its own
+FORECAST_QUANTILES = [float(q) for q in os.getenv("FORECAST_QUANTILES", "0.05,0.95").split(",") if q]
+
+# Seconds each model may take (fit + predict) before the forecast goes on without it
+MODEL_TIMEOUTS = {
+    "ma": float(os.getenv("FORECAST_TIMEOUT_MA", "5")),
+    "arima": float(os.getenv("FORECAST_TIMEOUT_ARIMA", "30")),
+    "gru": float(os.getenv("FORECAST_TIMEOUT_GRU", "20")),
+}
+
+
+class _Run:
+    """One model run on a Lane; `finished` is set before its future resolves."""
+
+    def __init__(self, fn, args):
+        self.fn, self.args = fn, args
+        self.future = None
+        self.finished = None
+
+    def __call__(self):
+        try:
+            return self.fn(*self.args)
+        finally:
+            self.finished = time.perf_counter()
+
+
+class Lane:
+    """
+    Bounded thread pool for one model, shared by all requests.
+
+    A run that times out keeps its thread until it returns, so each model has
+    its own lane: a hung GRU can only hold GRU threads, never the ones MA and
+    ARIMA run on. Runs are keyed; asking for a key that is still in flight
+    (including a run an earlier request gave up on) waits on that run instead
+    of starting another, and once `workers + backlog` runs are in flight new
+    ones are refused rather than queued.
+    """
+
+    def __init__(self, name, workers, backlog=0):
+        self.name, self.workers, self.backlog = name, workers, backlog
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"forecast-{name}")
+        self._inflight = {}  # key -> _Run
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args):
+        """The in-flight _Run for `key`, else a new one; None when the lane is full."""
+        with self._lock:
+            run = self._inflight.get(key)
+            if run is not None and not run.future.done():
+                return run
+            if self._count() >= self.workers + self.backlog:
+                return None
+            run = _Run(fn, args)
+            run.future = self.executor.submit(run)
+            self._inflight[key] = run
+        run.future.add_done_callback(lambda _: self._release(key, run))
+        return run
+
+    def _release(self, key, run):
+        with self._lock:
+            if self._inflight.get(key) is run:
+                del self._inflight[key]
+
+    def _count(self):
+        # a finished run may not have been released by its callback yet
+        return sum(1 for r in self._inflight.values() if not r.future.done())
+
+    def in_flight(self):
+        with self._lock:
+            return self._count()
+
+
+# MA and ARIMA runs may queue briefly under load; GRU runs never queue
+LANES = {
+    "ma": Lane("ma", int(os.getenv("FORECAST_MAX_WORKERS", "6")), backlog=32),
+    "arima": Lane("arima", int(os.getenv("FORECAST_MAX_WORKERS", "6")), backlog=32),
+    "gru": Lane("gru", int(os.getenv("FORECAST_GRU_WORKERS", "1"))),
+}
+
+
+def band_lists(bands):
+    """Quantile bands as JSON lists (NaN -> None)."""
+    if bands is None:
+        return None
+    return [[None if v != v else float(v) for v in row] for row in bands]
+
+
+def run_concurrently(tasks, timeouts, keys=None, lanes=None):
+    """
+    Run {name: fn(name)} on each model's Lane and wait for each up to its own
+    timeout. `keys` ({name: hashable}) identifies identical runs across
+    requests; without one a run is never shared. Returns (results, timings_ms,
+    failed) where failed maps name -> reason. A timed-out run keeps going in
+    the background but is not waited for.
+    """
+    lanes = lanes or LANES
+    keys = keys or {}
+    started = time.perf_counter()
+    runs = {name: lanes[name].submit(keys.get(name, object()), fn, name) for name, fn in tasks.items()}
+    results, timings, failed = {}, {}, {}
+    for name, run in runs.items():
+        if run is None:
+            failed[name] = "skipped — earlier runs are still in flight"
+            continue
+        remaining = started + timeouts.get(name, 30.0) - time.perf_counter()
+        try:
+            results[name] = run.future.result(timeout=max(remaining, 0))
+        except FutureTimeout:
+            failed[name] = f"timed out after {timeouts.get(name, 30.0)}s"
+        except Exception as e:
+            failed[name] = f"failed — {e}"
+        if run.finished is not None:
+            timings[name] = round(max(run.finished - started, 0.0) * 1000, 2)
+    return results, timings, failed
 
 
 class Forecast(Resource):
     def post(self):
-        """POST /api/forecast  { "horizon": 24 }"""
+        """
+        POST /api/forecast  { "horizon": 24, "interval": "1h", "quantiles": [0.05, 0.95] }
+        `horizon` counts bars of `interval` (1m/5m/1h/1d, default FORECAST_INTERVAL);
+        the models run on the stored bars of that interval.
+        `quantiles` (default FORECAST_QUANTILES, [] for none) adds prediction
+        intervals per model, computed from the same fitted models.
+        Accept (or ?format=) may ask for the predictions as columnar JSON,
+        MessagePack or Arrow instead (backend/api/encoding.py).
+        """
+        media_type = negotiate(request)
+        if media_type is None:
+            return not_acceptable()
         req = request.get_json(force=True)
         horizon = int(req.get("horizon", 24))
+        interval = req.get("interval") or FORECAST_INTERVAL
+        if interval not in INTERVALS:
+            return {"error": f"Unsupported interval {interval!r}; expected one of {', '.join(INTERVALS)}"}, 400
+        quantiles = req.get("quantiles", FORECAST_QUANTILES)
+        if not isinstance(quantiles, list) or not all(
+                isinstance(q, (int, float)) and 0 < q < 1 for q in quantiles):
+            return {"error": "quantiles must be a list of numbers between 0 and 1"}, 400
+        scope = hist_collection(interval)
 
         db = get_db()
-        coll_hist = db.get_collection("btc_historical")
+        coll_hist = db.get_collection(scope)
 
         print("\n=== DEBUG: Fetching historical data from MongoDB ===")
-        data = list(
-            coll_hist.find({}, {"_id": 0, "date": 1, "close": 1})
-            .sort("date", -1)
-            .limit(100)
-        )
-
-        total_docs = len(data)
-        print(f"DEBUG fetched {total_docs} records from btc_historical")
-
-        if total_docs == 0:
+        series, dates = fetch_close_points(coll_hist, SERIES_LIMIT)
+        if series is None:
             print("DEBUG: No data found — aborting forecast")
             return {"error": "No historical data available"}, 400
+        last_date = dates[-1] if dates[-1] is not None else datetime.utcnow()
 
-        # --- Extract numeric close prices ---
-        cleaned = [
-            d.get("close") for d in data
-            if "close" in d and isinstance(d.get("close"), (int, float))
-        ]
-
-        if not cleaned:
-            print("DEBUG: No valid numeric 'close' data found.")
-            return {"error": "No valid numeric 'close' data in database"}, 400
-
-        # Reverse to chronological order
-        series = np.array(cleaned[::-1])
         print(f"DEBUG: Series length = {len(series)}, last 5 closes = {series[-5:]}")
+        print(f"DEBUG: Last historical date = {last_date}, interval = {interval}")
 
-        # --- Determine last historical date ---
-        last_doc = coll_hist.find_one({}, sort=[("date", -1)])
-        if last_doc and "date" in last_doc:
-            last_date = last_doc["date"]
-            if isinstance(last_date, str):
-                try:
-                    last_date = datetime.fromisoformat(last_date.replace("Z", ""))
-                except Exception:
-                    last_date = datetime.utcnow()
-        else:
-            last_date = datetime.utcnow()
-
-        print(f"DEBUG: Last historical date = {last_date}")
-
-        # --- Generate forecast dates (start after last historical record) ---
+        # --- Generate forecast dates (one bar apart, after the last historical record) ---
+        step = INTERVALS[interval]
         forecast_dates = [
-            last_date + timedelta(hours=i + 1) for i in range(horizon)
+            last_date + step * (i + 1) for i in range(horizon)
         ]
 
-        # --- Run models ---
-        print("DEBUG: Running Moving Average and ARIMA models...")
-        ma_model = MovingAverageModel(window=5).fit(series)
-        arima_model = ARIMAModel(order=(2, 1, 2)).fit(series)
-
-        ma_pred = ma_model.predict(horizon)
-        arima_pred = arima_model.predict(horizon)
-        gru_pred = None
-
-        if use_gru:
-            print("DEBUG: Running GRU model...")
-            try:
-                gru_model = GRUForecaster(lookback=10, epochs=5).fit(series)
-                gru_pred = gru_model.predict(horizon)
-            except Exception as e:
-                print(f"⚠️ WARNING: GRU model failed — {e}")
+        # --- Load published models; fit inline only if nothing is published yet ---
+        store = ARTIFACT_STORE if interval == DEFAULT_INTERVAL else artifact_store(interval)
+        published = store.load_latest()
+        fingerprint = series_fingerprint(series, last_date)
+        new_obs = None
+        if published is not None and published[1].get("fingerprint") != list(fingerprint):
+            # the data changed since the last publish: advance the published models
+            # over bars that follow their data_end, or refit inline when there are
+            # none to add or the artifact's last bar was rewritten (an incremental
+            # ingest rebuilds the latest candle on every run)
+            new_obs = new_observations(published[1], series, dates)
+            if new_obs is None or not len(new_obs):
+                print(f"DEBUG: Series changed at or before published data_end "
+                      f"{published[1].get('data_end')} — refitting.")
+                new_obs, published = None, None
+        if published is not None:
+            models, meta = published
+            version = meta["version"]
+            names = [n for n in models if use_gru or n != "gru"]
+            model_info = {
+                "source": "published" if new_obs is None else "extended",
+                "version": version,
+                "trained_at": meta["trained_at"],
+                "data_end": last_date.isoformat(),
+                "published_data_end": meta.get("data_end"),
+            }
+            print(f"DEBUG: Using published models {version} trained at {meta['trained_at']}"
+                  + (f", advanced over {len(new_obs)} new bars" if new_obs is not None else ""))
         else:
-            print("DEBUG: GRU model not available, skipping.")
+            print("DEBUG: No published models — fitting inline.")
+            models, names = {}, available_models(use_gru)
+            model_info = {"source": "inline", "version": None, "trained_at": None,
+                          "data_end": last_date.isoformat(), "published_data_end": None}
+
+        def run(name):
+            if name in models and new_obs is not None:
+                model, hit = extend_model(name, store, version, new_obs, MODEL_CACHE,
+                                          scope=scope, fingerprint=fingerprint)
+            elif name in models:
+                model, hit = models[name], True
+            else:
+                model, hit = fit_model(name, series, MODEL_CACHE, scope=scope, fingerprint=fingerprint)
+            if not quantiles:
+                return model, hit, model.predict(horizon), None
+            return (model, hit, *model.predict(horizon, quantiles=quantiles))
+
+        # --- Run models concurrently, each with its own deadline ---
+        # identical requests for the same data share a run that is still going
+        source = (model_info["source"], model_info["version"], fingerprint)
+        keys = {name: (name, scope, source, horizon, tuple(quantiles)) for name in names}
+        results, timings, failed = run_concurrently({name: run for name in names}, MODEL_TIMEOUTS, keys)
+        for name, reason in failed.items():
+            print(f"⚠️ WARNING: {name} model {reason}")
+        if "ma" not in results or "arima" not in results:
+            return {"error": "Forecast models unavailable", "failed": failed, "timings_ms": timings}, 503
+
+        cached = {name: r[1] for name, r in results.items()}
+        print(f"DEBUG: Model cache hits = {cached}, timings (ms) = {timings}")
+
+        ma_pred = results["ma"][2]
+        arima_pred = results["arima"][2]
+        gru_pred = results["gru"][2] if "gru" in results else None
 
         # --- Combine predictions ---
-        ensemble_pred = combine_predictions(ma_pred, arima_pred, gru_pred)
+        # per-step weights learned by the trainer; equal weights for inline fits
+        weights = None
+        if published is not None and published[1].get("ensemble"):
+            weights = EnsembleWeights.from_dict(published[1]["ensemble"])
+        ensemble_pred = combine_predictions(ma_pred, arima_pred, gru_pred, weights=weights)
+        combined = ["ma", "arima"] + (["gru"] if gru_pred is not None else [])
+        ensemble_weights = dict(zip(combined, weight_matrix(combined, horizon, weights).tolist()))
+
+        intervals = None
+        if quantiles:
+            bands = {name: results[name][3] if name in results else None for name in ("ma", "arima", "gru")}
+            intervals = {
+                "quantiles": quantiles,
+                "moving_average": band_lists(bands["ma"]),
+                "arima": band_lists(bands["arima"]),
+                "gru": band_lists(bands["gru"]),
+                # weighted model quantiles: exact if the models' errors move together, wider otherwise
+                "ensemble": band_lists(combine_predictions(bands["ma"], bands["arima"], bands["gru"], weights)),
+            }
 
         # --- Evaluate (optional metrics) ---
         metrics = {"ma": {}, "arima": {}, "gru": {}, "ensemble": {}}
         if len(series) > horizon:
             true = series[-horizon:]
-            metrics["ma"] = ma_model.evaluate(true, ma_pred)
-            metrics["arima"] = arima_model.evaluate(true, arima_pred)
-            if gru_pred is not None:
-                metrics["gru"] = gru_model.evaluate(true, gru_pred)
-            metrics["ensemble"] = ma_model.evaluate(true, ensemble_pred)
+            preds = {"ma": ma_pred, "arima": arima_pred, "gru": gru_pred, "ensemble": ensemble_pred}
+            metrics.update(evaluate_many(true, {k: v for k, v in preds.items() if v is not None}))
 
         # --- Save forecast to MongoDB ---
         forecast_doc = {
             "timestamp": datetime.utcnow(),
             "horizon": horizon,
-            "use_gru": use_gru,
+            "interval": interval,
+            "use_gru": gru_pred is not None,
+            "model": model_info,
+            "timings_ms": timings,
+            "failed": failed,
             "predictions": {
                 "dates": [d.isoformat() for d in forecast_dates],
                 "moving_average": ma_pred.tolist(),
@@ -124,16 +297,60 @@ class Forecast(Resource):
                 "gru": gru_pred.tolist() if gru_pred is not None else None,
                 "ensemble": ensemble_pred.tolist(),
             },
+            "intervals": intervals,
+            "ensemble_weights": ensemble_weights,
             "metrics": metrics,
         }
 
         db.get_collection("btc_forecasts").insert_one(forecast_doc)
+        bump_version(db, FORECASTS_SCOPE)
         print("✅ DEBUG: Forecast inserted successfully into btc_forecasts.")
 
-        return {
+        body = {
             "message": "Forecast generated successfully",
             "horizon": horizon,
-            "use_gru": use_gru,
+            "interval": interval,
+            "use_gru": forecast_doc["use_gru"],
+            "model_version": model_info["version"],
+            "trained_at": model_info["trained_at"],
+            "model": model_info,
             "predictions": forecast_doc["predictions"],
+            "intervals": intervals,
+            "ensemble_weights": ensemble_weights,
             "metrics": metrics,
-        }, 200
+            "cached": cached,
+            "timings_ms": timings,
+            "failed": failed,
+        }
+        if media_type != JSON:
+            columns = {k: v for k, v in forecast_doc["predictions"].items() if v is not None}
+            columns["dates"] = forecast_dates
+            for name, rows in (intervals or {}).items():
+                if name != "quantiles" and rows is not None:
+                    columns.update({f"{name}_q{q:g}": row for q, row in zip(quantiles, rows)})
+            meta = {k: v for k, v in body.items() if k not in ("predictions", "intervals")}
+            return tabular_response(meta, columns, media_type)
+        return body, 200
+
+
+class LatestForecast(Resource):
+    def get(self):
+        """
+        GET /api/forecast/latest[?interval=1h]
+        The most recent btc_forecasts document (of `interval`, if given), with
+        an ETag that changes whenever a new forecast is stored.
+        """
+        interval = request.args.get("interval")
+        if interval is not None and interval not in INTERVALS:
+            return {"error": f"Unsupported interval {interval!r}; expected one of {', '.join(INTERVALS)}"}, 400
+        db = get_db()
+        return cached_response(FORECASTS_SCOPE, db, lambda: self.latest(db, interval))
+
+    def latest(self, db, interval):
+        flt = {"interval": interval} if interval else {}
+        doc = db.get_collection("btc_forecasts").find_one(flt, {"_id": 0}, sort=[("timestamp", -1)])
+        if doc is None:
+            return {"error": "No forecast stored yet. POST /api/forecast first."}, 404
+        if isinstance(doc.get("timestamp"), datetime):
+            doc["timestamp"] = doc["timestamp"].isoformat()
+        return doc, 200
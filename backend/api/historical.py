@@ -1,28 +1,191 @@
+import base64
+import json
+import os
+
 from flask_restful import Resource
-from flask import request
+from flask import Response, request
+from backend.api.conditional import HISTORICAL_SCOPE, cached_response
 from backend.api.db import get_db
-from datetime import datetime
+from backend.api.encoding import JSON, columns_from_docs, negotiate, not_acceptable, tabular_response
+from backend.api.schema import (
+    DATE_FIELD,
+    DEFAULT_INTERVAL,
+    TEXT_FIELDS,
+    hist_collection,
+    to_api_record,
+    to_storage_date,
+)
+
+# Bar sizes /api/historical can aggregate to:
+# interval -> ($dateTrunc unit, binSize, stored interval the bars are built from)
+BUCKETS = {
+    "1m": ("minute", 1, "1m"),
+    "5m": ("minute", 5, "5m"),
+    "15m": ("minute", 15, "5m"),
+    "1h": ("hour", 1, "1h"),
+    "4h": ("hour", 4, "1h"),
+    "1d": ("day", 1, "1d"),
+    "1w": ("week", 1, "1d"),
+    "1mo": ("month", 1, "1d"),
+}
+
+# Upper bound on rows in one JSON page; larger ranges are paged with `cursor`
+# or streamed (`stream=ndjson|json`)
+MAX_PAGE_SIZE = int(os.getenv("HISTORICAL_MAX_PAGE_SIZE", "1000"))
+# Documents per round trip while streaming
+STREAM_BATCH_SIZE = 500
+
+STREAM_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+def encode_cursor(date):
+    """Opaque next-page token for rows older than `date`."""
+    return base64.urlsafe_b64encode(json.dumps({"before": date.isoformat()}).encode()).decode()
+
+
+def decode_cursor(token):
+    try:
+        return to_storage_date(json.loads(base64.urlsafe_b64decode(token.encode()))["before"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("malformed cursor") from e
+
+
+def date_filter(start, end, before=None):
+    """Mongo filter for start <= Date < end, and Date < before (all optional)."""
+    rng = {}
+    if start:
+        rng["$gte"] = to_storage_date(start)
+    upper = [to_storage_date(d) for d in (end, before) if d]
+    if upper:
+        rng["$lt"] = min(upper)
+    return {DATE_FIELD: rng} if rng else {}
+
+
+def bucket_pipeline(match, bucket, limit=None):
+    """
+    Aggregate stored candles into `bucket` bars on the server: first Open,
+    max High, min Low, last Close, summed Volume. The newest `limit` bars (all
+    when None) are returned, newest first.
+    """
+    unit, size, _ = BUCKETS[bucket]
+    trunc = {"date": f"${DATE_FIELD}", "unit": unit, "binSize": size}
+    if unit == "week":
+        trunc["startOfWeek"] = "monday"
+    return [
+        {"$match": match},
+        {"$sort": {DATE_FIELD: 1}},
+        {"$group": {
+            "_id": {"$dateTrunc": trunc},
+            "Open": {"$first": "$Open"},
+            "High": {"$max": "$High"},
+            "Low": {"$min": "$Low"},
+            "Close": {"$last": "$Close"},
+            "Volume": {"$sum": "$Volume"},
+            "news_sentiment": {"$avg": "$news_sentiment"},
+            "headline_count": {"$sum": "$headline_count"},
+            "bars": {"$sum": 1},
+        }},
+        {"$sort": {"_id": -1}},
+        *([{"$limit": limit}] if limit else []),
+        {"$project": {"_id": 0, DATE_FIELD: "$_id", "Open": 1, "High": 1, "Low": 1, "Close": 1,
+                      "Volume": 1, "news_sentiment": 1, "headline_count": 1, "bars": 1}},
+    ]
+
+
+def query(db, match, interval, limit, include_text=False, batch_size=None):
+    """Cursor over the stored rows (or `interval` bars) matching `match`, newest first."""
+    if interval:
+        coll = db.get_collection(hist_collection(BUCKETS[interval][2]))
+        pipeline = bucket_pipeline(match, interval, limit)
+        return coll.aggregate(pipeline, batchSize=batch_size) if batch_size else coll.aggregate(pipeline)
+    projection = {"_id": 0}
+    if not include_text:
+        projection.update({field: 0 for field in TEXT_FIELDS})
+    coll = db.get_collection(hist_collection(DEFAULT_INTERVAL))
+    cursor = coll.find(match, projection).sort(DATE_FIELD, -1)
+    if batch_size:
+        cursor = cursor.batch_size(batch_size)
+    return cursor.limit(limit) if limit else cursor
+
+
+def stream_rows(cursor, fmt):
+    """Encode rows as the cursor yields them: NDJSON lines or one chunked JSON array."""
+    if fmt == "ndjson":
+        for doc in cursor:
+            yield json.dumps(to_api_record(doc)) + "\n"
+        return
+    yield "["
+    for i, doc in enumerate(cursor):
+        yield ("," if i else "") + json.dumps(to_api_record(doc))
+    yield "]"
+
 
 class Historical(Resource):
     def get(self):
         """
         GET /api/historical
-        Optional query param: ?limit=15
-        Example: /api/historical?limit=20
+        Optional query params:
+          ?limit=15          rows per page (newest first), at most MAX_PAGE_SIZE
+          ?start=&end=       ISO dates, start <= date < end
+          ?interval=1w       aggregate OHLCV bars of this size on the server
+                             (1m, 5m, 15m, 1h, 4h, 1d, 1w, 1mo)
+          ?include_text=1    include headlines_concat (left out by default)
+          ?cursor=<token>    next page: the `next_cursor` of the previous response
+          ?after=<date>      rows strictly older than this date (keyset, like cursor)
+          ?stream=ndjson     stream every matching row (no page cap) as NDJSON,
+                             or stream=json as a chunked JSON array
+        Pages can also be returned column-wise (columnar JSON, MessagePack or
+        Arrow) through the Accept header or ?format=, see backend/api/encoding.py.
+        Pages carry an ETag that changes with each ingest; send it back as
+        If-None-Match to get a 304.
+        Example: /api/historical?start=2020-01-01&interval=1w&limit=300
         """
-        limit = request.args.get("limit", default=15, type=int)
+        interval = request.args.get("interval")
+        if interval is not None and interval not in BUCKETS:
+            return {"error": f"Unsupported interval {interval!r}; expected one of {', '.join(BUCKETS)}"}, 400
+        stream = request.args.get("stream")
+        if stream is not None and stream not in STREAM_TYPES:
+            return {"error": f"Unsupported stream format {stream!r}; expected ndjson or json"}, 400
+        include_text = bool(request.args.get("include_text", default=0, type=int))
+        try:
+            before = request.args.get("after")
+            if request.args.get("cursor"):
+                before = decode_cursor(request.args["cursor"])
+            match = date_filter(request.args.get("start"), request.args.get("end"), before)
+        except ValueError as e:
+            return {"error": f"Invalid start/end/cursor: {e}"}, 400
+
+        media_type = JSON if stream else negotiate(request)
+        if media_type is None:
+            return not_acceptable()
 
         db = get_db()
-        coll = db.get_collection("btc_historical")
+        if stream:
+            limit = request.args.get("limit", type=int)
+            cursor = query(db, match, interval, limit, include_text, batch_size=STREAM_BATCH_SIZE)
+            return Response(stream_rows(cursor, stream), mimetype=STREAM_TYPES[stream])
 
-        cursor = coll.find({}, {"_id": 0}).sort("date", -1).limit(limit)
-        data = list(cursor)
+        # Unchanged since the last ingest: 304 / cached page without a query
+        return cached_response(HISTORICAL_SCOPE, db, lambda: self.page(
+            db, match, interval, include_text, before, media_type))
 
-        if not data:
-            return {"error": "No Bitcoin data found. Please run /api/ingest first."}, 404
+    def page(self, db, match, interval, include_text, before, media_type):
+        """One page of rows (newest first) plus the cursor for the next one."""
+        default_limit = MAX_PAGE_SIZE if interval else 15
+        limit = max(1, min(request.args.get("limit", default=default_limit, type=int), MAX_PAGE_SIZE))
+        # one row past the page tells whether another page follows
+        docs = list(query(db, match, interval, limit + 1, include_text))
+        has_more = len(docs) > limit
+        docs = docs[:limit]
 
-        for d in data:
-            if isinstance(d.get("date"), datetime):
-                d["date"] = d["date"].isoformat()
+        if not docs and before is None:
+            return {"error": "No Bitcoin data found. Please run /api/ingest first."}, 404
 
-        return {"ticker": "BTC-USD", "count": len(data), "data": data}, 200
+        meta = {"ticker": "BTC-USD", "count": len(docs),
+                "next_cursor": encode_cursor(docs[-1][DATE_FIELD]) if has_more else None}
+        if interval:
+            meta["interval"] = interval
+        if media_type != JSON:
+            return tabular_response(meta, columns_from_docs(docs), media_type)
+        data = [to_api_record(d) for d in docs]
+        return dict(meta, data=data), 200
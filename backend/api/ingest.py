@@ -173,16 +173,37 @@
 # backend/api/ingest.py
 import argparse
 import logging
+import math
 import os
+import queue
 import sys
-from typing import Tuple, List
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, List, Tuple
 
 import pandas as pd
-from pymongo import MongoClient, errors, UpdateOne
+from pymongo import DeleteMany, InsertOne, UpdateOne, errors
+
+from backend.api.conditional import HISTORICAL_SCOPE, bump_version
+from backend.api.db import get_client
+from backend.api.schema import (
+    DATE_FIELD,
+    DEFAULT_INTERVAL,
+    HIST_COLLECTION,
+    INTERVALS,
+    check_interval,
+    ensure_indexes,
+    hist_collection,
+    is_timeseries,
+    to_storage_date,
+    to_storage_dates,
+)
+from backend.models.cache import MODEL_CACHE
 
 # Import the builder from backend.data
 try:
-    from backend.data.fin_data_builder import build_dataset
+    from backend.data.fin_data_builder import build_dataset, rollup_dataset
 except Exception as e:
     raise ImportError(
         "Could not import build_dataset from backend.data.fin_data_builder. "
@@ -196,9 +217,17 @@ REQUIRED_COLUMNS = [
     "headlines_concat", "news_sentiment", "headline_count"
 ]
 
+# Earlier bars fetched in incremental mode so MA10 and Volatility (5-bar std of
+# returns) are computed over full windows for the new rows (in bars of the
+# coarsest interval being written)
+INDICATOR_LOOKBACK = 10
+
+# Rows per bulk_write, and chunks allowed to wait for the writer thread
+INGEST_CHUNK_SIZE = int(os.environ.get("INGEST_CHUNK_SIZE", 5000))
+INGEST_QUEUE_DEPTH = int(os.environ.get("INGEST_QUEUE_DEPTH", 2))
+
 DEFAULT_MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017")
 DEFAULT_DB_NAME = os.environ.get("MONGO_DB", "bitcoin_db")
-HIST_COLLECTION = "btc_historical"
 
 logging.basicConfig(
     level=logging.INFO,
@@ -213,47 +242,235 @@ def validate_dataframe(df: pd.DataFrame, required_cols: List[str] = REQUIRED_COL
     return (len(missing) == 0, missing)
 
 
+def iter_record_chunks(df: pd.DataFrame, chunk_size: int = None) -> Iterator[List[dict]]:
+    """
+    Yield the DataFrame rows as MongoDB-ready dicts, `chunk_size` rows at a time.
+    - Date becomes a native datetime (stored as a BSON date)
+    - NaN becomes None (vectorised per chunk with `where`)
+    Only one chunk is ever converted to Python objects at a time.
+    """
+    chunk_size = chunk_size or INGEST_CHUNK_SIZE
+    dates = to_storage_dates(df["Date"])
+    for i in range(0, len(df), chunk_size):
+        part = df.iloc[i:i + chunk_size].astype(object)
+        part = part.where(part.notna(), None)
+        records = part.to_dict(orient="records")
+        for rec, date in zip(records, dates.iloc[i:i + chunk_size].dt.to_pydatetime()):
+            rec["Date"] = date
+        yield records
+
+
 def normalize_records_for_mongo(df: pd.DataFrame) -> List[dict]:
+    """All rows as MongoDB-ready dicts (see iter_record_chunks)."""
+    return [rec for chunk in iter_record_chunks(df) for rec in chunk]
+
+
+def _upsert_op(rec):
+    return UpdateOne({DATE_FIELD: rec[DATE_FIELD]}, {"$set": rec, "$currentDate": {"last_updated": True}}, upsert=True)
+
+
+def _replace_ops(records):
     """
-    Convert DataFrame rows into dicts suitable for MongoDB insertion.
-    - Ensures Date is ISO string (YYYY-MM-DD)
-    - Converts NaNs to None
+    Time-series collections take no upserts: drop the stored versions of these
+    candles and insert the new ones (one ordered bulk_write).
     """
-    df_copy = df.copy()
-    df_copy["Date"] = pd.to_datetime(df_copy["Date"]).dt.strftime("%Y-%m-%d")
-    records = df_copy.to_dict(orient="records")
+    now = datetime.utcnow()
+    return ([DeleteMany({DATE_FIELD: {"$in": [r[DATE_FIELD] for r in records]}})]
+            + [InsertOne(dict(r, last_updated=now)) for r in records])
 
-    # Convert NaN to None
-    for r in records:
-        for k, v in list(r.items()):
-            if pd.isna(v):
-                r[k] = None
-    return records
 
+def _write_counts(result, timeseries):
+    """(inserted, modified) from a BulkWriteResult."""
+    if timeseries:
+        replaced = result.deleted_count or 0
+        return (result.inserted_count or 0) - replaced, replaced
+    return result.upserted_count or 0, result.modified_count or 0
 
-def ingest_to_mongo(
+
+def write_chunks(coll, chunks, queue_depth=None, timeseries=False):
+    """
+    Diff each chunk of records against the stored documents and upsert the
+    changed ones, one unordered bulk_write per chunk (delete + insert for a
+    `timeseries` collection). The writes run on a
+    background thread fed through a queue of at most `queue_depth` chunks, so
+    the next chunk is prepared while the previous one is written and memory
+    stays bounded. Logs progress and throughput per chunk.
+
+    Returns (records, written, inserted, modified, prepare_seconds, write_seconds).
+    """
+    pending = queue.Queue(maxsize=queue_depth or INGEST_QUEUE_DEPTH)
+    totals = {"inserted": 0, "modified": 0, "written": 0, "write_seconds": 0.0}
+    failure = []
+
+    def writer():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            n, docs, ops = item
+            if failure:
+                continue  # drain so the producer never blocks
+            started = time.perf_counter()
+            try:
+                result = coll.bulk_write(ops, ordered=timeseries)
+            except Exception as e:
+                logger.error(f"Mongo bulk upsert failed on chunk {n}: {e}")
+                failure.append(e)
+                continue
+            elapsed = time.perf_counter() - started
+            inserted, modified = _write_counts(result, timeseries)
+            totals["inserted"] += inserted
+            totals["modified"] += modified
+            totals["written"] += docs
+            totals["write_seconds"] += elapsed
+            logger.info("Chunk %d: wrote %d docs in %.3fs (%.0f docs/s), %d written so far",
+                        n, docs, elapsed, docs / elapsed if elapsed > 0 else 0.0, totals["written"])
+
+    thread = threading.Thread(target=writer, name="ingest-writer", daemon=True)
+    thread.start()
+    records, prepare_seconds = 0, 0.0
+    try:
+        started = time.perf_counter()
+        for n, chunk in enumerate(chunks, 1):
+            records += len(chunk)
+            changed = changed_records(coll, chunk)
+            if not changed:
+                ops = []
+            elif timeseries:
+                ops = _replace_ops(changed)
+            else:
+                ops = [_upsert_op(rec) for rec in changed]
+            prepare_seconds += time.perf_counter() - started
+            if failure:
+                break
+            if ops:
+                pending.put((n, len(changed), ops))
+            else:
+                logger.info("Chunk %d: %d records unchanged", n, len(chunk))
+            started = time.perf_counter()
+    finally:
+        pending.put(None)
+        thread.join()
+    if failure:
+        raise failure[0]
+    return (records, totals["written"], totals["inserted"], totals["modified"],
+            prepare_seconds, totals["write_seconds"])
+
+
+def latest_stored_date(coll):
+    """Date of the newest stored candle, or None for an empty collection."""
+    doc = coll.find_one({}, projection={DATE_FIELD: 1, "_id": 0}, sort=[(DATE_FIELD, -1)])
+    return doc[DATE_FIELD] if doc else None
+
+
+def _same_value(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    if isinstance(a, float) or isinstance(b, float):
+        try:
+            return math.isclose(float(a), float(b), rel_tol=1e-9, abs_tol=1e-12)
+        except (TypeError, ValueError):
+            return False
+    return a == b
+
+
+def changed_records(coll, records):
+    """The records whose fields differ from (or are missing in) the stored documents."""
+    if not records:
+        return []
+    dates = [r[DATE_FIELD] for r in records]
+    stored = {
+        doc[DATE_FIELD]: doc
+        for doc in coll.find({DATE_FIELD: {"$gte": min(dates), "$lte": max(dates)}},
+                             projection={"_id": 0, "last_updated": 0})
+    }
+    return [
+        r for r in records
+        if r[DATE_FIELD] not in stored
+        or not all(_same_value(v, stored[r[DATE_FIELD]].get(k)) for k, v in r.items())
+    ]
+
+
+def run_ingest(
     ticker: str,
-    start: str,
-    end: str,
+    start: str = None,
+    end: str = None,
     out_csv: str = None,
     mongo_uri: str = DEFAULT_MONGO_URI,
-    db_name: str = DEFAULT_DB_NAME
+    db_name: str = DEFAULT_DB_NAME,
+    incremental: bool = False,
+    chunk_size: int = None,
+    interval: str = DEFAULT_INTERVAL,
+    rollups=(),
 ):
     """
     1) Build dataset via build_dataset()
     2) Validate dataset schema
-    3) Upsert into MongoDB collection
+    3) Upsert the rows that differ from what is stored
+
+    With `incremental`, only candles from the latest stored date onwards are
+    built and written; `start` is then only used for an empty collection and
+    `end` defaults to tomorrow. The latest stored candle itself is rebuilt (it
+    may have been partial) and INDICATOR_LOOKBACK earlier bars are fetched so
+    MA10/Volatility match a full rebuild.
+
+    Bars of `interval` (1m/5m/1h/1d) go to hist_collection(interval). Each of
+    `rollups` (coarser intervals) is downsampled from the same bars and written
+    to its own collection, so e.g. one 5m fetch also refreshes 1h and 1d.
+
+    Records are upserted `chunk_size` (env INGEST_CHUNK_SIZE) at a time.
+
+    Returns a stats dict: mode, interval, start, end, fetched, written,
+    inserted, modified, skipped, per-phase timings (seconds) and, per rollup
+    interval, its written/inserted/modified/skipped counts.
     """
-    logger.info("Starting ingestion for %s from %s to %s", ticker, start, end)
+    t0 = time.perf_counter()
+    timings = {}
+    check_interval(interval)
+    rollups = [check_interval(r) for r in rollups]
+    for r in rollups:
+        if INTERVALS[r] <= INTERVALS[interval]:
+            raise ValueError(f"Rollup interval {r} must be coarser than {interval}")
+
+    # Connect to MongoDB (shared, pooled client)
+    client = get_client(mongo_uri)
+    try:
+        client.admin.command("ping")
+    except errors.PyMongoError as e:
+        logger.exception("Cannot connect to MongoDB at %s: %s", mongo_uri, e)
+        raise
+
+    db = client.get_database(db_name)
+    ensure_indexes(db, [interval, *rollups])
+    coll = db.get_collection(hist_collection(interval))
+
+    mode = "full"
+    since = None
+    if incremental:
+        latest = latest_stored_date(coll)
+        end = end or (datetime.utcnow().date() + timedelta(days=1)).isoformat()
+        if latest is not None:
+            mode = "incremental"
+            since = to_storage_date(latest)
+            # enough bars for the indicators of the coarsest interval written
+            step = max(INTERVALS[i] for i in [interval, *rollups])
+            start = (since - INDICATOR_LOOKBACK * step).strftime("%Y-%m-%d")
+        elif not start:
+            raise ValueError("Collection is empty: incremental ingest needs a 'start' date for the first run")
+    if not (start and end):
+        raise ValueError("Missing 'start' or 'end' date")
+
+    logger.info("Starting %s ingestion of %s bars for %s from %s to %s", mode, interval, ticker, start, end)
 
     # 1) Build dataset
     try:
-        df = build_dataset(exchange="CRYPTO", ticker=ticker, start=start, end=end, out_path=None)
+        df = build_dataset(exchange="CRYPTO", ticker=ticker, start=start, end=end, out_path=None, interval=interval)
     except TypeError:
-        df = build_dataset("CRYPTO", ticker, start, end, None)
+        df = build_dataset("CRYPTO", ticker, start, end, None, interval)
     except Exception as e:
         logger.exception("Error while running build_dataset: %s", e)
         raise
+    timings["fetch"] = time.perf_counter() - t0
 
     if df is None or len(df) == 0:
         raise RuntimeError(f"No data returned by build_dataset for {ticker} in range {start} - {end}")
@@ -279,66 +496,115 @@ def ingest_to_mongo(
         df.to_csv(out_csv, index=False)
         logger.info("Saved CSV to %s", out_csv)
 
-    # 3) Normalize records
-    records = normalize_records_for_mongo(df)
-    logger.info("Normalized %d records for MongoDB insertion.", len(records))
-
-    # Connect to MongoDB
-    client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
-    try:
-        client.admin.command("ping")
-    except errors.PyMongoError as e:
-        logger.exception("Cannot connect to MongoDB at %s: %s", mongo_uri, e)
-        raise
-
-    db = client.get_database(db_name)
-    coll = db.get_collection(HIST_COLLECTION)
-
-    # ✅ Bulk upsert (efficient + logs inserted/updated)
-    ops = [
-        UpdateOne({"Date": rec["Date"]}, {"$set": rec, "$currentDate": {"last_updated": True}}, upsert=True)
-        for rec in records
-    ]
+    # 3) Stream records in chunks; in incremental mode drop the lookback rows
+    fetched = len(df)
+    rollup_frames = {r: rollup_dataset(df, r) for r in rollups}
+    if since is not None:
+        df = df[to_storage_dates(df["Date"]) >= since]
+
+    # ✅ Chunked bulk upserts of the changed rows, pipelined with their preparation
+    t1 = time.perf_counter()
+    records, written, inserted, modified, timings["compare"], timings["write"] = write_chunks(
+        coll, iter_record_chunks(df, chunk_size), timeseries=is_timeseries(db, hist_collection(interval)))
+    logger.info(f"Upsert completed. Inserted {inserted}, Updated {modified}, "
+                f"{written / max(time.perf_counter() - t1, 1e-9):.0f} docs/s overall.")
+    if written:
+        # Fitted models built from the previous snapshot are now stale
+        MODEL_CACHE.invalidate(hist_collection(interval))
+
+    rollup_stats = {}
+    for r, rolled in rollup_frames.items():
+        if since is not None:
+            # the bucket holding `since` is rebuilt from its first bar
+            rolled = rolled[to_storage_dates(rolled["Date"]) >= pd.Timestamp(since).floor(INTERVALS[r])]
+        r_coll = db.get_collection(hist_collection(r))
+        r_records, r_written, r_inserted, r_modified, _, _ = write_chunks(
+            r_coll, iter_record_chunks(rolled, chunk_size), timeseries=is_timeseries(db, hist_collection(r)))
+        if r_written:
+            MODEL_CACHE.invalidate(hist_collection(r))
+        rollup_stats[r] = {"written": r_written, "inserted": r_inserted,
+                           "modified": r_modified, "skipped": r_records - r_written}
+        logger.info("Rollup %s -> %s: %s", interval, r, rollup_stats[r])
+    if written or any(s["written"] for s in rollup_stats.values()):
+        # new ETags for /api/historical
+        bump_version(db, HISTORICAL_SCOPE)
+    timings["total"] = time.perf_counter() - t0
+
+    stats = {
+        "mode": mode,
+        "interval": interval,
+        "start": start,
+        "end": end,
+        "fetched": fetched,
+        "written": written,
+        "inserted": inserted,
+        "modified": modified,
+        "skipped": records - written,
+        "timings": {k: round(v, 3) for k, v in timings.items()},
+        "rollups": rollup_stats,
+    }
+    logger.info("Ingest stats: %s", stats)
+    return stats
 
-    inserted, modified = 0, 0
-    try:
-        result = coll.bulk_write(ops, ordered=False)
-        inserted = result.upserted_count or 0
-        modified = result.modified_count or 0
-        logger.info(f"Upsert completed. Inserted {inserted}, Updated {modified}.")
-    except Exception as e:
-        logger.error(f"Mongo bulk upsert failed: {e}")
-        raise
 
-    total = inserted + modified
-    print(f"✅ Upsert done: {inserted} inserted, {modified} updated, total {total}.")
+def ingest_to_mongo(
+    ticker: str,
+    start: str,
+    end: str,
+    out_csv: str = None,
+    mongo_uri: str = DEFAULT_MONGO_URI,
+    db_name: str = DEFAULT_DB_NAME,
+    incremental: bool = False,
+    interval: str = DEFAULT_INTERVAL,
+):
+    """run_ingest(), returning the number of inserted + updated documents."""
+    stats = run_ingest(ticker, start, end, out_csv=out_csv, mongo_uri=mongo_uri,
+                       db_name=db_name, incremental=incremental, interval=interval)
+    total = stats["inserted"] + stats["modified"]
+    print(f"✅ Upsert done: {stats['inserted']} inserted, {stats['modified']} updated, "
+          f"{stats['skipped']} unchanged, total {total}.")
     return total
 
 
 def parse_args_and_run():
     parser = argparse.ArgumentParser(description="Ingest BTC dataset via fin_data_builder into MongoDB.")
     parser.add_argument("--ticker", required=True, help="Ticker symbol (BTC-USD only).")
-    parser.add_argument("--start", required=True, help="Start date (YYYY-MM-DD)")
-    parser.add_argument("--end", required=True, help="End date (YYYY-MM-DD)")
+    parser.add_argument("--start", required=False, help="Start date (YYYY-MM-DD); optional with --incremental")
+    parser.add_argument("--end", required=False, help="End date (YYYY-MM-DD); defaults to tomorrow with --incremental")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch and write candles from the latest stored date onwards.")
     parser.add_argument("--out", required=False, help="Optional CSV output path (for debugging).")
     parser.add_argument("--mongo-uri", required=False, default=DEFAULT_MONGO_URI, help="MongoDB URI")
     parser.add_argument("--db", required=False, default=DEFAULT_DB_NAME, help="MongoDB database name")
+    parser.add_argument("--interval", default=DEFAULT_INTERVAL, choices=list(INTERVALS),
+                        help="Bar interval to ingest (stored in its own collection).")
+    parser.add_argument("--rollup", default="",
+                        help="Comma-separated coarser intervals to downsample into, e.g. 1h,1d.")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Rows per bulk write (default INGEST_CHUNK_SIZE).")
     args = parser.parse_args()
 
+    if not args.incremental and not (args.start and args.end):
+        parser.error("--start and --end are required unless --incremental is given")
+
     if args.ticker.upper() != "BTC-USD":
         logger.error("Ingestion restricted to BTC-USD only. You provided: %s", args.ticker)
         raise SystemExit(2)
 
     try:
-        total = ingest_to_mongo(
+        stats = run_ingest(
             ticker=args.ticker,
             start=args.start,
             end=args.end,
             out_csv=args.out,
             mongo_uri=args.mongo_uri,
-            db_name=args.db
+            db_name=args.db,
+            incremental=args.incremental,
+            chunk_size=args.chunk_size,
+            interval=args.interval,
+            rollups=[r for r in args.rollup.split(",") if r]
         )
-        logger.info("Ingestion finished. Total upserts: %d", total)
+        logger.info("Ingestion finished. Fetched %d, wrote %d, skipped %d unchanged in %.2fs",
+                    stats["fetched"], stats["written"], stats["skipped"], stats["timings"]["total"])
     except Exception as e:
         logger.exception("Ingestion failed: %s", e)
         raise SystemExit(1)
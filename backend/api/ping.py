@@ -1,5 +1,19 @@
 from flask_restful import Resource
 
+from backend.api.db import POOL_STATS, client_count, client_options
+
 class Ping(Resource):
     def get(self):
         return {"status": "ok", "version": "0.1"}, 200
+
+
+class PoolPing(Resource):
+    def get(self):
+        """GET /api/ping/pool — connection pool counters for this worker process."""
+        return {
+            "status": "ok",
+            "version": "0.1",
+            "clients": client_count(),
+            "options": client_options(),
+            "pool": POOL_STATS.snapshot(),
+        }, 200
@@ -0,0 +1,148 @@
+# backend/api/schema.py
+"""
+Canonical storage schema for btc_historical and its index management.
+
+Daily candles live in btc_historical; other bar intervals each get their own
+collection with the same schema (see `hist_collection`).
+
+With MONGO_TIMESERIES=1, candle collections that do not exist yet are created
+as MongoDB time-series collections on `Date` (MongoDB 7.0+, which allows the
+deletes ingest uses to replace rewritten candles). Existing collections are
+left as they are.
+
+Documents are stored exactly as ingestion writes them: capitalised field names
+(`Date`, `Open`, ..., `Close`) with `Date` as a native (naive UTC) datetime,
+so that sorting and range queries use the BSON date order. API responses
+expose the same fields in lowercase (see `to_api_record`).
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+from pymongo import ASCENDING, DESCENDING, errors
+
+HIST_COLLECTION = "btc_historical"
+FORECAST_COLLECTION = "btc_forecasts"
+
+DATE_FIELD = "Date"
+CLOSE_FIELD = "Close"
+
+# Supported bar intervals (yfinance codes) and the time between bars
+INTERVALS = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+DEFAULT_INTERVAL = "1d"
+
+# Create new candle collections as time-series collections
+TIMESERIES = os.environ.get("MONGO_TIMESERIES", "0") == "1"
+TIMESERIES_GRANULARITY = {"1m": "minutes", "5m": "minutes", "1h": "hours", "1d": "hours"}
+
+# Large text fields left out of API reads unless asked for
+TEXT_FIELDS = ("headlines_concat",)
+
+DATE_INDEX = "date_unique"
+# Lets the forecast read (Date, Close) for the latest N rows from the index alone
+SERIES_INDEX = "date_close"
+
+logger = logging.getLogger("schema")
+
+
+def check_interval(interval):
+    """Return `interval` if supported, else raise ValueError."""
+    if interval not in INTERVALS:
+        raise ValueError(f"Unsupported interval {interval!r}; expected one of {', '.join(INTERVALS)}")
+    return interval
+
+
+def hist_collection(interval=DEFAULT_INTERVAL):
+    """Collection holding the candles of one bar interval."""
+    check_interval(interval)
+    return HIST_COLLECTION if interval == DEFAULT_INTERVAL else f"{HIST_COLLECTION}_{interval}"
+
+
+def to_storage_date(value):
+    """Convert a date-like value to the canonical stored form (naive UTC datetime)."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.to_pydatetime()
+
+
+def to_storage_dates(values):
+    """Vectorised to_storage_date for a column: datetime64 series, naive UTC."""
+    dates = pd.to_datetime(values)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert("UTC").dt.tz_localize(None)
+    return dates
+
+
+def to_api_record(doc):
+    """Shape a stored document for JSON responses: lowercase keys, ISO dates."""
+    out = {}
+    for key, value in doc.items():
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        out[key.lower()] = value
+    return out
+
+
+def migrate_legacy_dates(coll):
+    """Convert documents written with string dates (YYYY-MM-DD) to BSON dates in place."""
+    result = coll.update_many(
+        {DATE_FIELD: {"$type": "string"}},
+        [{"$set": {DATE_FIELD: {"$toDate": f"${DATE_FIELD}"}}}],
+    )
+    if result.modified_count:
+        logger.info("Converted %d legacy string dates in %s", result.modified_count, coll.name)
+    return result.modified_count
+
+
+def is_timeseries(db, name):
+    """True if collection `name` is a time-series collection (only checked with TIMESERIES on)."""
+    if not TIMESERIES:
+        return False
+    info = next(iter(db.list_collections(filter={"name": name})), None)
+    return bool(info) and info.get("type") == "timeseries"
+
+
+def create_timeseries_collection(db, interval):
+    """Create the candle collection of `interval` as a time-series collection, if it does not exist."""
+    name = hist_collection(interval)
+    if name in db.list_collection_names():
+        return False
+    try:
+        db.create_collection(name, timeseries={"timeField": DATE_FIELD,
+                                               "granularity": TIMESERIES_GRANULARITY[interval]})
+    except errors.CollectionInvalid:
+        return False  # created concurrently
+    logger.info("Created time-series collection %s", name)
+    return True
+
+
+def ensure_indexes(db, intervals=None):
+    """
+    Create the indexes the read and write paths rely on, for the candle
+    collections of `intervals` (default: all of them). Idempotent.
+    """
+    for interval in intervals or INTERVALS:
+        name = hist_collection(interval)
+        if TIMESERIES:
+            create_timeseries_collection(db, interval)
+        hist = db.get_collection(name)
+        if is_timeseries(db, name):
+            # time-series collections take no unique indexes and never held string dates;
+            # ingest enforces one document per Date itself
+            hist.create_index([(DATE_FIELD, DESCENDING), (CLOSE_FIELD, ASCENDING)], name=SERIES_INDEX)
+            continue
+        migrate_legacy_dates(hist)
+        try:
+            hist.create_index([(DATE_FIELD, ASCENDING)], unique=True, name=DATE_INDEX)
+        except errors.OperationFailure as e:
+            # e.g. duplicate dates left over from older ingests; reads still work
+            logger.warning("Could not create unique index on %s.%s: %s", name, DATE_FIELD, e)
+        hist.create_index([(DATE_FIELD, DESCENDING), (CLOSE_FIELD, ASCENDING)], name=SERIES_INDEX)
+    db.get_collection(FORECAST_COLLECTION).create_index([("timestamp", DESCENDING)], name="timestamp_desc")
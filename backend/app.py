@@ -1,24 +1,51 @@
 # backend/app.py
 from flask import Flask, request
 from flask_restful import Api
-from backend.api.ping import Ping
+from backend.api.ping import Ping, PoolPing
 from backend.api.historical import Historical
-from backend.api.ingest import ingest_to_mongo
+from backend.api.ingest import run_ingest
 
 from flask_cors import CORS
-from backend.api.forecast import Forecast
+from backend.api.forecast import Forecast, LatestForecast
+from backend.api.db import get_db
+from backend.api.encoding import compress_response
+from backend.api.schema import ensure_indexes
+from backend.training import start_background_training
 from dotenv import load_dotenv
 load_dotenv()
+import os
+import threading
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 api = Api(app)
 
 
+def init_indexes():
+    try:
+        ensure_indexes(get_db())
+    except Exception as e:
+        app.logger.warning("Index setup skipped: %s", e)
+
+
+# Index creation is idempotent; run it off the import path so a slow or
+# unreachable Mongo never delays worker boot.
+if os.getenv("MONGO_ENSURE_INDEXES", "1") == "1":
+    threading.Thread(target=init_indexes, name="ensure-indexes", daemon=True).start()
+
+
+@app.after_request
+def compress(response):
+    # gzip/brotli for large responses the client accepts compressed
+    return compress_response(response, request)
+
+
 # --- ROUTES ---
 api.add_resource(Ping, "/api/ping")
+api.add_resource(PoolPing, "/api/ping/pool")
 api.add_resource(Historical, "/api/historical")
 api.add_resource(Forecast, "/api/forecast")
+api.add_resource(LatestForecast, "/api/forecast/latest")
 
 # --- Ingestion Endpoint ---
 @app.route("/api/ingest", methods=["POST"])
@@ -26,20 +53,33 @@ def trigger_ingestion():
     """
     POST /api/ingest
     Body: { "start": "YYYY-MM-DD", "end": "YYYY-MM-DD" }
+       or { "incremental": true } to fetch only candles after the latest stored one
+    Optional: "interval": "1m" | "5m" | "1h" | "1d" (default) and
+              "rollups": ["1h", "1d"] coarser intervals to downsample into
     """
     data = request.get_json(force=True)
     start = data.get("start")
     end = data.get("end")
-    if not (start and end):
+    incremental = bool(data.get("incremental", False))
+    if not incremental and not (start and end):
         return {"error": "Missing 'start' or 'end' date"}, 400
     try:
-        inserted = ingest_to_mongo(
+        stats = run_ingest(
             ticker="BTC-USD",
             start=start,
             end=end,
-            out_csv=None
+            out_csv=None,
+            incremental=incremental,
+            interval=data.get("interval", "1d"),
+            rollups=data.get("rollups") or ()
         )
-        return {"status": "success", "inserted": inserted}, 200
+        inserted = stats["inserted"] + stats["modified"]
+        # Refit and publish models in a worker process (opt-in; a standalone
+        # `python -m backend.training` worker picks up new data on its own)
+        training = False
+        if os.getenv("TRAIN_ON_INGEST", "0") == "1" and stats["written"]:
+            training = start_background_training(stats["interval"])
+        return {"status": "success", "inserted": inserted, "training_started": training, "stats": stats}, 200
     except Exception as e:
         return {"status": "error", "message": str(e)}, 500
 
@@ -11,32 +11,79 @@ Usage:
     python fin_data_builder.py --exchange NASDAQ --ticker AAPL --start 2025-08-15 --end 2025-09-16 --out aapl_dataset.csv
 """
 
-import feedparser
 from dateutil import parser as dateparser
 import argparse
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import List
 import pandas as pd
 import numpy as np
-import yfinance as yf
 import requests
-from bs4 import BeautifulSoup
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from requests.adapters import HTTPAdapter, Retry
 
+from backend.data.http_cache import HTTP_CACHE_DIR, CachingHTTPAdapter
+from backend.data.price_cache import PRICE_CACHE_DIR, PriceCache
+from backend.data.sentiment_cache import SENTIMENT_CACHE_PATH, SentimentCache, get_analyzer, score_headlines
+
+# yfinance, bs4, feedparser and vaderSentiment are imported inside the functions
+# that use them: they are slow to import and most processes importing this
+# module (the API, tests) never fetch anything. See backend/preload.py.
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 
-def requests_session_with_retries(retries=3, backoff=0.5):
+def requests_session_with_retries(retries=3, backoff=0.5, cache_dir=HTTP_CACHE_DIR):
+    """
+    Session with retry/backoff on 429 and 5xx. With `cache_dir` set (the default,
+    env HTTP_CACHE_DIR; empty disables it) GET responses go through the on-disk
+    cache in backend/data/http_cache.py.
+    """
     s = requests.Session()
     retries = Retry(total=retries, backoff_factor=backoff,
                     status_forcelist=[429, 500, 502, 503, 504])
-    s.mount("https://", HTTPAdapter(max_retries=retries))
-    s.mount("http://", HTTPAdapter(max_retries=retries))
+    if cache_dir:
+        adapter = CachingHTTPAdapter(cache_dir=cache_dir, max_retries=retries)
+    else:
+        adapter = HTTPAdapter(max_retries=retries)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
     return s
 
 SESSION = requests_session_with_retries()
-SENT_ANALYZER = SentimentIntensityAnalyzer()
+# downloaded OHLCV bars; empty PRICE_CACHE_DIR disables it
+PRICE_CACHE = PriceCache() if PRICE_CACHE_DIR else None
+
+YAHOO_NEWS_URL = "https://finance.yahoo.com/quote/{ticker}/news?p={ticker}"
+COINDESK_URL = "https://www.coindesk.com/tag/{slug}"
+GOOGLE_NEWS_RSS_URL = "https://news.google.com/rss/search?q={query}&hl=en-US&gl=US&ceid=US:en"
+
+# Seconds build_dataset waits for the news sources as a whole
+NEWS_DEADLINE = 25
+
+# yfinance limits on intraday history: how far back each interval goes, and
+# the longest range a single request may ask for (days)
+YF_LOOKBACK_DAYS = {"1m": 30, "5m": 60, "1h": 730}
+YF_MAX_DAYS_PER_REQUEST = {"1m": 7, "5m": 60, "1h": 730}
+# interval -> pandas resample rule, for rollups
+RESAMPLE_RULES = {"1m": "1min", "5m": "5min", "1h": "1h", "1d": "1D"}
+
+def get_sentiment_analyzer():
+    return get_analyzer()
+
+
+@lru_cache(maxsize=None)
+def get_sentiment_cache():
+    # headline -> compound score; empty SENTIMENT_CACHE_PATH disables it
+    return SentimentCache(SENTIMENT_CACHE_PATH) if SENTIMENT_CACHE_PATH else None
+
+
+def __getattr__(name):
+    # keep `fin_data_builder.SENT_ANALYZER` working without building it at import
+    if name == "SENT_ANALYZER":
+        return get_sentiment_analyzer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 ### ---------- Structured data ----------
 def flatten_columns_if_needed(df: pd.DataFrame) -> pd.DataFrame:
@@ -106,22 +153,123 @@ def map_price_columns(df: pd.DataFrame) -> pd.DataFrame:
     found_cols = [c for c in ['Open', 'High', 'Low', 'Close', 'Volume'] if c in renamed.columns]
     return renamed[found_cols]
 
-def fetch_prices(ticker: str, start: str, end: str) -> pd.DataFrame:
-    logging.info(f"Fetching price data for {ticker} from {start} to {end} via yfinance")
-    # ask yfinance for raw history (auto_adjust explicitly set to avoid futures)
-    df = yf.download(ticker, start=start, end=end, progress=False, auto_adjust=False)
-    if df.empty:
+def fetch_prices(ticker: str, start: str, end: str, interval: str = "1d") -> pd.DataFrame:
+    """
+    OHLCV bars of `interval` for [start, end). Bars already in PRICE_CACHE are
+    reused and only the missing ranges (plus the last, possibly partial, cached
+    bar) are downloaded.
+    """
+    if PRICE_CACHE is None:
+        df = download_prices(ticker, start, end, interval)
+        if df.empty:
+            raise RuntimeError(f"No price data returned for {ticker}. Check ticker or date range.")
+        return df
+
+    cached = PRICE_CACHE.load(ticker, interval)
+    gaps = PRICE_CACHE.missing_ranges(cached, start, end)
+    merged = cached
+    for gap_start, gap_end in gaps:
+        fresh = download_prices(ticker, gap_start.strftime("%Y-%m-%d"), gap_end.strftime("%Y-%m-%d"), interval)
+        if not fresh.empty:
+            merged = PRICE_CACHE.merge(merged, fresh)
+    if gaps and merged is not None and not merged.empty:
+        PRICE_CACHE.save(ticker, merged, interval)
+    logging.info(f"Price cache for {ticker} ({interval}): downloaded {len(gaps)} missing range(s)")
+
+    out = merged.loc[(merged.index >= pd.Timestamp(start)) & (merged.index < pd.Timestamp(end))] \
+        if merged is not None else pd.DataFrame()
+    if out.empty:
         raise RuntimeError(f"No price data returned for {ticker}. Check ticker or date range.")
-    # map incoming columns to canonical ones
-    mapped = map_price_columns(df)
-    if mapped.empty:
-        # diagnostic: show columns and raise helpful error
-        raise RuntimeError(
-            f"Unable to find Open/High/Low/Close/Volume columns in the price data. "
-            f"Returned columns: {list(df.columns)}"
-        )
-    mapped.index = pd.to_datetime(mapped.index).normalize()
-    return mapped
+    return out
+
+
+def backfill_windows(start: str, end: str, interval: str = "1d", now=None):
+    """
+    Split [start, end) into the request windows yfinance accepts for `interval`:
+    at most YF_MAX_DAYS_PER_REQUEST days each, and no older than YF_LOOKBACK_DAYS
+    before `now` (earlier parts are dropped with a warning).
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    now = pd.Timestamp(now) if now is not None else pd.Timestamp.now('UTC').tz_localize(None)
+    lookback = YF_LOOKBACK_DAYS.get(interval)
+    if lookback is not None:
+        # a day's margin: yfinance rejects requests at the edge of the window
+        earliest = (now - pd.Timedelta(days=lookback - 1)).normalize()
+        if start < earliest:
+            logging.warning(f"yfinance keeps only {lookback} days of {interval} bars: "
+                            f"fetching from {earliest.date()} instead of {start.date()}")
+            start = earliest
+    step = YF_MAX_DAYS_PER_REQUEST.get(interval)
+    windows = []
+    while start < end:
+        stop = min(start + pd.Timedelta(days=step), end) if step else end
+        windows.append((start, stop))
+        start = stop
+    return windows
+
+
+def download_prices(ticker: str, start: str, end: str, interval: str = "1d") -> pd.DataFrame:
+    """
+    Download [start, end) of `interval` bars from yfinance, in as many requests
+    as its per-interval limits need; an empty frame when there are no bars.
+    Daily bars are indexed by date, intraday bars by naive UTC timestamp.
+    """
+    import yfinance as yf
+    parts = []
+    for win_start, win_end in backfill_windows(start, end, interval):
+        logging.info(f"Fetching {interval} price data for {ticker} from {win_start} to {win_end} via yfinance")
+        # ask yfinance for raw history (auto_adjust explicitly set to avoid futures)
+        df = yf.download(ticker, start=win_start, end=win_end, interval=interval,
+                         progress=False, auto_adjust=False)
+        if df.empty:
+            continue
+        # map incoming columns to canonical ones
+        mapped = map_price_columns(df)
+        if mapped.empty:
+            # diagnostic: show columns and raise helpful error
+            raise RuntimeError(
+                f"Unable to find Open/High/Low/Close/Volume columns in the price data. "
+                f"Returned columns: {list(df.columns)}"
+            )
+        index = pd.to_datetime(mapped.index)
+        if interval == "1d":
+            index = index.normalize()
+        elif index.tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+        mapped.index = index
+        parts.append(mapped)
+    if not parts:
+        return pd.DataFrame()
+    out = pd.concat(parts)
+    return out[~out.index.duplicated(keep="last")].sort_index()
+
+
+def rollup_ohlcv(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """Downsample OHLCV bars (DatetimeIndex) to the coarser `interval`."""
+    rule = RESAMPLE_RULES[interval]
+    agg = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    out = df.resample(rule, label="left", closed="left").agg({c: f for c, f in agg.items() if c in df.columns})
+    return out.dropna(subset=["Close"])
+
+
+def rollup_dataset(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Downsample a build_dataset() frame to the coarser `interval`: OHLCV rolled
+    up, indicators recomputed on the new bars, news taken from each bar's first
+    row (news is aggregated per day, so it is constant within a bar).
+    """
+    bars = df.set_index(pd.to_datetime(df["Date"])).drop(columns=["Date"])
+    out = compute_indicators(rollup_ohlcv(bars, interval))
+    out['Volatility'] = out['Volatility'].fillna(0.0)
+    out['Return'] = out['Return'].fillna(0.0)
+    news_cols = [c for c in ('headlines_concat', 'news_sentiment', 'headline_count') if c in bars.columns]
+    news = bars[news_cols].resample(RESAMPLE_RULES[interval], label="left", closed="left").first()
+    out = out.join(news, how="left")
+    out.index.name = "Date"
+    out = out.reset_index()
+    date_format = "%Y-%m-%d" if interval == "1d" else "%Y-%m-%dT%H:%M:%S"
+    out["Date"] = out["Date"].dt.strftime(date_format)
+    return out
 
 def compute_indicators(df: pd.DataFrame, ma_windows: List[int] = [5, 10], vol_window: int = 5) -> pd.DataFrame:
     out = df.copy()
@@ -136,13 +284,14 @@ def compute_indicators(df: pd.DataFrame, ma_windows: List[int] = [5, 10], vol_wi
 
 ### ---------- Unstructured (news) ----------
 def fetch_yahoo_headlines(ticker: str):
-    base = f"https://finance.yahoo.com/quote/{ticker}/news?p={ticker}"
+    base = YAHOO_NEWS_URL.format(ticker=ticker)
     headers = {"User-Agent": "Mozilla/5.0"}
     logging.info(f"Scraping Yahoo news for {ticker} ({base})")
     items = []
     try:
         r = SESSION.get(base, headers=headers, timeout=10)
         r.raise_for_status()
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(r.text, "html.parser")
         for a in soup.select("h3 a"):
             headline = a.get_text(strip=True)
@@ -165,6 +314,7 @@ def fetch_yahoo_headlines(ticker: str):
 def fetch_yf_news(ticker: str):
     items = []
     try:
+        import yfinance as yf
         tk = yf.Ticker(ticker)
         news = tk.news
         if isinstance(news, list):
@@ -196,11 +346,12 @@ def fetch_yf_news(ticker: str):
     return items
 
 def fetch_coindesk_headlines(coin_slug='bitcoin'):
-    base = f"https://www.coindesk.com/tag/{coin_slug}"
+    base = COINDESK_URL.format(slug=coin_slug)
     items = []
     try:
         r = SESSION.get(base, timeout=10)
         r.raise_for_status()
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(r.text, "html.parser")
         for a in soup.select("h3 a, h4 a"):
             headline = a.get_text(strip=True)
@@ -216,9 +367,13 @@ def fetch_google_news_rss(query: str, max_items=50):
     """
     items = []
     try:
-        rss_url = f"https://news.google.com/rss/search?q={query}&hl=en-US&gl=US&ceid=US:en"
+        import feedparser
+        rss_url = GOOGLE_NEWS_RSS_URL.format(query=query)
         logging.info(f"Fetching Google News RSS for query='{query}' -> {rss_url}")
-        feed = feedparser.parse(rss_url)
+        # fetched through SESSION (retries + HTTP cache) rather than by feedparser itself
+        r = SESSION.get(rss_url, timeout=15)
+        r.raise_for_status()
+        feed = feedparser.parse(r.content)
 
         for entry in feed.entries[:max_items]:
             title = entry.get('title') or ''
@@ -240,7 +395,7 @@ def fetch_google_news_rss(query: str, max_items=50):
 
 
 def score_headline_sentiment(text: str) -> float:
-    vs = SENT_ANALYZER.polarity_scores(text)
+    vs = get_sentiment_analyzer().polarity_scores(text)
     return vs['compound']
 
 def aggregate_news_by_date(news_items: List[dict]) -> pd.DataFrame:
@@ -248,7 +403,7 @@ def aggregate_news_by_date(news_items: List[dict]) -> pd.DataFrame:
         return pd.DataFrame(columns=['headlines_concat', 'news_sentiment', 'headline_count'])
     df = pd.DataFrame(news_items)
     df['date'] = pd.to_datetime(df['date']).dt.normalize()
-    df['sentiment'] = df['headline'].apply(score_headline_sentiment)
+    df['sentiment'] = score_headlines(df['headline'], cache=get_sentiment_cache())
     grouped = df.groupby('date').agg(
         headlines_concat=('headline', lambda arr: " || ".join(list(arr))),
         news_sentiment=('sentiment', 'mean'),
@@ -258,18 +413,23 @@ def aggregate_news_by_date(news_items: List[dict]) -> pd.DataFrame:
     return grouped
 
 ### ---------- Merge & Save ----------
-def merge_and_save(price_df: pd.DataFrame, news_agg_df: pd.DataFrame, out_path: str, fmt='csv'):
+def merge_and_save(price_df: pd.DataFrame, news_agg_df: pd.DataFrame, out_path: str, fmt='csv',
+                   interval: str = "1d"):
     """
     Aligns price rows with news rows using a merge_asof (backward) so that
     price on Date D gets the most recent news on or before D (within 1 day tolerance).
-    This is more robust than exact-date matching.
+    This is more robust than exact-date matching. Intraday bars keep their time
+    of day and get the news of their day.
     """
     # flatten price columns if needed
     price_df = flatten_columns_if_needed(price_df)
     left = price_df.reset_index()
     if left.columns[0].lower() != 'date':
         left = left.rename(columns={left.columns[0]: 'Date'})
-    left['Date'] = pd.to_datetime(left['Date']).dt.normalize()
+    left['Date'] = pd.to_datetime(left['Date'])
+    if interval == "1d":
+        left['Date'] = left['Date'].dt.normalize()
+    left['Date'] = left['Date'].astype('datetime64[ns]')
     left_sorted = left.sort_values('Date').reset_index(drop=True)
 
     if news_agg_df is None or news_agg_df.empty:
@@ -279,7 +439,7 @@ def merge_and_save(price_df: pd.DataFrame, news_agg_df: pd.DataFrame, out_path:
         right = news_agg_df.reset_index()
         if right.columns[0].lower() != 'date':
             right = right.rename(columns={right.columns[0]: 'Date'})
-        right['Date'] = pd.to_datetime(right['Date']).dt.normalize()
+        right['Date'] = pd.to_datetime(right['Date']).dt.normalize().astype('datetime64[ns]')
         # keep only one record per date (should already be so), and sort
         right = right.sort_values('Date').drop_duplicates(subset=['Date']).reset_index(drop=True)
         right = flatten_columns_if_needed(right)
@@ -316,38 +476,71 @@ def merge_and_save(price_df: pd.DataFrame, news_agg_df: pd.DataFrame, out_path:
     return merged
 
 ### ---------- Main flow ----------
-def build_dataset(exchange: str, ticker: str, start: str, end: str, out_path: str):
-    price_df = fetch_prices(ticker, start, end)
-    price_df = compute_indicators(price_df)
-    
-    news_items = []
-
-    # 1. Try Yahoo scraping
-    news_items += fetch_yahoo_headlines(ticker)
-
-    # 2. Fallback to yfinance
-    if not news_items:
-        logging.info("Yahoo returned no headlines — trying yfinance .news fallback")
-        news_items += fetch_yf_news(ticker)
-
-    # 3. Fallback to Google News RSS with ticker
-    if not news_items:
-        logging.info("yfinance returned no headlines — trying Google News RSS (ticker)")
-        news_items += fetch_google_news_rss(ticker)
-
-    # 4. Fallback to Google News RSS with broader company name
-    if not news_items:
-        company_name = "Apple Inc" if ticker.upper() == "AAPL" else ticker
-        logging.info(f"No headlines yet — trying Google News RSS with company name '{company_name}'")
-        news_items += fetch_google_news_rss(company_name)
+def _result_by(future, deadline, name):
+    """A news source's items if it finished before `deadline`, else []."""
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0))
+    except FutureTimeout:
+        logging.warning(f"News source '{name}' missed the fetch deadline — skipped")
+    except Exception as e:
+        logging.warning(f"News source '{name}' failed: {e}")
+    return []
 
-    # Log how many we finally got
-    logging.info(f"Total collected news items: {len(news_items)}")
+def build_dataset(exchange: str, ticker: str, start: str, end: str, out_path: str, interval: str = "1d"):
+    """
+    Bars of `interval` (1m/5m/1h/1d) for [start, end) with indicators and daily
+    news sentiment. Indicator windows count bars, not days. Dates come back as
+    YYYY-MM-DD for daily bars and as ISO timestamps (UTC) for intraday ones.
+    """
+    # Fire the price download and every news source at once; ingestion then
+    # takes as long as the slowest source it needs rather than their sum.
+    company_name = "Apple Inc" if ticker.upper() == "AAPL" else ticker
+    fallback_chain = [
+        # (name, fetch, message logged when falling back to it)
+        ("yahoo", lambda: fetch_yahoo_headlines(ticker), None),
+        ("yfinance", lambda: fetch_yf_news(ticker),
+         "Yahoo returned no headlines — trying yfinance .news fallback"),
+        ("google_ticker", lambda: fetch_google_news_rss(ticker),
+         "yfinance returned no headlines — trying Google News RSS (ticker)"),
+    ]
+    if company_name != ticker:
+        fallback_chain.append(("google_company", lambda: fetch_google_news_rss(company_name),
+                               f"No headlines yet — trying Google News RSS with company name '{company_name}'"))
+
+    executor = ThreadPoolExecutor(max_workers=len(fallback_chain) + 2, thread_name_prefix="fetch")
+    try:
+        prices_future = executor.submit(fetch_prices, ticker, start, end, interval=interval)
+        chain_futures = [(name, executor.submit(fn), msg) for name, fn, msg in fallback_chain]
+        coindesk_future = None
+        if ticker.upper().endswith("USD"):
+            coin = ticker.split('-')[0].lower()
+            coindesk_future = executor.submit(fetch_coindesk_headlines, coin)
+
+        deadline = time.monotonic() + NEWS_DEADLINE
+
+        # Same fallback semantics as before: the first source in priority order
+        # that returns headlines wins; lower-priority results are discarded.
+        news_items = []
+        for name, future, msg in chain_futures:
+            if msg:
+                logging.info(msg)
+            news_items = _result_by(future, deadline, name)
+            if news_items:
+                break
+
+        # Log how many we finally got
+        logging.info(f"Total collected news items: {len(news_items)}")
+
+        if coindesk_future is not None:
+            news_items = news_items + _result_by(coindesk_future, deadline, "coindesk")
+
+        # prices are required: no news deadline, fetch_prices raises on failure
+        price_df = prices_future.result()
+    finally:
+        # don't wait for sources still running past the deadline
+        executor.shutdown(wait=False, cancel_futures=True)
 
-    
-    if ticker.upper().endswith("USD"):
-        coin = ticker.split('-')[0].lower()
-        news_items += fetch_coindesk_headlines(coin)
+    price_df = compute_indicators(price_df)
 
     news_agg = aggregate_news_by_date(news_items)
 
@@ -362,12 +555,13 @@ def build_dataset(exchange: str, ticker: str, start: str, end: str, out_path: st
     if not news_agg.empty:
         logging.info("Aggregated news head:\n" + news_agg.head().to_string())
 
-    merged_df = merge_and_save(price_df, news_agg, out_path, fmt='csv')
+    merged_df = merge_and_save(price_df, news_agg, out_path, fmt='csv', interval=interval)
     
         # ✅ Ensure 'Date' is an explicit column (not just index)
     if "Date" not in merged_df.columns:
         merged_df = merged_df.reset_index().rename(columns={"index": "Date"})
-    merged_df["Date"] = pd.to_datetime(merged_df["Date"]).dt.strftime("%Y-%m-%d")
+    date_format = "%Y-%m-%d" if interval == "1d" else "%Y-%m-%dT%H:%M:%S"
+    merged_df["Date"] = pd.to_datetime(merged_df["Date"]).dt.strftime(date_format)
 
     # ✅ Drop rows missing essential data (safety)
     merged_df = merged_df.dropna(subset=["Close"], how="any")
@@ -386,12 +580,13 @@ def parse_args():
     p.add_argument('--start', type=str, required=False, default=default_start)
     p.add_argument('--end', type=str, required=False, default=default_end)
     p.add_argument('--out', type=str, required=False, default='dataset.csv')
+    p.add_argument('--interval', type=str, required=False, default='1d', choices=['1m', '5m', '1h', '1d'])
     return p.parse_args()
 
 if __name__ == '__main__':
     args = parse_args()
     try:
-        df = build_dataset(args.exchange, args.ticker, args.start, args.end, args.out)
+        df = build_dataset(args.exchange, args.ticker, args.start, args.end, args.out, interval=args.interval)
         print(df.tail(10).to_string())
     except Exception as e:
         logging.error(f"Fatal error in building dataset: {e}")
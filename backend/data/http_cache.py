@@ -0,0 +1,155 @@
+# backend/data/http_cache.py
+"""
+On-disk HTTP response cache for the scraping session.
+
+`CachingHTTPAdapter` is mounted by `requests_session_with_retries` in place of
+the plain HTTPAdapter. GET responses are stored on disk (one body file plus a
+small JSON header file per URL) and:
+
+- served straight from disk while fresh (Cache-Control max-age, else the
+  adapter's default TTL);
+- revalidated with If-None-Match / If-Modified-Since once stale, so an
+  unchanged page costs a 304 instead of a full download;
+- evicted least-recently-used first once the cache exceeds `max_bytes`.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_DIR = os.environ.get("HTTP_CACHE_DIR", os.path.join(".cache", "http"))
+HTTP_CACHE_TTL = float(os.environ.get("HTTP_CACHE_TTL", 300))
+HTTP_CACHE_MAX_MB = float(os.environ.get("HTTP_CACHE_MAX_MB", 100))
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, default_ttl=HTTP_CACHE_TTL,
+                 max_bytes=int(HTTP_CACHE_MAX_MB * 1024 * 1024), **kwargs):
+        super().__init__(**kwargs)
+        self.cache_dir = cache_dir
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    # -- storage -----------------------------------------------------------
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".body"
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        os.utime(body_path)  # mark as recently used for eviction
+        return meta, body
+
+    def _store(self, url, meta, body=None):
+        meta_path, body_path = self._paths(url)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if body is not None:
+            tmp = body_path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, body_path)
+        tmp = meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_path)
+
+    def _evict(self):
+        """Delete least recently used entries until the bodies fit in max_bytes."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".body"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                for p in (path, path[:-len(".body")] + ".json"):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+                total -= size
+
+    def _ttl(self, headers):
+        cache_control = headers.get("Cache-Control", "")
+        match = _MAX_AGE.search(cache_control)
+        return float(match.group(1)) if match else self.default_ttl
+
+    # -- adapter -----------------------------------------------------------
+    def _from_cache(self, request, meta, body):
+        resp = Response()
+        resp.status_code = meta["status"]
+        resp.reason = meta.get("reason")
+        resp.headers = CaseInsensitiveDict(meta["headers"])
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = body
+        resp.url = request.url
+        resp.request = request
+        resp.connection = self
+        resp.from_cache = True
+        return resp
+
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        cached = self._load(request.url)
+        if cached is not None:
+            meta, body = cached
+            if time.time() < meta["expires"]:
+                return self._from_cache(request, meta, body)
+            if meta["headers"].get("ETag"):
+                request.headers["If-None-Match"] = meta["headers"]["ETag"]
+            if meta["headers"].get("Last-Modified"):
+                request.headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+
+        resp = super().send(request, **kwargs)
+
+        if resp.status_code == 304 and cached is not None:
+            meta["expires"] = time.time() + self._ttl(resp.headers)
+            self._store(request.url, meta)
+            return self._from_cache(request, meta, body)
+
+        cache_control = resp.headers.get("Cache-Control", "")
+        if resp.status_code == 200 and "no-store" not in cache_control:
+            meta = {
+                "status": resp.status_code,
+                "reason": resp.reason,
+                "headers": dict(resp.headers),
+                "expires": time.time() + self._ttl(resp.headers),
+            }
+            try:
+                self._store(request.url, meta, resp.content)
+                self._evict()
+            except OSError as e:
+                logger.warning("HTTP cache write failed for %s: %s", request.url, e)
+        resp.from_cache = False
+        return resp
@@ -0,0 +1,58 @@
+# backend/data/price_cache.py
+"""
+Local cache of downloaded OHLCV bars, one pickle per ticker and interval.
+
+The cached range is kept contiguous, so `missing_ranges` only ever returns the
+stretch before it, the stretch after it, or both. The last cached bar is always
+treated as missing: the current day's candle is still moving.
+"""
+import os
+import re
+
+import pandas as pd
+
+PRICE_CACHE_DIR = os.environ.get("PRICE_CACHE_DIR", os.path.join(".cache", "prices"))
+
+
+class PriceCache:
+    def __init__(self, root=PRICE_CACHE_DIR):
+        self.root = root
+
+    def _path(self, ticker, interval):
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+        return os.path.join(self.root, f"{safe}_{interval}.pkl")
+
+    def load(self, ticker, interval="1d"):
+        try:
+            return pd.read_pickle(self._path(ticker, interval))
+        except (OSError, ValueError, EOFError):
+            return None
+
+    def save(self, ticker, df, interval="1d"):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(ticker, interval)
+        tmp = path + ".tmp"
+        df.to_pickle(tmp)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def missing_ranges(cached, start, end):
+        """[(start, end), ...] to download so that cached covers [start, end)."""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if cached is None or cached.empty:
+            return [(start, end)]
+        first, last = cached.index.min(), cached.index.max()
+        gaps = []
+        if start < first:
+            gaps.append((start, first))
+        if end > last:
+            # refetch the last cached bar too; it may have been partial
+            gaps.append((last, end))
+        return gaps
+
+    @staticmethod
+    def merge(cached, fresh):
+        if cached is None or cached.empty:
+            return fresh.sort_index()
+        out = pd.concat([cached, fresh])
+        return out[~out.index.duplicated(keep="last")].sort_index()
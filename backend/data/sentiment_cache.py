@@ -0,0 +1,113 @@
+# backend/data/sentiment_cache.py
+"""
+Headline sentiment with a persistent memo cache.
+
+Scrapers return mostly the same front-page headlines on every ingest, so VADER
+compound scores are stored in SQLite keyed by a hash of the headline text and
+only unseen headlines are scored. Large cold batches are split across a
+process pool.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_CACHE_PATH = os.environ.get("SENTIMENT_CACHE_PATH", os.path.join(".cache", "sentiment.sqlite3"))
+# cold batches at least this big are scored in a process pool
+PARALLEL_MIN = int(os.environ.get("SENTIMENT_PARALLEL_MIN", 500))
+# bump when the analyser or its lexicon changes so old scores are not reused
+SCORER_VERSION = "vader-1"
+
+
+@lru_cache(maxsize=None)
+def get_analyzer():
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+
+def _score_chunk(texts):
+    analyzer = get_analyzer()
+    return [analyzer.polarity_scores(t)["compound"] for t in texts]
+
+
+def score_batch(texts, processes=None):
+    """Compound scores for `texts`, in a spawn process pool when the batch is large."""
+    processes = processes or os.cpu_count() or 1
+    if len(texts) < PARALLEL_MIN or processes < 2:
+        return _score_chunk(texts)
+    size = -(-len(texts) // processes)
+    chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+    # spawn: the caller may still have fetch threads running
+    with multiprocessing.get_context("spawn").Pool(len(chunks)) as pool:
+        return [s for part in pool.map(_score_chunk, chunks) for s in part]
+
+
+def headline_key(text):
+    return hashlib.blake2b(f"{SCORER_VERSION}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SentimentCache:
+    def __init__(self, path=SENTIMENT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, compound REAL NOT NULL)")
+
+    def _connect(self):
+        # `with conn:` only commits; callers wrap it in closing() to release the connection
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        with self._lock, closing(self._connect()) as conn, conn:
+            for i in range(0, len(keys), 500):  # stay under SQLite's variable limit
+                part = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, compound FROM scores WHERE key IN ({','.join('?' * len(part))})", part)
+                found.update(rows)
+        return found
+
+    def put_many(self, scores):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO scores (key, compound) VALUES (?, ?)", scores.items())
+
+
+def score_headlines(texts, cache=None, processes=None):
+    """
+    Compound score for each of `texts`, reading known headlines from `cache`
+    and scoring (then storing) only the rest. Logs the hit rate and throughput.
+    """
+    texts = list(texts)
+    keys = [headline_key(t) for t in texts]
+    known = cache.get_many(set(keys)) if cache is not None else {}
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in known:
+            missing.setdefault(key, text)
+
+    started = time.perf_counter()
+    if missing:
+        fresh = dict(zip(missing, score_batch(list(missing.values()), processes)))
+        if cache is not None:
+            cache.put_many(fresh)
+        known.update(fresh)
+    elapsed = time.perf_counter() - started
+
+    hits = len(texts) - sum(1 for k in keys if k in missing)
+    logger.info(
+        "Sentiment: %d headlines, %d cache hits (%.0f%%), scored %d new in %.3fs (%.0f/s)",
+        len(texts), hits, 100.0 * hits / len(texts) if texts else 0.0,
+        len(missing), elapsed, len(missing) / elapsed if elapsed > 0 else 0.0,
+    )
+    return [known[k] for k in keys]
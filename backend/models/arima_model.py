@@ -1,22 +1,116 @@
 # backend/models/arima_model.py
+import json
+import os
 import warnings
 import numpy as np
-from statsmodels.tsa.arima.model import ARIMA
-from .base_model import BaseModel
+from .base_model import BaseModel, check_quantiles, load_array, save_array
 
 class ARIMAModel(BaseModel):
-    def __init__(self, order=(2, 1, 2)):
+    def __init__(self, order=(2, 1, 2), refit_every=None, drift_threshold=3.0):
+        """
+        refit_every: re-estimate parameters after this many observations have been
+            added through update() (None = only on drift).
+        drift_threshold: re-estimate when the mean absolute standardized one-step
+            forecast error of the new observations exceeds this value.
+        """
         self.order = order
+        self.refit_every = refit_every
+        self.drift_threshold = drift_threshold
         self.model_fit = None
+        self.history = None
+        self.n_since_refit = 0
+        self.last_update = None
+
+    def fit(self, series, start_params=None):
+        """start_params: warm start for the optimiser (e.g. the previous fit's params)."""
+        from statsmodels.tsa.arima.model import ARIMA  # slow import, deferred to first fit
+
+        warnings.filterwarnings("ignore")
+        self.history = np.asarray(series, dtype=float)
+        model = ARIMA(self.history, order=self.order)
+        self.model_fit = model.fit(start_params=start_params)
+        self.n_since_refit = 0
+        return self
+
+    def get_params(self):
+        return {"order": list(self.order), "refit_every": self.refit_every,
+                "drift_threshold": self.drift_threshold}
+
+    def _save_state(self, path):
+        """
+        Only the estimated parameters and the observations are stored; load()
+        rebuilds the results by running the Kalman filter once with those
+        parameters, which takes milliseconds instead of a re-estimation.
+        """
+        with open(os.path.join(path, "state.json"), "w") as f:
+            json.dump({"n_since_refit": self.n_since_refit, "last_update": self.last_update}, f)
+        return [save_array(path, "params", self.model_fit.params),
+                save_array(path, "history", self.history), "state.json"]
+
+    @classmethod
+    def _load_state(cls, path, manifest, mmap=True):
+        from statsmodels.tsa.arima.model import ARIMA
 
-    def fit(self, series):
         warnings.filterwarnings("ignore")
-        model = ARIMA(series, order=self.order)
-        self.model_fit = model.fit()
+        params = dict(manifest["params"], order=tuple(manifest["params"]["order"]))
+        model = cls(**params)
+        model.history = load_array(path, "history", mmap)
+        model.model_fit = ARIMA(model.history, order=model.order).filter(load_array(path, "params", mmap=False))
+        with open(os.path.join(path, "state.json")) as f:
+            state = json.load(f)
+        model.n_since_refit = state["n_since_refit"]
+        model.last_update = state["last_update"]
+        return model
+
+    def update(self, new_obs):
+        """
+        Add observations that follow the fitted series.
+
+        The Kalman filter state is advanced over the new points only, keeping the
+        estimated parameters (statsmodels `extend`). A full re-estimation on the
+        whole history happens when `refit_every` is reached or drift is detected.
+        """
+        if self.model_fit is None:
+            raise ValueError("Model not fitted yet")
+        new_obs = np.atleast_1d(np.asarray(new_obs, dtype=float))
+        if new_obs.size == 0:
+            return self
+        self.history = np.concatenate([self.history, new_obs])
+        self.n_since_refit += new_obs.size
+
+        extended = self.model_fit.extend(new_obs)
+        errors = extended.filter_results.standardized_forecasts_error[0]
+        drift_score = float(np.nanmean(np.abs(errors)))
+        scheduled = self.refit_every is not None and self.n_since_refit >= self.refit_every
+        drift = self.drift_threshold is not None and drift_score > self.drift_threshold
+
+        if scheduled or drift:
+            # the current estimates are close; starting there halves the optimiser work
+            self.fit(self.history, start_params=self.model_fit.params)
+        else:
+            self.model_fit = extended
+        self.last_update = {
+            "new_obs": int(new_obs.size),
+            "drift_score": drift_score,
+            "refit": bool(scheduled or drift),
+            "reason": "drift" if drift else ("schedule" if scheduled else None),
+        }
         return self
 
-    def predict(self, steps=1):
+    def predict(self, steps=1, quantiles=None):
+        """
+        Point forecast; with `quantiles`, also the Gaussian forecast quantiles
+        from the state-space forecast variance (what get_forecast().conf_int()
+        reports), computed in the same pass.
+        """
         if self.model_fit is None:
             raise ValueError("Model not fitted yet")
-        forecast = self.model_fit.forecast(steps=steps)
-        return np.array(forecast)
+        if quantiles is None:
+            forecast = self.model_fit.forecast(steps=steps)
+            return np.array(forecast)
+        from scipy.stats import norm
+
+        q = check_quantiles(quantiles)
+        result = self.model_fit.get_forecast(steps=steps)
+        mean = np.asarray(result.predicted_mean)
+        return mean, mean + norm.ppf(q)[:, np.newaxis] * np.asarray(result.se_mean)
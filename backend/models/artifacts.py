@@ -0,0 +1,121 @@
+# backend/models/artifacts.py
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+
+from .base_model import BaseModel
+
+DEFAULT_ARTIFACT_DIR = os.environ.get("MODEL_ARTIFACT_DIR", "artifacts/models")
+LATEST_FILE = "LATEST"
+META_FILE = "meta.json"
+
+
+class ArtifactStore:
+    """
+    Versioned on-disk store of fitted models.
+
+    Each published version is a directory `v000N/` holding one BaseModel.save()
+    directory per model (manifest, parameters, memory-mappable arrays; older
+    versions hold `<name>.pkl` pickles, which still load) and a `meta.json`.
+    A version only becomes visible once it is complete: it is written to a
+    temp dir, renamed into place, and then the `LATEST` pointer is swapped
+    atomically. Loaded versions are memoised per process.
+    """
+
+    def __init__(self, root=DEFAULT_ARTIFACT_DIR, keep=5):
+        self.root = root
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._loaded = None  # (version, models, meta)
+
+    def _version_dir(self, version):
+        return os.path.join(self.root, version)
+
+    def list_versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if d.startswith("v") and d[1:].isdigit())
+
+    def latest_version(self):
+        try:
+            with open(os.path.join(self.root, LATEST_FILE)) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version if os.path.isdir(self._version_dir(version)) else None
+
+    def publish(self, models, meta, model_meta=None):
+        """
+        Write `models` ({name: fitted model}) and `meta` as a new version; return its id.
+        model_meta: {name: {"data_range": ..., "metrics": ...}} for the model manifests.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            for name, model in models.items():
+                if isinstance(model, BaseModel):
+                    model.save(os.path.join(tmp_dir, name), **(model_meta or {}).get(name, {}))
+                    continue
+                with open(os.path.join(tmp_dir, f"{name}.pkl"), "wb") as f:
+                    pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            versions = self.list_versions()
+            number = int(versions[-1][1:]) + 1 if versions else 1
+            while True:
+                version = f"v{number:04d}"
+                meta = dict(meta, version=version, models=sorted(models))
+                with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+                    json.dump(meta, f, indent=2, default=str)
+                try:
+                    os.rename(tmp_dir, self._version_dir(version))
+                    break
+                except OSError:
+                    # another publisher took this number first
+                    number += 1
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        pointer_tmp = os.path.join(self.root, f".{LATEST_FILE}.{os.getpid()}")
+        with open(pointer_tmp, "w") as f:
+            f.write(version)
+        os.replace(pointer_tmp, os.path.join(self.root, LATEST_FILE))
+        self._prune()
+        return version
+
+    def load(self, version):
+        """Return (models, meta) for a published version."""
+        vdir = self._version_dir(version)
+        with open(os.path.join(vdir, META_FILE)) as f:
+            meta = json.load(f)
+        models = {name: self.load_model(version, name) for name in meta.get("models", [])}
+        return models, meta
+
+    def load_model(self, version, name):
+        """A fresh copy of one model of a published version."""
+        vdir = self._version_dir(version)
+        if os.path.isdir(os.path.join(vdir, name)):
+            return BaseModel.load(os.path.join(vdir, name))
+        with open(os.path.join(vdir, f"{name}.pkl"), "rb") as f:
+            return pickle.load(f)
+
+    def load_latest(self):
+        """Return (models, meta) for the latest version, or None if nothing is published."""
+        version = self.latest_version()
+        if version is None:
+            return None
+        with self._lock:
+            if self._loaded is not None and self._loaded[0] == version:
+                return self._loaded[1], self._loaded[2]
+            models, meta = self.load(version)
+            self._loaded = (version, models, meta)
+            return models, meta
+
+    def _prune(self):
+        latest = self.latest_version()
+        for version in self.list_versions()[:-self.keep]:
+            if version != latest:
+                shutil.rmtree(self._version_dir(version), ignore_errors=True)
@@ -0,0 +1,189 @@
+# backend/models/backtest.py
+"""
+Walk-forward (rolling-origin) backtest of the forecast models.
+
+At every origin t the models see only series[:t] and forecast series[t:t+horizon].
+Origins are split into blocks of `refit_every`: each model is fitted once at the
+start of a block and then advanced through the block with `update()`, exactly as
+the training worker advances published models between refits. Blocks run in a
+spawn process pool; the series is placed in shared memory once and every worker
+maps it read-only instead of receiving a copy per task.
+
+    python -m backend.models.backtest --interval 1h --limit 20000 --horizon 24 --workers 8
+
+The result's `errors` table has one row per (model, horizon step).
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from backend.models.ensemble import combine_predictions
+from backend.models.metrics import METRICS, batch_metrics
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = ("expanding", "rolling")
+
+# set in each pool worker by _attach
+_SERIES = None
+_SHM = None
+
+
+def origins(n, horizon, min_train, step=1):
+    """Forecast origins t (train on [:t], score [t:t+horizon]) that fit in `n` points."""
+    if min_train < 1 or n - horizon < min_train:
+        raise ValueError(f"{n} points are too few for min_train={min_train} and horizon={horizon}")
+    return np.arange(min_train, n - horizon + 1, step)
+
+
+def _attach(name, shape, dtype):
+    global _SERIES, _SHM
+    _SHM = shared_memory.SharedMemory(name=name)
+    _SERIES = np.ndarray(shape, dtype=dtype, buffer=_SHM.buf)
+    _SERIES.flags.writeable = False
+
+
+def run_block(specs, block, horizon, window="expanding", train_size=None, series=None):
+    """
+    Forecasts of every model in `specs` ({name: (factory, params)}) from each
+    origin in `block`. Returns {name: array (len(block), horizon)}; a model
+    that fails leaves NaN rows for the rest of the block.
+    """
+    series = _SERIES if series is None else series
+    first = block[0]
+    lo = max(first - train_size, 0) if window == "rolling" else 0
+    out = {}
+    for name, (factory, params) in specs.items():
+        preds = np.full((len(block), horizon), np.nan)
+        try:
+            model = factory(**params).fit(series[lo:first])
+            if hasattr(model, "rollout"):
+                # weights are fixed inside the block: roll every origin out in one batch
+                lookback = model.lookback
+                windows = np.stack([series[t - lookback:t] for t in block])
+                preds[:] = model.rollout(windows, horizon)
+            else:
+                prev = first
+                for i, t in enumerate(block):
+                    if t > prev:
+                        model.update(series[prev:t])
+                        prev = t
+                    preds[i] = model.predict(horizon)
+        except Exception as e:
+            logger.warning("Backtest: %s failed on block starting at %d — %s", name, first, e)
+        out[name] = preds
+    return out
+
+
+def error_table(predictions, actual, last=None):
+    """
+    Per-horizon errors: one row per (model, step) with the batch_metrics
+    (RMSE, MAE, MAPE, sMAPE, directional accuracy vs `last`) and the number of
+    scored origins.
+    """
+    names = list(predictions)
+    stacked = np.stack([predictions[n] for n in names])
+    scores = batch_metrics(actual, stacked, last)
+    counts = (~np.isnan(stacked - actual)).sum(axis=1)
+    rows = []
+    for i, name in enumerate(names):
+        for h in range(actual.shape[1]):
+            rows.append({"model": name, "step": h + 1, **{m: scores[m][i, h] for m in METRICS},
+                         "n": int(counts[i, h])})
+    return pd.DataFrame(rows, columns=["model", "step", *METRICS, "n"])
+
+
+def backtest(series, specs=None, horizon=24, min_train=100, step=1, window="expanding",
+             train_size=None, refit_every=50, workers=None):
+    """
+    Walk-forward evaluation of `specs` ({name: (factory, params)}, default the
+    training MODEL_SPECS without GRU) plus their ensemble over `series`.
+
+    window: "expanding" trains each block on all points before it, "rolling" on
+        the last `train_size` (default `min_train`) points only.
+    refit_every: origins per block, i.e. how often models are refitted.
+    workers: pool size (default os.cpu_count()); 1 runs in-process.
+
+    Returns {"origins", "actual", "predictions": {name: (origins, horizon)},
+    "errors": error_table(...), "seconds"}.
+    """
+    if window not in WINDOWS:
+        raise ValueError(f"window must be one of {WINDOWS}")
+    if specs is None:
+        from backend.training import MODEL_SPECS
+        specs = {n: s for n, s in MODEL_SPECS.items() if n != "gru"}
+    started = time.perf_counter()
+    series = np.ascontiguousarray(series, dtype=np.float64)
+    ts = origins(len(series), horizon, min_train, step)
+    blocks = [ts[i:i + refit_every] for i in range(0, len(ts), refit_every)]
+    train_size = train_size or min_train
+    workers = min(workers or os.cpu_count() or 1, len(blocks))
+
+    if workers <= 1:
+        parts = [run_block(specs, b, horizon, window, train_size, series) for b in blocks]
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=series.nbytes)
+        try:
+            np.ndarray(series.shape, dtype=series.dtype, buffer=shm.buf)[:] = series
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_attach,
+                                     initargs=(shm.name, series.shape, series.dtype.str)) as pool:
+                futures = [pool.submit(run_block, specs, b, horizon, window, train_size) for b in blocks]
+                parts = [f.result() for f in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+
+    predictions = {name: np.concatenate([p[name] for p in parts]) for name in specs}
+    if "ma" in predictions and "arima" in predictions:
+        predictions["ensemble"] = combine_predictions(
+            predictions["ma"], predictions["arima"], predictions.get("gru"))
+    actual = sliding_window_view(series, horizon)[ts]
+    seconds = time.perf_counter() - started
+    logger.info("Backtest: %d origins x %d steps, %d blocks on %d worker(s) in %.2fs",
+                len(ts), horizon, len(blocks), workers, seconds)
+    return {"origins": ts, "actual": actual, "predictions": predictions,
+            "errors": error_table(predictions, actual, series[ts - 1]), "seconds": seconds}
+
+
+def main():
+    from backend.api.db import fetch_close_points, get_db
+    from backend.api.schema import DEFAULT_INTERVAL, hist_collection
+    from backend.training import MODEL_SPECS, available_models
+
+    p = argparse.ArgumentParser(description="Walk-forward backtest of the forecast models")
+    p.add_argument("--interval", default=DEFAULT_INTERVAL)
+    p.add_argument("--limit", type=int, default=5000, help="latest closes to backtest on")
+    p.add_argument("--horizon", type=int, default=24)
+    p.add_argument("--min-train", type=int, default=100)
+    p.add_argument("--step", type=int, default=1, help="bars between origins")
+    p.add_argument("--window", choices=WINDOWS, default="expanding")
+    p.add_argument("--train-size", type=int, default=None)
+    p.add_argument("--refit-every", type=int, default=50)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--models", default=None, help="comma-separated, default all but gru")
+    p.add_argument("--out", default=None, help="write the error table to this CSV")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    names = args.models.split(",") if args.models else [n for n in available_models() if n != "gru"]
+    series, _ = fetch_close_points(get_db().get_collection(hist_collection(args.interval)), args.limit)
+    if series is None:
+        raise SystemExit("No historical data to backtest on.")
+    result = backtest(series, {n: MODEL_SPECS[n] for n in names}, args.horizon, args.min_train, args.step,
+                      args.window, args.train_size, args.refit_every, args.workers)
+    print(result["errors"].to_string(index=False))
+    if args.out:
+        result["errors"].to_csv(args.out, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -27,9 +27,54 @@
 
 # backend/models/base_model.py
 from abc import ABC, abstractmethod
-from sklearn.metrics import mean_absolute_error, root_mean_squared_error
+from datetime import datetime
+import hashlib
+import importlib
+import json
+import os
+
 import numpy as np
 
+from .metrics import evaluate_many
+
+# Sample paths drawn for bootstrap prediction intervals
+BOOTSTRAP_PATHS = int(os.environ.get("BOOTSTRAP_PATHS", 1000))
+
+MANIFEST_FILE = "manifest.json"
+# bump when the on-disk layout of a saved model changes
+FORMAT_VERSION = 1
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_array(path, name, array):
+    np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(array))
+    return f"{name}.npy"
+
+
+def load_array(path, name, mmap=True):
+    """Saved array `name`, memory-mapped read-only unless `mmap` is False."""
+    return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+
+
+def check_quantiles(quantiles):
+    q = np.atleast_1d(np.asarray(quantiles, dtype=np.float64))
+    if ((q <= 0) | (q >= 1)).any():
+        raise ValueError(f"Quantiles must lie strictly between 0 and 1, got {q.tolist()}")
+    return q
+
+
+def bootstrap_quantiles(paths, quantiles):
+    """(len(quantiles), steps) quantiles over simulated paths of shape (n_paths, steps)."""
+    return np.quantile(paths, quantiles, axis=0)
+
+
 class BaseModel(ABC):
     """Abstract base forecaster defining common API."""
 
@@ -39,13 +84,75 @@ class BaseModel(ABC):
         pass
 
     @abstractmethod
-    def predict(self, steps):
-        """Forecast given number of future steps"""
+    def predict(self, steps, quantiles=None):
+        """
+        Forecast given number of future steps. With `quantiles` (e.g. (0.05, 0.95))
+        return (point forecast, array of shape (len(quantiles), steps)).
+        """
+        pass
+
+    def get_params(self):
+        """Constructor arguments, as stored in the manifest."""
+        return {}
+
+    @abstractmethod
+    def _save_state(self, path):
+        """Write the fitted state into directory `path`; return the file names written."""
+        pass
+
+    @classmethod
+    @abstractmethod
+    def _load_state(cls, path, manifest, mmap=True):
+        """Rebuild a fitted model from what _save_state wrote."""
         pass
 
+    def save(self, path, data_range=None, metrics=None):
+        """
+        Save the fitted model to directory `path`: the model's own files plus a
+        manifest with the format version, class, hyperparameters, the data range
+        it was fitted on, `metrics` and a sha256 per file.
+        """
+        os.makedirs(path, exist_ok=True)
+        files = self._save_state(path)
+        manifest = {
+            "format": FORMAT_VERSION,
+            "model": f"{type(self).__module__}.{type(self).__qualname__}",
+            "params": self.get_params(),
+            "data_range": data_range,
+            "metrics": metrics,
+            "saved_at": datetime.utcnow().isoformat(),
+            "files": {name: file_sha256(os.path.join(path, name)) for name in files},
+        }
+        with open(os.path.join(path, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        return manifest
+
+    @staticmethod
+    def read_manifest(path):
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    @classmethod
+    def load(cls, path, verify=True, mmap=True):
+        """
+        Load a model saved with save(). The class comes from the manifest
+        (BaseModel.load(path) works for any model). With `verify`, every file's
+        checksum is checked first; large arrays are memory-mapped unless `mmap`
+        is False.
+        """
+        manifest = cls.read_manifest(path)
+        if manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported model format {manifest.get('format')!r}")
+        module, _, name = manifest["model"].rpartition(".")
+        klass = getattr(importlib.import_module(module), name)
+        if not issubclass(klass, cls):
+            raise ValueError(f"{path} holds a {manifest['model']}, not a {cls.__name__}")
+        if verify:
+            for fname, digest in manifest["files"].items():
+                if file_sha256(os.path.join(path, fname)) != digest:
+                    raise ValueError(f"{path}: checksum mismatch for {fname}")
+        return klass._load_state(path, manifest, mmap)
+
     def evaluate(self, true, pred):
-        """Return RMSE, MAE, MAPE"""
-        rmse = root_mean_squared_error(true, pred)
-        mae = mean_absolute_error(true, pred)
-        mape = np.mean(np.abs((true - pred) / true)) * 100
-        return {"rmse": rmse, "mae": mae, "mape": mape}
+        """Return RMSE, MAE, MAPE (zero actuals skipped), sMAPE and directional accuracy"""
+        return evaluate_many(true, {"pred": pred})["pred"]
@@ -0,0 +1,148 @@
+# backend/models/cache.py
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("MODEL_CACHE_MAX_ENTRIES", "32"))
+DEFAULT_MAX_BYTES = int(os.environ.get("MODEL_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+
+def series_fingerprint(series, last_date=None):
+    """Identify a data snapshot by row count, last date and a content hash."""
+    arr = np.ascontiguousarray(series, dtype=np.float64)
+    digest = hashlib.blake2b(arr.tobytes(), digest_size=16).hexdigest()
+    last = last_date.isoformat() if hasattr(last_date, "isoformat") else last_date
+    return (len(arr), last, digest)
+
+
+def estimate_nbytes(model):
+    """Rough in-memory size of a fitted model, used for the cache memory ceiling."""
+    total = 0
+    for value in vars(model).values():
+        if isinstance(value, np.ndarray):
+            total += value.nbytes
+    keras_model = getattr(model, "model", None)
+    if keras_model is not None and hasattr(keras_model, "count_params"):
+        # weights plus Adam's two slot variables, float32
+        total += keras_model.count_params() * 4 * 3
+    model_fit = getattr(model, "model_fit", None)
+    if model_fit is not None:
+        try:
+            total += len(pickle.dumps(model_fit, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            total += 1024 * 1024
+    return max(total, 1)
+
+
+class ModelCache:
+    """
+    Thread-safe LRU cache of fitted models.
+
+    Entries are keyed on (scope, model name, hyperparameters, data fingerprint),
+    where scope names the source collection so that an ingest can drop every
+    entry built from it. Concurrent misses on the same key fit only once.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (model, nbytes)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(scope, name, params, fingerprint):
+        return (scope, name, tuple(sorted(params.items())), fingerprint)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, model):
+        nbytes = estimate_nbytes(model)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (model, nbytes)
+            self._bytes += nbytes
+            self._evict_locked()
+
+    def get_or_fit(self, scope, name, params, fingerprint, factory, series):
+        """
+        Return (model, hit). On a miss, `factory(**params).fit(series)` is called
+        once per key even when several threads ask for it at the same time.
+        """
+        key = self.make_key(scope, name, params, fingerprint)
+        return self.get_or_build(key, lambda: factory(**params).fit(series))
+
+    def get_or_build(self, key, build):
+        """Return (model, hit), calling `build()` once per key on a miss."""
+        model = self.get(key)
+        if model is not None:
+            with self._lock:
+                self.hits += 1
+            return model, True
+
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+        with key_lock:
+            model = self.get(key)
+            if model is not None:
+                with self._lock:
+                    self.hits += 1
+                return model, True
+            try:
+                model = build()
+                self.put(key, model)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+        with self._lock:
+            self.misses += 1
+        return model, False
+
+    def invalidate(self, scope=None):
+        """Drop all entries for `scope` (or everything when scope is None)."""
+        with self._lock:
+            for key in [k for k in self._entries if scope is None or k[0] == scope]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        self.invalidate(None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _evict_locked(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._bytes -= nbytes
+            self.evictions += 1
+
+
+MODEL_CACHE = ModelCache()
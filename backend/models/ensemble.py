@@ -1,10 +1,110 @@
 # backend/models/ensemble.py
+"""
+Ensemble of the point forecasts.
+
+`EnsembleWeights` learns one weight per (model, horizon step) from
+out-of-sample errors: each weight is proportional to the inverse of the model's
+mean squared error at that step. The MSEs are an exponentially decayed average,
+so new scored forecasts update them without re-running a backtest. Weights are
+stored in the artifact meta next to the models they were learned for.
+"""
 import numpy as np
 
-def combine_predictions(ma_pred, arima_pred, gru_pred=None):
-    if gru_pred is not None:
-        ensemble = 0.5 * arima_pred + 0.5 * ma_pred
-        # ensemble = 0.4 * arima_pred + 0.4 * ma_pred + 0.2 * gru_pred
-    else:
-        ensemble = 0.5 * arima_pred + 0.5 * ma_pred
-    return np.array(ensemble)
+from .metrics import batch_metrics
+
+MODEL_ORDER = ("ma", "arima", "gru")
+
+
+class EnsembleWeights:
+    def __init__(self, names, mse, decay=0.9, updates=0):
+        """
+        names: model names, one row of `mse` each.
+        mse: (models, horizon) out-of-sample mean squared error per step.
+        decay: weight kept by the old MSE when update() folds in new errors.
+        """
+        self.names = list(names)
+        self.mse = np.asarray(mse, dtype=np.float64)
+        self.decay = decay
+        self.updates = updates
+
+    @classmethod
+    def fit(cls, predictions, actual, decay=0.9):
+        """
+        Learn from backtest output: predictions {name: (origins, horizon)} and
+        the matching actuals (origins, horizon).
+        """
+        names = [n for n in MODEL_ORDER if n in predictions] + [n for n in predictions if n not in MODEL_ORDER]
+        rmse = batch_metrics(actual, np.stack([predictions[n] for n in names]))["rmse"]
+        return cls(names, rmse ** 2, decay)
+
+    def update(self, predictions, actual):
+        """
+        Fold newly scored forecasts ({name: (horizon,) or (origins, horizon)}
+        against `actual`) into the MSEs. Steps without an actual (NaN) keep
+        their old value; a model that was not scored keeps its row.
+        """
+        actual = np.atleast_2d(np.asarray(actual, dtype=np.float64))
+        h = min(actual.shape[1], self.mse.shape[1])
+        for i, name in enumerate(self.names):
+            if predictions.get(name) is None:
+                continue
+            pred = np.atleast_2d(np.asarray(predictions[name], dtype=np.float64))[:, :h]
+            new = batch_metrics(actual[:, :h], pred)["rmse"][0] ** 2
+            old = self.mse[i, :h]
+            self.mse[i, :h] = np.where(np.isnan(new), old,
+                                       np.where(np.isnan(old), new, self.decay * old + (1 - self.decay) * new))
+        self.updates += 1
+        return self
+
+    def matrix(self, names, horizon):
+        """
+        (len(names), horizon) weights for the models in `names`, each column
+        summing to 1. Steps past the learned horizon reuse the last one; a
+        model without a learned row or with undefined errors gets no weight,
+        unless no model has any, then weights are equal.
+        """
+        rows = []
+        for name in names:
+            if name in self.names:
+                rows.append(self.mse[self.names.index(name)])
+            else:
+                rows.append(np.full(self.mse.shape[1], np.nan))
+        mse = np.stack(rows)
+        cols = np.minimum(np.arange(horizon), mse.shape[1] - 1)
+        with np.errstate(divide="ignore"):
+            inv = 1.0 / np.maximum(mse[:, cols], np.finfo(np.float64).tiny)
+        inv = np.where(np.isnan(inv), 0.0, inv)
+        total = inv.sum(axis=0)
+        return np.where(total > 0, inv / np.where(total > 0, total, 1.0), 1.0 / len(names))
+
+    def to_dict(self):
+        return {"names": self.names, "mse": np.where(np.isnan(self.mse), None, self.mse).tolist(),
+                "decay": self.decay, "updates": self.updates}
+
+    @classmethod
+    def from_dict(cls, d):
+        mse = np.array([[np.nan if v is None else v for v in row] for row in d["mse"]], dtype=np.float64)
+        return cls(d["names"], mse, d.get("decay", 0.9), d.get("updates", 0))
+
+
+def weight_matrix(names, horizon, weights=None):
+    """(len(names), horizon) weights: learned (EnsembleWeights), given as an array, or equal."""
+    if weights is None:
+        return np.full((len(names), horizon), 1.0 / len(names))
+    if isinstance(weights, EnsembleWeights):
+        return weights.matrix(names, horizon)
+    return np.asarray(weights, dtype=np.float64)
+
+
+def combine_predictions(ma_pred, arima_pred, gru_pred=None, weights=None):
+    """
+    Weighted sum of the forecasts that are available. Each prediction is
+    (horizon,) or (origins, horizon). `weights` is an EnsembleWeights, a
+    (models, horizon) array in MA, ARIMA(, GRU) order, or None for equal weights.
+    """
+    names = ["ma", "arima"] + (["gru"] if gru_pred is not None else [])
+    preds = np.stack([np.asarray(p, dtype=np.float64)
+                      for p in (ma_pred, arima_pred, gru_pred) if p is not None])
+    w = weight_matrix(names, preds.shape[-1], weights)
+    # (models, horizon) x (models, ..., horizon) -> (..., horizon)
+    return np.einsum("mh,m...h->...h", w, preds)
@@ -1,45 +1,179 @@
 # backend/models/gru_model.py
+import os
+
 try:
     import tensorflow as tf
     from tensorflow.keras.models import Sequential
     from tensorflow.keras.layers import GRU, Dense
     from tensorflow.keras.optimizers import Adam
     import numpy as np
-    from .base_model import BaseModel
+    from numpy.lib.stride_tricks import sliding_window_view
+    from .base_model import BOOTSTRAP_PATHS, BaseModel, bootstrap_quantiles, check_quantiles, load_array, save_array
 except ImportError:
     raise ImportError("TensorFlow not available for GRUForecaster")
 
 class GRUForecaster(BaseModel):
-    def __init__(self, lookback=10, epochs=5):
+    # Training windows (most recent) whose one-step errors are kept for bootstrap intervals
+    RESIDUAL_WINDOWS = 2000
+
+    def __init__(self, lookback=10, epochs=5, dtype=None, stream=False, batch_size=32):
+        """
+        dtype: optional downcast of the training windows (e.g. "float32").
+        stream: feed Keras from a tf.data generator that builds one batch of
+            windows at a time, for series (e.g. memory-mapped) too large to window in memory.
+        """
         self.lookback = lookback
         self.epochs = epochs
+        self.dtype = dtype
+        self.stream = stream
+        self.batch_size = batch_size
         self.model = None
         self.last_seq = None
+        self.residuals = None
+        self._step = None
+
+    def __getstate__(self):
+        # compiled tf.functions cannot be pickled; rebuilt on first predict
+        state = self.__dict__.copy()
+        state["_step"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault("_step", None)
+        self.__dict__.setdefault("residuals", None)
 
     def _prepare_data(self, series):
-        X, y = [], []
-        for i in range(len(series) - self.lookback):
-            X.append(series[i:i+self.lookback])
-            y.append(series[i+self.lookback])
-        return np.array(X)[..., np.newaxis], np.array(y)
+        """
+        Supervised (X, y) pairs: X[i] = series[i:i+lookback], y[i] = series[i+lookback].
+        X is a strided read-only view over `series`, so no window is copied.
+        """
+        series = np.asarray(series, dtype=self.dtype)
+        if len(series) <= self.lookback:
+            return np.empty((0, self.lookback, 1), dtype=series.dtype), series[:0]
+        X = sliding_window_view(series[:-1], self.lookback)[..., np.newaxis]
+        return X, series[self.lookback:]
 
-    def fit(self, series):
-        X, y = self._prepare_data(np.array(series))
+    def _make_dataset(self, series, seed=None):
+        """tf.data pipeline that materialises one shuffled batch of windows at a time."""
+        X, y = self._prepare_data(series)
+        n, batch_size = len(y), self.batch_size
+        rng = np.random.default_rng(seed)
+
+        def batches():
+            # fresh batch order every epoch, windows inside a batch stay contiguous
+            for lo in rng.permutation(np.arange(0, n, batch_size)):
+                yield (np.asarray(X[lo:lo + batch_size], dtype=np.float32),
+                       np.asarray(y[lo:lo + batch_size], dtype=np.float32))
+
+        return tf.data.Dataset.from_generator(
+            batches,
+            output_signature=(
+                tf.TensorSpec((None, self.lookback, 1), tf.float32),
+                tf.TensorSpec((None,), tf.float32),
+            ),
+        ).apply(tf.data.experimental.assert_cardinality(-(-n // batch_size))).prefetch(tf.data.AUTOTUNE)
+
+    def _build(self):
         self.model = Sequential([
             GRU(32, input_shape=(self.lookback, 1)),
             Dense(1)
         ])
         self.model.compile(optimizer=Adam(0.01), loss="mse")
-        self.model.fit(X, y, epochs=self.epochs, verbose=0)
-        self.last_seq = series[-self.lookback:]
+
+    def fit(self, series):
+        self._build()
+        if self.stream:
+            self.model.fit(self._make_dataset(series), epochs=self.epochs, shuffle=False, verbose=0)
+        else:
+            X, y = self._prepare_data(series)
+            self.model.fit(X, y, epochs=self.epochs, batch_size=self.batch_size, verbose=0)
+        self.last_seq = np.array(series[-self.lookback:])
+        self._step = None
+        self.residuals = self._residuals(series)
         return self
 
-    def predict(self, steps=1):
-        seq = np.array(self.last_seq, dtype=np.float32)
-        preds = []
-        for _ in range(steps):
-            x = seq[-self.lookback:].reshape(1, self.lookback, 1)
-            pred = self.model.predict(x, verbose=0)[0, 0]
-            preds.append(pred)
-            seq = np.append(seq, pred)
-        return np.array(preds)
+    def _residuals(self, series):
+        X, y = self._prepare_data(series)
+        X, y = X[-self.RESIDUAL_WINDOWS:], y[-self.RESIDUAL_WINDOWS:]
+        if len(y) == 0:
+            return np.empty(0, dtype=np.float32)
+        fitted = self._step_fn()(np.asarray(X, dtype=np.float32)).numpy()[:, 0]
+        return (np.asarray(y, dtype=np.float32) - fitted).astype(np.float32)
+
+    def get_params(self):
+        return {"lookback": self.lookback, "epochs": self.epochs, "dtype": self.dtype,
+                "stream": self.stream, "batch_size": self.batch_size}
+
+    def _save_state(self, path):
+        self.model.save_weights(os.path.join(path, "gru.weights.h5"))
+        files = ["gru.weights.h5", save_array(path, "last_seq", self.last_seq)]
+        if self.residuals is not None:
+            files.append(save_array(path, "residuals", self.residuals))
+        return files
+
+    @classmethod
+    def _load_state(cls, path, manifest, mmap=True):
+        model = cls(**manifest["params"])
+        model._build()
+        model.model.load_weights(os.path.join(path, "gru.weights.h5"))
+        model.last_seq = np.array(load_array(path, "last_seq", mmap=False))
+        if "residuals.npy" in manifest["files"]:
+            model.residuals = load_array(path, "residuals", mmap)
+        return model
+
+    def update(self, new_obs):
+        """Roll the input window forward over new observations; weights are kept."""
+        if self.model is None:
+            raise ValueError("Model not fitted yet")
+        seq = np.concatenate([np.asarray(self.last_seq), np.atleast_1d(new_obs)])
+        self.last_seq = seq[-self.lookback:]
+        return self
+
+    def _step_fn(self):
+        """One forward pass, compiled once per fitted model for any batch size."""
+        if self._step is None:
+            model = self.model
+
+            @tf.function(input_signature=[tf.TensorSpec([None, self.lookback, 1], tf.float32)])
+            def step(x):
+                return model(x, training=False)
+
+            self._step = step
+        return self._step
+
+    def rollout(self, windows, steps=1, noise=None):
+        """
+        Autoregressive forecast of `steps` values from each row of `windows`
+        (shape (n_starts, >= lookback)), all start points advanced together.
+        `noise` (n_starts, steps), if given, is added to each step's output
+        before it is fed back (bootstrap paths).
+        Returns an array of shape (n_starts, steps).
+        """
+        windows = np.atleast_2d(np.asarray(windows, dtype=np.float32))
+        n = windows.shape[0]
+        buf = np.empty((n, self.lookback + steps), dtype=np.float32)
+        buf[:, :self.lookback] = windows[:, -self.lookback:]
+        step = self._step_fn()
+        for i in range(steps):
+            x = buf[:, i:i + self.lookback, np.newaxis]
+            buf[:, self.lookback + i] = step(x).numpy()[:, 0]
+            if noise is not None:
+                buf[:, self.lookback + i] += noise[:, i]
+        return buf[:, self.lookback:]
+
+    def predict(self, steps=1, quantiles=None, n_paths=BOOTSTRAP_PATHS, seed=None):
+        """
+        Point forecast; with `quantiles`, also bootstrap bands from `n_paths`
+        rollouts driven by resampled one-step training residuals, all run as
+        one batch.
+        """
+        pred = self.rollout(self.last_seq, steps)[0]
+        if quantiles is None:
+            return pred
+        q = check_quantiles(quantiles)
+        if self.residuals is None or self.residuals.size == 0:
+            return pred, np.full((len(q), steps), np.nan)
+        noise = np.random.default_rng(seed).choice(self.residuals, size=(n_paths, steps))
+        windows = np.repeat(np.atleast_2d(np.asarray(self.last_seq, dtype=np.float32)), n_paths, axis=0)
+        return pred, bootstrap_quantiles(self.rollout(windows, steps, noise), q)
@@ -0,0 +1,79 @@
+# backend/models/metrics.py
+"""
+Forecast error metrics for many models and forecast origins at once.
+
+Predictions are stacked into one (models, origins, horizon) array and every
+metric is reduced from the same error array in NumPy, per horizon step or over
+the whole horizon. NaN predictions (e.g. a failed backtest block) are left out
+of every mean; MAPE skips zero actuals and sMAPE skips points where both the
+actual and the forecast are zero.
+"""
+import numpy as np
+
+METRICS = ("rmse", "mae", "mape", "smape", "direction")
+
+
+def _mean(values, axis):
+    ok = ~np.isnan(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(ok, values, 0.0).sum(axis=axis) / ok.sum(axis=axis)
+
+
+def batch_metrics(true, pred, last=None, per_step=True):
+    """
+    true: (origins, horizon) actuals.
+    pred: (models, origins, horizon) forecasts, or (origins, horizon) for one model.
+    last: (origins,) last value observed before each origin. Directional
+        accuracy compares the sign of forecast - last with that of actual - last;
+        without it, step-to-step changes are compared (undefined for step 1).
+    Returns {metric: array} of shape (models, horizon) with `per_step`, else
+    (models,). Accuracy and percentages are in %; undefined entries are NaN.
+    """
+    true = np.asarray(true, dtype=np.float64)
+    pred = np.asarray(pred, dtype=np.float64)
+    if pred.ndim == true.ndim:
+        pred = pred[np.newaxis]
+    axis = 1 if per_step else (1, 2)
+
+    err = pred - true
+    abs_err = np.abs(err)
+    abs_true = np.abs(true)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ape = np.where(abs_true > 0, abs_err / abs_true, np.nan)
+        denom = abs_true + np.abs(pred)
+        sape = np.where(denom > 0, 2.0 * abs_err / denom, np.nan)
+
+    if last is not None:
+        base = np.asarray(last, dtype=np.float64)[:, np.newaxis]
+        moved_true, moved_pred = true - base, pred - base
+    else:
+        nan_col = np.full(true.shape[:-1] + (1,), np.nan)
+        moved_true = np.concatenate([nan_col, np.diff(true, axis=-1)], axis=-1)
+        moved_pred = np.concatenate([np.broadcast_to(nan_col, pred.shape[:-1] + (1,)),
+                                     np.diff(pred, axis=-1)], axis=-1)
+    hit = np.where(np.isnan(moved_true) | np.isnan(moved_pred), np.nan,
+                   (np.sign(moved_true) == np.sign(moved_pred)).astype(np.float64))
+
+    return {
+        "rmse": np.sqrt(_mean(err ** 2, axis)),
+        "mae": _mean(abs_err, axis),
+        "mape": 100 * _mean(ape, axis),
+        "smape": 100 * _mean(sape, axis),
+        "direction": 100 * _mean(hit, axis),
+    }
+
+
+def evaluate_many(true, preds):
+    """
+    Whole-horizon metrics of several 1-D forecasts against one 1-D `true`:
+    {name: {metric: float or None}} (None where a metric is undefined).
+    """
+    names = list(preds)
+    if not names:
+        return {}
+    stacked = np.stack([np.asarray(preds[n], dtype=np.float64) for n in names])[:, np.newaxis]
+    scores = batch_metrics(np.asarray(true, dtype=np.float64)[np.newaxis], stacked, per_step=False)
+    return {
+        name: {m: (None if np.isnan(v[i]) else float(v[i])) for m, v in scores.items()}
+        for i, name in enumerate(names)
+    }
@@ -1,6 +1,7 @@
 # backend/models/moving_average.py
 import numpy as np
-from .base_model import BaseModel
+from numpy.lib.stride_tricks import sliding_window_view
+from .base_model import BOOTSTRAP_PATHS, BaseModel, bootstrap_quantiles, check_quantiles, load_array, save_array
 
 class MovingAverageModel(BaseModel):
     def __init__(self, window=5):
@@ -11,13 +12,68 @@ class MovingAverageModel(BaseModel):
         self.history = np.array(series)
         return self
 
-    def predict(self, steps=1):
+    def get_params(self):
+        return {"window": self.window}
+
+    def _save_state(self, path):
+        return [save_array(path, "history", self.history)]
+
+    @classmethod
+    def _load_state(cls, path, manifest, mmap=True):
+        model = cls(**manifest["params"])
+        model.history = load_array(path, "history", mmap)
+        return model
+
+    def update(self, new_obs):
+        """Append observations that follow the fitted series."""
         if self.history is None:
             raise ValueError("Model not fitted yet")
-        preds = []
-        hist = list(self.history)
-        for _ in range(steps):
-            pred = np.mean(hist[-self.window:])
-            preds.append(pred)
-            hist.append(pred)
-        return np.array(preds)
+        self.history = np.concatenate([self.history, np.atleast_1d(new_obs)])
+        return self
+
+    def residuals(self):
+        """In-sample one-step errors: each point minus the mean of the `window` before it."""
+        w = self.window
+        if self.history is None or len(self.history) <= w:
+            return np.empty(0)
+        return self.history[w:] - sliding_window_view(self.history[:-1], w).mean(axis=1)
+
+    def predict(self, steps=1, quantiles=None, n_paths=BOOTSTRAP_PATHS, seed=None):
+        """
+        Recursive moving-average forecast: each step is the mean of the previous
+        `window` values, forecasts included. That is the linear recurrence
+        y[n] = (y[n-1] + ... + y[n-window]) / window, so the whole horizon is
+        produced by one IIR filter pass seeded with the last `window` observations.
+
+        With `quantiles`, also returns bootstrap bands: `n_paths` paths of the same
+        recurrence driven by resampled one-step residuals, filtered together.
+        """
+        if self.history is None:
+            raise ValueError("Model not fitted yet")
+        from scipy.signal import lfilter, lfiltic  # scipy.signal is slow to import
+
+        w = self.window
+        preds = np.empty(steps)
+        tail = list(self.history[-w:])
+
+        # With less than `window` points of history the mean runs over a growing window
+        warm = min(steps, max(w - len(tail), 0))
+        for i in range(warm):
+            preds[i] = np.mean(tail)
+            tail.append(preds[i])
+
+        a = np.concatenate(([1.0], np.full(w, -1.0 / w)))
+        zi = lfiltic([1.0], a, y=np.asarray(tail[::-1][:w], dtype=float))
+        if steps > warm:
+            preds[warm:], _ = lfilter([1.0], a, np.zeros(steps - warm), zi=zi)
+        if quantiles is None:
+            return preds
+
+        q = check_quantiles(quantiles)
+        residuals = self.residuals()
+        if warm or residuals.size == 0:
+            # too little history to resample errors from
+            return preds, np.full((len(q), steps), np.nan)
+        noise = np.random.default_rng(seed).choice(residuals, size=(n_paths, steps))
+        paths, _ = lfilter([1.0], a, noise, axis=1, zi=np.tile(zi, (n_paths, 1)))
+        return preds, bootstrap_quantiles(paths, q)
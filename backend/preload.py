@@ -0,0 +1,46 @@
+# backend/preload.py
+"""
+Explicit warm-up for the dependencies that are imported lazily.
+
+TensorFlow, statsmodels, scipy.signal and the news/price scraping
+stack are only imported on first use so that `import backend.app` stays fast.
+A serving worker that would rather pay that cost at boot than on its first
+request can call `preload()`, e.g. from gunicorn's post_fork hook
+(see gunicorn.conf.py).
+"""
+import importlib
+import logging
+import os
+import time
+
+logger = logging.getLogger("preload")
+
+GROUPS = {
+    "models": ["scipy.signal", "statsmodels.tsa.arima.model"],
+    "gru": ["tensorflow", "backend.models.gru_model"],
+    "data": ["yfinance", "bs4", "feedparser", "vaderSentiment.vaderSentiment"],
+}
+
+
+def preload(groups=None):
+    """
+    Import the modules of each group in `groups` (default: $PRELOAD_GROUPS or
+    "models,gru"). Missing optional packages are skipped.
+    Returns {module: seconds, or None if it is not installed}.
+    """
+    if groups is None:
+        groups = os.getenv("PRELOAD_GROUPS", "models,gru").split(",")
+    timings = {}
+    for group in groups:
+        for module in GROUPS[group.strip()]:
+            started = time.perf_counter()
+            try:
+                importlib.import_module(module)
+                timings[module] = round(time.perf_counter() - started, 3)
+            except ImportError:
+                timings[module] = None
+                logger.info("Preload: %s not installed, skipped", module)
+        if group.strip() == "data":
+            from backend.data.fin_data_builder import get_sentiment_analyzer
+            get_sentiment_analyzer()
+    return timings
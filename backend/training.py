@@ -0,0 +1,285 @@
+# backend/training.py
+"""
+Model training off the request path.
+
+Fits the forecast models on the latest btc_historical data and publishes them
+as a versioned artifact that /api/forecast loads and predicts from. Run it as a
+long-lived worker process:
+
+    python -m backend.training --poll 30 --refit-every 3600
+
+or trigger a one-off background refit from the app after an ingest. Each bar
+interval has its own models and store (`--interval 1h,1d`).
+"""
+import argparse
+import importlib.util
+import logging
+import multiprocessing
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from backend.api.db import HIST_COLLECTION, fetch_close_points, get_db
+from backend.api.schema import DEFAULT_INTERVAL, hist_collection
+from backend.models.arima_model import ARIMAModel
+from backend.models.artifacts import ArtifactStore
+from backend.models.cache import series_fingerprint
+from backend.models.ensemble import EnsembleWeights
+from backend.models.moving_average import MovingAverageModel
+
+# TensorFlow takes seconds to import; only check that it is installed here and
+# import the GRU model on first use.
+GRU_AVAILABLE = importlib.util.find_spec("tensorflow") is not None
+
+
+def GRUForecaster(**params):
+    from backend.models.gru_model import GRUForecaster
+    return GRUForecaster(**params)
+
+
+logger = logging.getLogger("training")
+
+SERIES_LIMIT = 100
+
+# name -> (factory, hyperparameters)
+MODEL_SPECS = {
+    "ma": (MovingAverageModel, {"window": 5}),
+    "arima": (ARIMAModel, {"order": (2, 1, 2), "refit_every": 24}),
+    "gru": (GRUForecaster, {"lookback": 10, "epochs": 5}),
+}
+
+# Ensemble weights are learned from a walk-forward backtest over the training
+# window: forecasts of ENSEMBLE_HORIZON steps from every origin after the
+# first ENSEMBLE_MIN_TRAIN points
+ENSEMBLE_HORIZON = int(os.environ.get("ENSEMBLE_HORIZON", 12))
+ENSEMBLE_MIN_TRAIN = int(os.environ.get("ENSEMBLE_MIN_TRAIN", 60))
+
+ARTIFACT_STORE = ArtifactStore()
+_STORES = {DEFAULT_INTERVAL: ARTIFACT_STORE}
+
+
+def artifact_store(interval=DEFAULT_INTERVAL):
+    """Store for the models of one bar interval (intraday ones under <root>/<interval>)."""
+    if interval not in _STORES:
+        hist_collection(interval)  # validates
+        _STORES[interval] = ArtifactStore(os.path.join(ARTIFACT_STORE.root, interval), keep=ARTIFACT_STORE.keep)
+    return _STORES[interval]
+
+
+def available_models(use_gru=GRU_AVAILABLE):
+    """Names from MODEL_SPECS that can run in this environment."""
+    return [name for name in MODEL_SPECS if name != "gru" or (use_gru and GRU_AVAILABLE)]
+
+
+def fit_model(name, series, cache=None, scope=HIST_COLLECTION, fingerprint=None):
+    """Fit one model from MODEL_SPECS, through `cache` when given. Returns (model, cache_hit)."""
+    factory, params = MODEL_SPECS[name]
+    if cache is not None:
+        return cache.get_or_fit(scope, name, params, fingerprint, factory, series)
+    return factory(**params).fit(series), False
+
+
+def extend_model(name, store, version, new_obs, cache=None, scope=HIST_COLLECTION, fingerprint=None):
+    """
+    Published model `name` of `version` advanced over `new_obs` (the closes
+    after the artifact's data_end) with update(), as the worker does between
+    refits; the published copy is left untouched. Through `cache` when given.
+    Returns (model, cache_hit).
+    """
+    def build():
+        return store.load_model(version, name).update(new_obs)
+
+    if cache is None:
+        return build(), False
+    params = {**MODEL_SPECS[name][1], "base_version": version}
+    return cache.get_or_build(cache.make_key(scope, name, params, fingerprint), build)
+
+
+def fit_models(series, use_gru=GRU_AVAILABLE, cache=None, scope=HIST_COLLECTION, fingerprint=None):
+    """
+    Fit every model in MODEL_SPECS on `series`.
+    Returns ({name: model}, {name: cache_hit}). GRU failures are logged and skipped.
+    """
+    models, cached = {}, {}
+    for name in available_models(use_gru):
+        try:
+            models[name], cached[name] = fit_model(name, series, cache, scope, fingerprint)
+        except Exception as e:
+            if name != "gru":
+                raise
+            logger.warning("GRU model failed — %s", e)
+    return models, cached
+
+
+def learn_ensemble_weights(series, names):
+    """Inverse-error EnsembleWeights for `names` from a backtest on `series`, or None if it is too short."""
+    from backend.models.backtest import backtest
+
+    if len(series) < ENSEMBLE_MIN_TRAIN + ENSEMBLE_HORIZON:
+        return None
+    result = backtest(series, {n: MODEL_SPECS[n] for n in names}, horizon=ENSEMBLE_HORIZON,
+                      min_train=ENSEMBLE_MIN_TRAIN, refit_every=len(series), workers=1)
+    return EnsembleWeights.fit({n: result["predictions"][n] for n in names}, result["actual"])
+
+
+def _iso(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def new_observations(meta, series, dates):
+    """
+    Closes that arrived after the artifact's data_end, or None when the artifact
+    cannot simply be extended (its end fell out of the window or was rewritten).
+    """
+    try:
+        idx = [_iso(d) for d in dates].index(meta.get("data_end"))
+    except ValueError:
+        return None
+    if meta.get("last_close") != float(series[idx]):
+        return None
+    return series[idx + 1:]
+
+
+def train_and_publish(store=None, db=None, force=False, interval=DEFAULT_INTERVAL):
+    """
+    Bring the published models up to date with the current data.
+
+    When the new rows simply follow the latest artifact, its models are updated
+    in place of a refit (ARIMA advances its filter state and re-estimates only on
+    schedule or drift; MA and GRU roll their input windows). Otherwise, or with
+    `force`, every model is refitted from scratch. Returns the new version, or
+    None when the data is unchanged.
+
+    Ensemble weights are published in meta["ensemble"]: on an update, the old
+    models' forecasts for the new rows are scored into the previous weights;
+    otherwise they are learned afresh (learn_ensemble_weights).
+
+    Trains on the bars of `interval`; `store` defaults to artifact_store(interval).
+    """
+    store = store if store is not None else artifact_store(interval)
+    db = db if db is not None else get_db()
+    series, dates = fetch_close_points(db.get_collection(hist_collection(interval)), SERIES_LIMIT)
+    if series is None:
+        logger.info("No historical data to train on yet.")
+        return None
+    last_date = dates[-1]
+
+    fingerprint = list(series_fingerprint(series, last_date))
+    latest = store.load_latest()
+    if not force and latest is not None and latest[1].get("fingerprint") == fingerprint:
+        logger.info("Data unchanged since %s — skipping refit.", latest[1]["version"])
+        return None
+
+    started = time.perf_counter()
+    new_obs = None if force or latest is None else new_observations(latest[1], series, dates)
+    weights = None
+    if new_obs is not None and len(new_obs):
+        # fresh, unshared copies of the published models
+        models, _ = store.load(latest[1]["version"])
+        if latest[1].get("ensemble"):
+            # score what the published models forecast for the new rows
+            weights = EnsembleWeights.from_dict(latest[1]["ensemble"])
+            actual = np.full(ENSEMBLE_HORIZON, np.nan)
+            actual[:min(len(new_obs), ENSEMBLE_HORIZON)] = new_obs[:ENSEMBLE_HORIZON]
+            weights.update({n: m.predict(ENSEMBLE_HORIZON) for n, m in models.items()}, actual)
+        for model in models.values():
+            model.update(new_obs)
+        mode = "update"
+    else:
+        models, _ = fit_models(series)
+        mode = "full"
+    if weights is None:
+        weights = learn_ensemble_weights(series, list(models))
+
+    meta = {
+        "trained_at": datetime.utcnow().isoformat(),
+        "train_seconds": round(time.perf_counter() - started, 3),
+        "mode": mode,
+        "interval": interval,
+        "base_version": latest[1]["version"] if mode == "update" else None,
+        "data_end": _iso(last_date),
+        "last_close": float(series[-1]),
+        "rows": len(series),
+        "fingerprint": fingerprint,
+        "params": {name: MODEL_SPECS[name][1] for name in models},
+        "ensemble": weights.to_dict() if weights is not None else None,
+    }
+    if mode == "update" and "arima" in models:
+        meta["arima_update"] = models["arima"].last_update
+    data_range = {"start": _iso(dates[0]), "end": _iso(last_date), "rows": len(series)}
+    model_meta = {name: {"data_range": data_range, "metrics": None} for name in models}
+    if weights is not None:
+        for name, mse in zip(weights.names, weights.to_dict()["mse"]):
+            model_meta[name]["metrics"] = {"backtest_mse": mse, "ensemble_horizon": ENSEMBLE_HORIZON}
+    version = store.publish(models, meta, model_meta)
+    logger.info("Published models %s (%s, %s) in %.2fs",
+                version, mode, ", ".join(models), meta["train_seconds"])
+    return version
+
+
+def run_worker(poll_interval=30, refit_every=3600, stop_event=None, intervals=(DEFAULT_INTERVAL,)):
+    """
+    Poll for new data every `poll_interval` seconds and republish when it changes
+    (i.e. after an ingest), or unconditionally every `refit_every` seconds, for
+    each of `intervals`.
+    """
+    last_forced = time.monotonic()
+    while stop_event is None or not stop_event.is_set():
+        force = time.monotonic() - last_forced >= refit_every
+        for interval in intervals:
+            try:
+                train_and_publish(force=force, interval=interval)
+            except Exception as e:
+                logger.exception("Training run for %s failed: %s", interval, e)
+        if force:
+            last_forced = time.monotonic()
+        if stop_event is not None:
+            stop_event.wait(poll_interval)
+        else:
+            time.sleep(poll_interval)
+
+
+_background = None
+
+
+def start_background_training(interval=DEFAULT_INTERVAL):
+    """
+    Refit and publish the models of `interval` once in a separate process,
+    without blocking the caller. Returns False if a previous background run is
+    still going.
+    """
+    global _background
+    if _background is not None and _background.is_alive():
+        return False
+    ctx = multiprocessing.get_context("spawn")
+    _background = ctx.Process(target=train_and_publish, kwargs={"interval": interval},
+                              name="model-training", daemon=True)
+    _background.start()
+    return True
+
+
+def parse_args_and_run():
+    parser = argparse.ArgumentParser(description="Train forecast models and publish versioned artifacts.")
+    parser.add_argument("--once", action="store_true", help="Train a single time and exit.")
+    parser.add_argument("--force", action="store_true", help="Publish even if the data is unchanged.")
+    parser.add_argument("--poll", type=float, default=float(os.environ.get("TRAIN_POLL_SECONDS", 30)),
+                        help="Seconds between checks for new data.")
+    parser.add_argument("--refit-every", type=float, default=float(os.environ.get("TRAIN_REFIT_SECONDS", 3600)),
+                        help="Force a refit at least this often (seconds).")
+    parser.add_argument("--interval", default=os.environ.get("TRAIN_INTERVALS", DEFAULT_INTERVAL),
+                        help="Comma-separated bar intervals to train models for, e.g. 1h,1d.")
+    args = parser.parse_args()
+    intervals = [i for i in args.interval.split(",") if i]
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.once:
+        for interval in intervals:
+            train_and_publish(force=args.force, interval=interval)
+    else:
+        run_worker(poll_interval=args.poll, refit_every=args.refit_every, intervals=intervals)
+
+
+if __name__ == "__main__":
+    parse_args_and_run()
@@ -0,0 +1,54 @@
+"""
+Per-request ARIMA latency when one new candle arrives between requests:
+full re-estimation (old behaviour) vs ARIMAModel.update() + predict.
+
+    python -m benchmarks.bench_arima_update --history 500 --requests 50
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from backend.models.arima_model import ARIMAModel
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--history", type=int, default=500)
+    p.add_argument("--requests", type=int, default=50)
+    p.add_argument("--horizon", type=int, default=24)
+    args = p.parse_args()
+
+    rng = np.random.default_rng(0)
+    series = 30_000 + np.cumsum(rng.normal(0, 50, args.history + args.requests))
+    base = series[:args.history]
+
+    full_ms = []
+    for i in range(args.requests):
+        t0 = time.perf_counter()
+        ARIMAModel(order=(2, 1, 2)).fit(series[:args.history + i + 1]).predict(args.horizon)
+        full_ms.append((time.perf_counter() - t0) * 1000)
+
+    model = ARIMAModel(order=(2, 1, 2)).fit(base)
+    update_ms, refits = [], 0
+    for i in range(args.requests):
+        t0 = time.perf_counter()
+        model.update(series[args.history + i])
+        model.predict(args.horizon)
+        update_ms.append((time.perf_counter() - t0) * 1000)
+        refits += model.last_update["refit"]
+
+    for name, samples in (("full refit + predict", full_ms), ("update + predict", update_ms)):
+        med, p95 = summarize(samples)
+        print(f"{name:22s} median {med:8.2f} ms   p95 {p95:8.2f} ms")
+    print(f"re-estimations triggered by drift/schedule during updates: {refits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Read latency of btc_historical at 100k+ rows: legacy unindexed reads vs the
+indexed (Date, Close) series query.
+
+Needs a running MongoDB (MONGO_URI, default localhost). Uses a scratch database
+that is dropped afterwards.
+
+    python -m benchmarks.bench_historical_reads --rows 200000
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.api.db import fetch_close_series, get_client
+from backend.api.schema import DATE_FIELD, HIST_COLLECTION, ensure_indexes
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def populate(coll, rows, batch=10_000):
+    rng = np.random.default_rng(0)
+    closes = 30_000 + np.cumsum(rng.normal(0, 50, rows))
+    start = datetime(2015, 1, 1)
+    for lo in range(0, rows, batch):
+        coll.insert_many([
+            {
+                DATE_FIELD: start + timedelta(hours=i),
+                "Open": float(c), "High": float(c) + 10, "Low": float(c) - 10,
+                "Close": float(c), "Volume": 1e6,
+                "headlines_concat": "headline || " * 20,
+            }
+            for i, c in zip(range(lo, min(lo + batch, rows)), closes[lo:lo + batch])
+        ], ordered=False)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--repeat", type=int, default=50)
+    p.add_argument("--db", default="bench_bitcoin_db")
+    args = p.parse_args()
+
+    client = get_client()
+    client.drop_database(args.db)
+    db = client[args.db]
+    coll = db[HIST_COLLECTION]
+    print(f"Populating {args.rows} rows...")
+    populate(coll, args.rows)
+
+    def legacy_forecast_read():
+        # what Forecast.post used to do: unindexed sort + a second find_one
+        list(coll.find({}, {"_id": 0, "date": 1, "close": 1}).sort("date", -1).limit(100))
+        coll.find_one({}, sort=[("date", -1)])
+
+    def legacy_historical_read():
+        list(coll.find({}, {"_id": 0}).sort("date", -1).limit(15))
+
+    def historical_read():
+        list(coll.find({}, {"_id": 0}).sort(DATE_FIELD, -1).limit(15))
+
+    def forecast_read():
+        fetch_close_series(coll, 100)
+
+    results = {
+        "legacy forecast read (2 queries, no index)": timed(legacy_forecast_read, args.repeat),
+        "legacy historical read (no index)": timed(legacy_historical_read, args.repeat),
+    }
+    ensure_indexes(db)
+    results["historical read (Date index)"] = timed(historical_read, args.repeat)
+    results["forecast read (covered Date/Close)"] = timed(forecast_read, args.repeat)
+
+    print(f"\n{'query':45s} {'median ms':>10s} {'p95 ms':>10s}")
+    for name, (med, p95) in results.items():
+        print(f"{name:45s} {med:10.2f} {p95:10.2f}")
+
+    plan = db.command(
+        "explain",
+        {"find": HIST_COLLECTION, "filter": {}, "projection": {"_id": 0, DATE_FIELD: 1, "Close": 1},
+         "sort": {DATE_FIELD: -1}, "limit": 100, "hint": "date_close"},
+        verbosity="executionStats",
+    )["executionStats"]
+    print(f"\nforecast read: keys examined={plan['totalKeysExamined']}, "
+          f"docs examined={plan['totalDocsExamined']} (0 = covered by the index)")
+
+    client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
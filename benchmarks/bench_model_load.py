@@ -0,0 +1,74 @@
+"""
+Forecast worker cold start: time for a fresh process to load the published MA
+and ARIMA models, saved as manifests + .npy (ARIMA rebuilt by one filter pass
+over memory-mapped observations) vs the pickles the store used to write.
+
+    python -m benchmarks.bench_model_load --points 20000
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from backend.models.arima_model import ARIMAModel
+from backend.models.artifacts import ArtifactStore
+from backend.models.moving_average import MovingAverageModel
+
+PROBE = """
+import json, pickle, sys, time
+t0 = time.perf_counter()
+import statsmodels.tsa.arima.model, scipy.signal  # imports a preloaded worker already paid for
+t1 = time.perf_counter()
+if sys.argv[1] == "pickle":
+    models = {n: pickle.load(open(f"{sys.argv[2]}/{n}.pkl", "rb")) for n in ("ma", "arima")}
+else:
+    from backend.models.artifacts import ArtifactStore
+    models, _ = ArtifactStore(sys.argv[2]).load_latest()
+models["arima"].predict(24)
+t2 = time.perf_counter()
+print(json.dumps({"imports": t1 - t0, "load": t2 - t1}))
+"""
+
+
+def probe(kind, path):
+    out = subprocess.run([sys.executable, "-c", PROBE, kind, path], capture_output=True, text=True, check=True,
+                         cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--points", type=int, default=20_000)
+    p.add_argument("--runs", type=int, default=3)
+    args = p.parse_args()
+
+    series = 30_000 + np.cumsum(np.random.default_rng(0).normal(0, 50, args.points))
+    models = {"ma": MovingAverageModel(5).fit(series), "arima": ARIMAModel((2, 1, 2)).fit(series)}
+    with tempfile.TemporaryDirectory() as root:
+        store = ArtifactStore(os.path.join(root, "store"))
+        store.publish(models, {"rows": args.points})
+        legacy = os.path.join(root, "pickles")
+        os.makedirs(legacy)
+        for name, model in models.items():
+            with open(os.path.join(legacy, f"{name}.pkl"), "wb") as f:
+                pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        def size(path):
+            return sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(path) for f in fs)
+
+        print(f"{args.points} points; on disk: saved models {size(store.root) / 1e6:.2f} MB, "
+              f"pickles {size(legacy) / 1e6:.2f} MB")
+        for kind, path in (("pickle", legacy), ("saved", store.root)):
+            runs = [probe(kind, path) for _ in range(args.runs)]
+            load = min(r["load"] for r in runs)
+            imports = min(r["imports"] for r in runs)
+            print(f"{kind:>7s}: load + first predict {load * 1e3:7.1f} ms  (imports {imports * 1e3:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
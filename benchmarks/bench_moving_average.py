@@ -0,0 +1,40 @@
+"""
+MovingAverageModel.predict: vectorised IIR filter vs the original per-step loop.
+
+    python -m benchmarks.bench_moving_average
+"""
+import timeit
+
+import numpy as np
+
+from backend.models.moving_average import MovingAverageModel
+
+
+def loop_predict(history, window, steps):
+    # the original implementation, kept here as the reference
+    preds = []
+    hist = list(history)
+    for _ in range(steps):
+        pred = np.mean(hist[-window:])
+        preds.append(pred)
+        hist.append(pred)
+    return np.array(preds)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    history = 30_000 + np.cumsum(rng.normal(0, 50, 1000))
+    print(f"{'window':>6s} {'steps':>7s} {'loop ms':>10s} {'filter ms':>10s} {'speedup':>8s} {'max abs diff':>13s}")
+    for window in (5, 30):
+        model = MovingAverageModel(window=window).fit(history)
+        for steps in (24, 168, 1_000, 10_000, 50_000):
+            number = max(1, 2_000 // steps)
+            t_loop = timeit.timeit(lambda: loop_predict(history, window, steps), number=number) / number
+            t_vec = timeit.timeit(lambda: model.predict(steps), number=number * 10) / (number * 10)
+            diff = np.max(np.abs(model.predict(steps) - loop_predict(history, window, steps)))
+            print(f"{window:6d} {steps:7d} {t_loop * 1e3:10.3f} {t_vec * 1e3:10.3f} "
+                  f"{t_loop / t_vec:7.1f}x {diff:13.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+/api/historical payloads for 10k bars: row JSON vs columnar JSON / MessagePack /
+Arrow, uncompressed, gzip and brotli. Size and encode time per format.
+
+    python -m benchmarks.bench_wire_format
+
+msgpack, pyarrow and brotli are optional; missing ones are skipped.
+"""
+import gzip
+import json
+import timeit
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.api import encoding
+from backend.api.schema import to_api_record
+
+N_BARS = 10_000
+
+
+def make_docs(n):
+    rng = np.random.default_rng(0)
+    close = 30_000 + np.cumsum(rng.normal(0, 50, n))
+    start = datetime(2020, 1, 1)
+    return [{
+        "Date": start + timedelta(hours=i), "Open": float(c - 10), "High": float(c + 25),
+        "Low": float(c - 30), "Close": float(c), "Volume": float(rng.integers(1e6, 1e9)),
+        "Return": float(rng.normal(0, 0.01)), "MA5": float(c), "MA10": float(c),
+        "Volatility": float(abs(rng.normal(0, 0.02))), "news_sentiment": float(rng.normal(0, 0.3)),
+        "headline_count": int(rng.integers(0, 20)),
+    } for i, c in enumerate(close)]
+
+
+def row_json(docs):
+    # the existing response shape: one object per row
+    return json.dumps({"ticker": "BTC-USD", "count": len(docs),
+                       "data": [to_api_record(d) for d in docs]}).encode()
+
+
+def main():
+    docs = make_docs(N_BARS)
+    meta = {"ticker": "BTC-USD", "count": len(docs), "next_cursor": None}
+    formats = {"row json": row_json}
+    for name, media_type in (("columnar json", encoding.COLUMNAR_JSON), ("msgpack", encoding.MSGPACK),
+                             ("arrow ipc", encoding.ARROW)):
+        if media_type in encoding.available_types():
+            formats[name] = lambda d, t=media_type: encoding.encode(meta, encoding.columns_from_docs(d), t)
+        else:
+            print(f"({name}: package not installed, skipped)")
+
+    compressors = {"raw": lambda b: b, "gzip": lambda b: gzip.compress(b, encoding.GZIP_LEVEL)}
+    if encoding.BROTLI_AVAILABLE:
+        import brotli
+        compressors["brotli"] = lambda b: brotli.compress(b, quality=encoding.BROTLI_QUALITY)
+
+    baseline = len(row_json(docs))
+    print(f"{N_BARS} bars")
+    print(f"{'format':>14s} {'encoding':>8s} {'bytes':>10s} {'vs row json':>12s} {'encode ms':>10s}")
+    for name, fn in formats.items():
+        for cname, compress in compressors.items():
+            body = compress(fn(docs))
+            t = timeit.timeit(lambda: compress(fn(docs)), number=5) / 5
+            print(f"{name:>14s} {cname:>8s} {len(body):10d} {len(body) / baseline:11.1%} {t * 1e3:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,12 @@
 import React, { useEffect, useState } from "react";
 import { getHistoricalData, triggerIngestion, pingServer, getForecast } from "./services/api";
 import CandlestickChart from "./components/CandlestickChart";
-import HorizonSelector from "./components/HorizonSelector";
+import HorizonSelector, { INTERVAL_UNITS } from "./components/HorizonSelector";
+
+// Bar interval the dashboard forecasts on: the one it ingests (POST /api/ingest
+// without an interval) and charts from /api/historical. The horizon counts its bars.
+const FORECAST_INTERVAL = "1d";
+const { per, short } = INTERVAL_UNITS[FORECAST_INTERVAL];
 
 export default function App() {
   const [data, setData] = useState([]);
@@ -65,7 +70,7 @@ export default function App() {
       const today = new Date().toISOString().split("T")[0];
       const res = await triggerIngestion("2025-09-01", today);
       console.log("Ingestion triggered:", res);
-      const newData = await getHistoricalData(20);
+      const newData = await getHistoricalData(20, true);
       setData(newData.data || newData);
     } catch (err) {
       alert("Error triggering ingestion");
@@ -78,7 +83,7 @@ export default function App() {
   const handleForecast = async () => {
     setForecasting(true);
     try {
-      const res = await getForecast(horizon);
+      const res = await getForecast(horizon, FORECAST_INTERVAL);
       setForecast(res.predictions);
     } catch {
       alert("Error fetching forecast");
@@ -109,11 +114,11 @@ export default function App() {
           className={`${forecasting ? "bg-gray-400" : "bg-green-600 hover:bg-green-700"
             } text-white px-4 py-2 rounded-lg transition`}
         >
-          {forecasting ? "Forecasting..." : `Forecast (${horizon}h)`}
+          {forecasting ? "Forecasting..." : `Forecast (${horizon * per}${short})`}
         </button>
       </div>
 
-      <HorizonSelector selected={horizon} onChange={setHorizon} />
+      <HorizonSelector selected={horizon} onChange={setHorizon} interval={FORECAST_INTERVAL} />
       <CandlestickChart data={data} forecast={forecast} />
       {forecast && forecast.metrics && (
         <div className="text-center mt-4 text-sm text-gray-600">
@@ -1,13 +1,18 @@
 import React from "react";
 
-const options = [
-  { label: "5 Hours", value: 5 },
-  { label: "10 Hours", value: 10 },
-  { label: "20 Hours", value: 20 },
-  { label: "30 Hours", value: 30 },
-];
+// Length of one forecast step (bar) for each interval, in `unit`s
+export const INTERVAL_UNITS = {
+  "1m": { per: 1, unit: "Minutes", short: "m" },
+  "5m": { per: 5, unit: "Minutes", short: "m" },
+  "1h": { per: 1, unit: "Hours", short: "h" },
+  "1d": { per: 1, unit: "Days", short: "d" },
+};
 
-export default function HorizonSelector({ selected, onChange }) {
+const steps = [5, 10, 20, 30];
+
+export default function HorizonSelector({ selected, onChange, interval = "1d" }) {
+  const { per, unit } = INTERVAL_UNITS[interval];
+  const options = steps.map((value) => ({ label: `${value * per} ${unit}`, value }));
   return (
     <div className="flex gap-2 justify-center mb-4">
       {options.map((opt) => (
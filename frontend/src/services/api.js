@@ -9,8 +9,10 @@ export const pingServer = async () => {
   return res.data;
 };
 
-export const getHistoricalData = async (limit = 15) => {
-  const res = await axios.get(`${API_BASE}/historical?limit=${limit}`);
+// `fresh` asks the server to re-check the data version (e.g. right after an ingest)
+export const getHistoricalData = async (limit = 15, fresh = false) => {
+  const headers = fresh ? { "Cache-Control": "no-cache" } : {};
+  const res = await axios.get(`${API_BASE}/historical?limit=${limit}`, { headers });
   return res.data;
 };
 
@@ -19,7 +21,8 @@ export const triggerIngestion = async (start, end) => {
   return res.data;
 };
 
-export const getForecast = async (horizon = 24) => {
-  const res = await axios.post(`${API_BASE}/forecast`, { horizon });
+// `horizon` counts bars of `interval` (1m, 5m, 1h or 1d)
+export const getForecast = async (horizon = 24, interval = "1d") => {
+  const res = await axios.post(`${API_BASE}/forecast`, { horizon, interval });
   return res.data;
 };
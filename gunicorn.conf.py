@@ -0,0 +1,16 @@
+# gunicorn.conf.py
+# Usage: gunicorn -c gunicorn.conf.py backend.app:app
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+
+def post_fork(server, worker):
+    # Heavy model/data dependencies are imported lazily; set PRELOAD_HEAVY=1 to
+    # import them once per worker at boot instead of on its first request.
+    if os.getenv("PRELOAD_HEAVY", "0") == "1":
+        from backend.preload import preload
+        timings = preload()
+        server.log.info("Worker %s preloaded %s", worker.pid, timings)
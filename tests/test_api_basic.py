@@ -2,6 +2,7 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import pytest
+from datetime import datetime, timedelta
 from backend.app import app
 
 @pytest.fixture
@@ -10,6 +11,15 @@ def client():
     with app.test_client() as client:
         yield client
 
+@pytest.fixture(autouse=True)
+def fresh_versions(monkeypatch):
+    """Empty response cache; dummy DBs have no api_meta, so every scope is at version 0."""
+    from backend.api import conditional
+    conditional.reset()
+    monkeypatch.setattr(conditional, "read_version", lambda db, scope: 0)
+    yield
+    conditional.reset()
+
 def test_ping(client):
     res = client.get("/api/ping")
     assert res.status_code == 200
@@ -43,3 +53,351 @@ def test_historical(client, monkeypatch):
     assert j["ticker"] == "BTC-USD"
     assert j["count"] == 1
     assert j["data"][0]["close"] == 101.2
+
+class ForecastDB:
+    """60 daily closes, newest first, plus a sink for btc_forecasts inserts."""
+    def __init__(self):
+        closes = [100.0 + i + (i % 3) for i in range(60)]
+        start = datetime(2025, 9, 1)
+        self.docs = [{"Date": start + timedelta(days=i), "Close": c} for i, c in enumerate(closes)][::-1]
+        self.inserted = []
+        self.collections = []
+    def get_collection(self, name):
+        self.collections.append(name)
+        return self
+    def find(self, *_, **kwargs):
+        return iter(self.docs[:kwargs.get("limit")])
+    def insert_one(self, doc):
+        self.inserted.append(doc)
+    def find_one(self, flt, projection=None, sort=None):
+        docs = [d for d in self.inserted if all(d.get(k) == v for k, v in flt.items())]
+        return {k: v for k, v in docs[-1].items() if k != "_id"} if docs else None
+    def find_one_and_update(self, flt, update, **kwargs):
+        self.version = getattr(self, "version", 0) + 1
+        return {"_id": flt["_id"], "version": self.version}
+
+
+@pytest.fixture
+def forecast_db(monkeypatch, tmp_path):
+    from backend.models.cache import MODEL_CACHE
+    from backend.models.artifacts import ArtifactStore
+    from backend.api import forecast
+    MODEL_CACHE.clear()
+    db = ForecastDB()
+    monkeypatch.setattr("backend.api.forecast.get_db", lambda: db)
+    monkeypatch.setattr("backend.api.forecast.use_gru", False)
+    monkeypatch.setattr("backend.api.forecast.ARTIFACT_STORE", ArtifactStore(str(tmp_path)))
+    monkeypatch.setattr("backend.api.forecast.artifact_store", lambda i: ArtifactStore(str(tmp_path / i)))
+    # fresh lanes: a run left behind by an earlier test must not hold them
+    monkeypatch.setattr("backend.api.forecast.LANES", {
+        name: forecast.Lane(name, lane.workers, lane.backlog) for name, lane in forecast.LANES.items()})
+    return db
+
+
+def test_forecast_reuses_cached_models(client, forecast_db):
+    first = client.post("/api/forecast", json={"horizon": 5}).get_json()
+    second = client.post("/api/forecast", json={"horizon": 5}).get_json()
+    assert first["cached"] == {"ma": False, "arima": False}
+    assert second["cached"] == {"ma": True, "arima": True}
+    assert second["predictions"]["ensemble"] == first["predictions"]["ensemble"]
+    assert first["model_version"] is None and first["model"]["source"] == "inline"
+    assert len(forecast_db.inserted) == 2
+
+
+def test_forecast_degrades_when_a_model_times_out(client, forecast_db, monkeypatch):
+    import time
+    from backend.api import forecast as forecast_module
+
+    real_fit_model = forecast_module.fit_model
+
+    class SlowModel:
+        def predict(self, steps, quantiles=None):
+            time.sleep(2)
+
+    def fit_model(name, *args, **kwargs):
+        if name == "gru":
+            return SlowModel(), False
+        return real_fit_model(name, *args, **kwargs)
+
+    monkeypatch.setattr(forecast_module, "available_models", lambda use_gru: ["ma", "arima", "gru"])
+    monkeypatch.setattr(forecast_module, "fit_model", fit_model)
+    monkeypatch.setitem(forecast_module.MODEL_TIMEOUTS, "gru", 0.2)
+
+    started = time.perf_counter()
+    res = client.post("/api/forecast", json={"horizon": 5})
+    assert time.perf_counter() - started < 1.5
+    j = res.get_json()
+    assert res.status_code == 200
+    assert j["predictions"]["gru"] is None
+    assert "timed out" in j["failed"]["gru"]
+    assert set(j["timings_ms"]) == {"ma", "arima"}
+    assert len(j["predictions"]["ensemble"]) == 5
+
+
+def test_hung_gru_does_not_starve_other_models(client, forecast_db, monkeypatch):
+    import threading
+    from backend.api import forecast as forecast_module
+
+    real_fit_model = forecast_module.fit_model
+    release, gru_fits = threading.Event(), []
+
+    def fit_model(name, *args, **kwargs):
+        if name == "gru":
+            gru_fits.append(name)
+            release.wait(10)  # a fit that never returns while the requests run
+            raise RuntimeError("released")
+        return real_fit_model(name, *args, **kwargs)
+
+    monkeypatch.setattr(forecast_module, "available_models", lambda use_gru: ["ma", "arima", "gru"])
+    monkeypatch.setattr(forecast_module, "fit_model", fit_model)
+    monkeypatch.setitem(forecast_module.MODEL_TIMEOUTS, "gru", 0.05)
+    try:
+        failed = []
+        for horizon in [5] * 8 + [6]:
+            res = client.post("/api/forecast", json={"horizon": horizon})
+            assert res.status_code == 200
+            j = res.get_json()
+            assert j["predictions"]["gru"] is None and set(j["timings_ms"]) == {"ma", "arima"}
+            failed.append(j["failed"]["gru"])
+        # repeats wait on the one hung run; a new run is refused while it holds the GRU lane
+        assert all("timed out" in reason for reason in failed[:8]) and "in flight" in failed[8]
+        assert gru_fits == ["gru"]
+    finally:
+        release.set()
+
+
+def test_forecast_dates_step_by_interval(client, forecast_db):
+    daily = client.post("/api/forecast", json={"horizon": 2}).get_json()
+    assert daily["interval"] == "1d"
+    assert daily["predictions"]["dates"] == ["2025-10-31T00:00:00", "2025-11-01T00:00:00"]
+
+    hourly = client.post("/api/forecast", json={"horizon": 2, "interval": "1h"}).get_json()
+    assert hourly["predictions"]["dates"] == ["2025-10-30T01:00:00", "2025-10-30T02:00:00"]
+    assert hourly["cached"] == {"ma": False, "arima": False}  # separate cache scope per interval
+
+    assert client.post("/api/forecast", json={"interval": "2h"}).status_code == 400
+
+
+def test_forecast_without_interval_uses_forecast_interval(client, forecast_db, monkeypatch):
+    from backend.api import forecast as forecast_module
+    assert forecast_module.FORECAST_INTERVAL == "1d"
+
+    monkeypatch.setattr(forecast_module, "FORECAST_INTERVAL", "1h")
+    j = client.post("/api/forecast", json={"horizon": 2}).get_json()
+    assert j["interval"] == "1h" and forecast_db.inserted[-1]["interval"] == "1h"
+    assert j["predictions"]["dates"] == ["2025-10-30T01:00:00", "2025-10-30T02:00:00"]
+    assert "btc_historical_1h" in forecast_db.collections
+
+
+class RecordingHistColl:
+    def __init__(self, db, name):
+        self.db, self.name = db, name
+    def find(self, flt, projection):
+        self.db.calls.append(("find", self.name, flt, projection))
+        return self
+    def sort(self, *_):
+        return self
+    def limit(self, n):
+        self.db.calls.append(("limit", n))
+        return iter([{"Date": datetime(2025, 9, 1), "Close": 1.0}])
+    def aggregate(self, pipeline):
+        self.db.calls.append(("aggregate", self.name, pipeline))
+        return iter([{"Date": datetime(2025, 9, 1), "Open": 1.0, "Close": 2.0, "bars": 7}])
+
+
+class RecordingHistDB:
+    def __init__(self):
+        self.calls = []
+    def get_collection(self, name):
+        return RecordingHistColl(self, name)
+
+
+def test_historical_range_and_projection(client, monkeypatch):
+    db = RecordingHistDB()
+    monkeypatch.setattr("backend.api.historical.get_db", lambda: db)
+    res = client.get("/api/historical?start=2025-01-01&end=2025-02-01")
+    assert res.status_code == 200
+    _, name, flt, projection = db.calls[0]
+    assert name == "btc_historical"
+    assert flt == {"Date": {"$gte": datetime(2025, 1, 1), "$lt": datetime(2025, 2, 1)}}
+    assert projection == {"_id": 0, "headlines_concat": 0}
+
+    db.calls.clear()
+    client.get("/api/historical?include_text=1")
+    assert db.calls[0][3] == {"_id": 0}
+    assert client.get("/api/historical?start=not-a-date").status_code == 400
+
+
+def test_historical_aggregates_bars_on_server(client, monkeypatch):
+    db = RecordingHistDB()
+    monkeypatch.setattr("backend.api.historical.get_db", lambda: db)
+    j = client.get("/api/historical?start=2020-01-01&interval=1w&limit=300").get_json()
+    assert j["interval"] == "1w" and j["data"][0]["bars"] == 7
+    assert j["data"][0]["date"] == "2025-09-01T00:00:00"
+
+    _, name, pipeline = db.calls[0]
+    assert name == "btc_historical"
+    assert pipeline[0] == {"$match": {"Date": {"$gte": datetime(2020, 1, 1)}}}
+    group = pipeline[2]["$group"]
+    assert group["_id"]["$dateTrunc"]["unit"] == "week"
+    assert (group["Open"], group["High"], group["Low"], group["Close"], group["Volume"]) == (
+        {"$first": "$Open"}, {"$max": "$High"}, {"$min": "$Low"}, {"$last": "$Close"}, {"$sum": "$Volume"})
+    assert {"$limit": 301} in pipeline  # one extra row to detect a next page
+
+    db.calls.clear()
+    client.get("/api/historical?interval=4h")
+    assert db.calls[0][1] == "btc_historical_1h"
+    assert client.get("/api/historical?interval=3d").status_code == 400
+
+
+class PagedColl:
+    """In-memory candles supporting the find/sort/limit chain with Date ranges."""
+    def __init__(self, n):
+        self.docs = [{"Date": datetime(2025, 1, 1) + timedelta(days=i), "Close": float(i),
+                      "headlines_concat": "x" * 100} for i in range(n)]
+        self.batch = None
+    def get_collection(self, *_):
+        return self
+    def find(self, flt, projection):
+        rng = flt.get("Date", {})
+        self.rows = [{k: v for k, v in d.items() if projection.get(k, 1)} for d in self.docs
+                     if d["Date"] >= rng.get("$gte", datetime.min) and d["Date"] < rng.get("$lt", datetime.max)]
+        self.cap = None
+        return self
+    def sort(self, *_):
+        self.rows.sort(key=lambda d: d["Date"], reverse=True)
+        return self
+    def batch_size(self, n):
+        self.batch = n
+        return self
+    def limit(self, n):
+        self.cap = n
+        return self
+    def __iter__(self):
+        return iter(self.rows[:self.cap])
+
+
+def test_historical_keyset_pagination(client, monkeypatch):
+    monkeypatch.setattr("backend.api.historical.get_db", lambda: PagedColl(25))
+    seen, cursor, pages = [], None, 0
+    while True:
+        url = "/api/historical?limit=10" + (f"&cursor={cursor}" if cursor else "")
+        j = client.get(url).get_json()
+        seen += [row["date"] for row in j["data"]]
+        pages += 1
+        cursor = j["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == 3 and len(seen) == 25 == len(set(seen))
+    assert seen == sorted(seen, reverse=True)
+    assert "headlines_concat" not in client.get("/api/historical").get_json()["data"][0]
+
+    j = client.get("/api/historical?limit=10&after=2025-01-05").get_json()
+    assert [r["date"][:10] for r in j["data"]] == ["2025-01-04", "2025-01-03", "2025-01-02", "2025-01-01"]
+    assert client.get("/api/historical?cursor=garbage").status_code == 400
+
+
+def test_historical_page_size_is_capped(client, monkeypatch):
+    monkeypatch.setattr("backend.api.historical.get_db", lambda: PagedColl(25))
+    monkeypatch.setattr("backend.api.historical.MAX_PAGE_SIZE", 5)
+    j = client.get("/api/historical?limit=1000000").get_json()
+    assert j["count"] == 5 and j["next_cursor"]
+
+
+def test_historical_streams_every_row(client, monkeypatch):
+    import json
+    db = PagedColl(2500)
+    monkeypatch.setattr("backend.api.historical.get_db", lambda: db)
+
+    res = client.get("/api/historical?stream=ndjson")
+    assert res.is_streamed and res.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert len(rows) == 2500 and db.batch == 500
+
+    res = client.get("/api/historical?stream=json&start=2025-01-01&end=2025-01-11")
+    assert len(json.loads(res.get_data(as_text=True))) == 10
+    assert client.get("/api/historical?stream=xml").status_code == 400
+
+
+def test_forecast_columnar_format(client, forecast_db):
+    import json
+    res = client.post("/api/forecast?format=columnar", json={"horizon": 3})
+    body = json.loads(res.data)
+    assert res.mimetype == "application/vnd.btc.columnar+json"
+    bands = {f"{m}_q{q}" for m in ("moving_average", "arima", "ensemble") for q in ("0.05", "0.95")}
+    assert set(body["columns"]) == {"dates", "moving_average", "arima", "ensemble"} | bands
+    assert len(body["columns"]["ensemble"]) == 3 and body["horizon"] == 3
+    assert "predictions" not in body and "intervals" not in body
+
+
+def test_historical_conditional_get(client, monkeypatch):
+    from backend.api import conditional
+    db = RecordingHistDB()
+    monkeypatch.setattr("backend.api.historical.get_db", lambda: db)
+    first = client.get("/api/historical?limit=1")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+    assert len(db.calls) == 2
+
+    # unchanged data: 304 / repeated page served without querying Mongo
+    assert client.get("/api/historical?limit=1", headers={"If-None-Match": etag}).status_code == 304
+    again = client.get("/api/historical?limit=1")
+    assert again.get_json() == first.get_json() and again.headers["ETag"] == etag
+    assert len(db.calls) == 2
+
+    # an ingest bumps the version: new ETag, fresh query
+    class MetaDB:
+        def get_collection(self, name):
+            class Meta:
+                def find_one_and_update(self, *_, **__):
+                    return {"version": 1}
+            return Meta()
+    conditional.bump_version(MetaDB(), conditional.HISTORICAL_SCOPE)
+    res = client.get("/api/historical?limit=1", headers={"If-None-Match": etag})
+    assert res.status_code == 200 and res.headers["ETag"] != etag
+    assert len(db.calls) == 4
+
+    # an ingest in another worker: seen at once by a no-cache request
+    etag = res.headers["ETag"]
+    monkeypatch.setattr(conditional, "read_version", lambda db, scope: 2)
+    assert client.get("/api/historical?limit=1", headers={"If-None-Match": etag}).status_code == 304
+    res = client.get("/api/historical?limit=1", headers={"If-None-Match": etag, "Cache-Control": "no-cache"})
+    assert res.status_code == 200 and res.headers["ETag"] != etag
+
+
+def test_etag_matches_compressed_representation(client, monkeypatch):
+    monkeypatch.setattr("backend.api.historical.get_db", lambda: PagedColl(200))
+    res = client.get("/api/historical?limit=100", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip" and res.headers["ETag"].endswith('-gzip"')
+    res = client.get("/api/historical?limit=100", headers={"Accept-Encoding": "gzip",
+                                                           "If-None-Match": res.headers["ETag"]})
+    assert res.status_code == 304
+
+
+def test_latest_forecast(client, forecast_db):
+    assert client.get("/api/forecast/latest").status_code == 404
+    client.post("/api/forecast", json={"horizon": 2})
+    first = client.get("/api/forecast/latest")
+    assert first.status_code == 200 and first.get_json()["horizon"] == 2
+    assert client.get("/api/forecast/latest", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    client.post("/api/forecast", json={"horizon": 3})
+    res = client.get("/api/forecast/latest", headers={"If-None-Match": first.headers["ETag"]})
+    assert res.status_code == 200 and res.get_json()["horizon"] == 3
+    assert client.get("/api/forecast/latest?interval=1h").status_code == 404
+
+
+def test_forecast_prediction_intervals(client, forecast_db):
+    j = client.post("/api/forecast", json={"horizon": 4, "quantiles": [0.1, 0.9]}).get_json()
+    intervals = j["intervals"]
+    assert intervals["quantiles"] == [0.1, 0.9] and intervals["gru"] is None
+    lower, upper = intervals["arima"]
+    assert all(lo < p < hi for lo, p, hi in zip(lower, j["predictions"]["arima"], upper))
+    # on this steadily rising series MA's residuals are all positive, so its band sits above the point
+    for name in ("moving_average", "ensemble"):
+        lower, upper = intervals[name]
+        assert all(lo <= hi for lo, hi in zip(lower, upper))
+    assert forecast_db.inserted[-1]["intervals"] == intervals
+
+    assert client.post("/api/forecast", json={"horizon": 4, "quantiles": []}).get_json()["intervals"] is None
+    assert client.post("/api/forecast", json={"quantiles": [2]}).status_code == 400
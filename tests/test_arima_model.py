@@ -0,0 +1,70 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+
+from backend.models.arima_model import ARIMAModel
+
+rng = np.random.default_rng(7)
+series = 100 + np.cumsum(rng.normal(0, 1, 160))
+
+
+def test_update_matches_filtering_with_fixed_params():
+    model = ARIMAModel(order=(2, 1, 2)).fit(series[:150])
+    expected = model.model_fit.append(series[150:155], refit=False).forecast(5)
+    model.update(series[150:155])
+    np.testing.assert_allclose(model.predict(5), expected, rtol=1e-8)
+    assert model.last_update["refit"] is False
+    assert model.n_since_refit == 5
+    assert len(model.history) == 155
+
+
+def test_update_refits_on_schedule():
+    model = ARIMAModel(order=(1, 1, 0), refit_every=3).fit(series[:150])
+    model.update(series[150:152])
+    assert model.last_update["refit"] is False
+    model.update(series[152:153])
+    assert model.last_update == {**model.last_update, "refit": True, "reason": "schedule"}
+    assert model.n_since_refit == 0
+
+
+def test_update_refits_on_drift():
+    model = ARIMAModel(order=(1, 1, 0), drift_threshold=3.0).fit(series[:150])
+    jump = series[149] + np.array([500.0, 1000.0])
+    model.update(jump)
+    assert model.last_update["reason"] == "drift"
+    assert model.last_update["drift_score"] > 3.0
+
+
+def test_quantiles_match_conf_int():
+    model = ARIMAModel(order=(1, 1, 1)).fit(series)
+    point, bands = model.predict(6, quantiles=[0.05, 0.5, 0.95])
+    conf = model.model_fit.get_forecast(6).conf_int(alpha=0.1)
+    np.testing.assert_allclose(point, model.predict(6), rtol=1e-12)
+    np.testing.assert_allclose(bands[[0, 2]], conf.T, rtol=1e-10)
+    np.testing.assert_allclose(bands[1], point, rtol=1e-12)
+
+
+def test_save_load_rebuilds_filter_without_refit(tmp_path):
+    from backend.models.base_model import BaseModel
+
+    model = ARIMAModel(order=(2, 1, 2), refit_every=50).fit(series[:150])
+    model.update(series[150:153])
+    manifest = model.save(str(tmp_path), data_range={"rows": 153}, metrics={"rmse": 1.0})
+    assert manifest["params"] == {"order": [2, 1, 2], "refit_every": 50, "drift_threshold": 3.0}
+    assert set(manifest["files"]) == {"params.npy", "history.npy", "state.json"}
+
+    loaded = BaseModel.load(str(tmp_path))
+    assert isinstance(loaded, ARIMAModel) and loaded.n_since_refit == 3
+    assert isinstance(loaded.history, np.memmap)
+    np.testing.assert_allclose(loaded.predict(5), model.predict(5), rtol=1e-10)
+    loaded.update(series[153:156])
+    model.update(series[153:156])
+    np.testing.assert_allclose(loaded.predict(5), model.predict(5), rtol=1e-10)
+
+    with open(tmp_path / "params.npy", "r+b") as f:
+        f.seek(-1, 2)
+        f.write(b"\x01")
+    with pytest.raises(ValueError, match="checksum"):
+        BaseModel.load(str(tmp_path))
@@ -0,0 +1,61 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+
+from backend.models.arima_model import ARIMAModel
+from backend.models.backtest import backtest, error_table, origins
+from backend.models.moving_average import MovingAverageModel
+
+MA_ONLY = {"ma": (MovingAverageModel, {"window": 5})}
+
+
+def make_series(n=300):
+    rng = np.random.default_rng(0)
+    return 100 + np.cumsum(rng.normal(0, 1, n))
+
+
+def test_origins_leave_room_for_the_horizon():
+    assert origins(10, 3, 5).tolist() == [5, 6, 7]
+    assert origins(20, 2, 5, step=5).tolist() == [5, 10, 15]
+    with pytest.raises(ValueError):
+        origins(6, 3, 5)
+
+
+def test_forecasts_only_see_data_before_the_origin():
+    series = make_series(120)
+    result = backtest(series, MA_ONLY, horizon=4, min_train=20, refit_every=7, workers=1)
+    assert result["predictions"]["ma"].shape == (len(result["origins"]), 4)
+    for i, t in enumerate(result["origins"]):
+        expected = MovingAverageModel(5).fit(series[:t]).predict(4)
+        assert np.allclose(result["predictions"]["ma"][i], expected)
+        assert np.array_equal(result["actual"][i], series[t:t + 4])
+
+
+def test_process_pool_matches_serial_run():
+    series = make_series(400)
+    serial = backtest(series, MA_ONLY, horizon=6, min_train=50, refit_every=40, workers=1)
+    pooled = backtest(series, MA_ONLY, horizon=6, min_train=50, refit_every=40, workers=2)
+    assert np.array_equal(serial["predictions"]["ma"], pooled["predictions"]["ma"])
+
+
+def test_error_table_per_horizon_step():
+    actual = np.array([[1.0, 2.0], [0.0, 4.0]])
+    pred = np.array([[2.0, 2.0], [1.0, np.nan]])
+    table = error_table({"m": pred}, actual).set_index("step")
+    assert table.loc[1, "rmse"] == pytest.approx(1.0) and table.loc[1, "mae"] == pytest.approx(1.0)
+    assert table.loc[1, "mape"] == pytest.approx(100.0)  # the zero actual is skipped
+    assert table.loc[2, "n"] == 1 and table.loc[2, "rmse"] == 0.0
+
+
+def test_arima_and_ensemble_rolling_window():
+    series = make_series(160)
+    specs = {"ma": MA_ONLY["ma"], "arima": (ARIMAModel, {"order": (1, 1, 0), "refit_every": 10})}
+    result = backtest(series, specs, horizon=3, min_train=100, step=5, window="rolling",
+                      train_size=60, refit_every=4, workers=1)
+    errors = result["errors"]
+    assert set(errors["model"]) == {"ma", "arima", "ensemble"}
+    assert len(errors) == 9 and np.isfinite(errors["rmse"]).all()
+    assert np.allclose(result["predictions"]["ensemble"],
+                       0.5 * result["predictions"]["ma"] + 0.5 * result["predictions"]["arima"])
@@ -0,0 +1,61 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from backend.api import db as db_module
+from backend.app import app
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    db_module.close_clients()
+    db_module.POOL_STATS.reset()
+    yield
+    db_module.close_clients()
+
+
+def test_get_client_is_shared_per_uri(monkeypatch):
+    monkeypatch.setenv("MONGO_URI", "mongodb://localhost:27017")
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "7")
+    c1 = db_module.get_client()
+    c2 = db_module.get_client()
+    assert c1 is c2
+    assert db_module.get_db("x").client is c1
+    assert c1.options.pool_options.max_pool_size == 7
+    assert db_module.get_client("mongodb://otherhost:27017") is not c1
+    assert db_module.client_count() == 2
+
+
+def test_client_rebuilt_after_fork(monkeypatch):
+    c1 = db_module.get_client()
+    # simulate running in a forked child
+    monkeypatch.setattr(db_module, "_clients_pid", -1)
+    c2 = db_module.get_client()
+    assert c2 is not c1
+    c1.close()
+
+
+def test_pool_stats_snapshot():
+    stats = db_module.POOL_STATS
+    for _ in range(2):
+        stats.connection_created(None)
+    for _ in range(10):
+        stats.connection_checked_out(None)
+    for _ in range(9):
+        stats.connection_checked_in(None)
+    snap = stats.snapshot()
+    assert snap["open_connections"] == 2
+    assert snap["in_use"] == 1
+    assert snap["reuse_ratio"] == 0.8
+
+
+def test_ping_pool_endpoint():
+    app.testing = True
+    with app.test_client() as client:
+        res = client.get("/api/ping/pool")
+    assert res.status_code == 200
+    j = res.get_json()
+    assert j["status"] == "ok"
+    assert "checked_out" in j["pool"]
+    assert j["options"]["maxPoolSize"] >= 1
@@ -0,0 +1,85 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.api import conditional, encoding
+from backend.app import app
+
+
+class BarsDB:
+    def __init__(self, n):
+        self.docs = [{"Date": datetime(2025, 1, 1) + timedelta(hours=i), "Open": 1.0 * i, "High": i + 1.0,
+                      "Low": i - 1.0, "Close": i + 0.5, "Volume": 10} for i in range(n)][::-1]
+    def get_collection(self, *_):
+        return self
+    def find(self, *_):
+        return self
+    def sort(self, *_):
+        return self
+    def limit(self, n):
+        return iter(self.docs[:n])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr("backend.api.historical.get_db", lambda: BarsDB(50))
+    monkeypatch.setattr(conditional, "read_version", lambda db, scope: 0)
+    conditional.reset()
+    app.testing = True
+    with app.test_client() as c:
+        yield c
+
+
+def test_columnar_json(client):
+    res = client.get("/api/historical?limit=20", headers={"Accept": encoding.COLUMNAR_JSON})
+    assert res.mimetype == encoding.COLUMNAR_JSON
+    body = json.loads(res.data)
+    assert body["count"] == 20 and body["next_cursor"]
+    assert set(body["columns"]) == {"date", "open", "high", "low", "close", "volume"}
+    assert body["columns"]["date"][0] == "2025-01-03T01:00:00"
+    assert len(body["columns"]["close"]) == 20
+
+    rows = client.get("/api/historical?limit=20").get_json()["data"]
+    assert [r["close"] for r in rows] == body["columns"]["close"]
+
+
+def test_msgpack_and_arrow(client):
+    msgpack = pytest.importorskip("msgpack")
+    pa = pytest.importorskip("pyarrow")
+    res = client.get("/api/historical?limit=5", headers={"Accept": "application/x-msgpack"})
+    assert res.mimetype == encoding.MSGPACK
+    assert msgpack.unpackb(res.data)["columns"]["open"] == [49.0, 48.0, 47.0, 46.0, 45.0]
+
+    res = client.get("/api/historical?limit=5&format=arrow")
+    table = pa.ipc.open_stream(res.data).read_all()
+    assert table.num_rows == 5 and str(table.schema.field("date").type).startswith("timestamp")
+    assert json.loads(table.schema.metadata[b"meta"])["count"] == 5
+
+
+def test_unavailable_format_is_not_acceptable(client, monkeypatch):
+    monkeypatch.setitem(encoding._HAVE, encoding.ARROW, False)
+    assert client.get("/api/historical?format=arrow").status_code == 406
+    assert client.get("/api/historical", headers={"Accept": encoding.ARROW}).status_code == 406
+    assert client.get("/api/historical", headers={"Accept": "*/*"}).mimetype == encoding.JSON
+
+
+def test_large_responses_are_compressed(client, monkeypatch):
+    monkeypatch.setattr(encoding, "BROTLI_AVAILABLE", False)
+    res = client.get("/api/historical?limit=50", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert len(json.loads(gzip.decompress(res.data))["data"]) == 50
+
+    small = client.get("/api/historical?limit=1", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+
+def test_brotli_preferred_when_available(client):
+    brotli = pytest.importorskip("brotli")
+    res = client.get("/api/historical?limit=50", headers={"Accept-Encoding": "gzip, br"})
+    assert res.headers["Content-Encoding"] == "br"
+    assert json.loads(brotli.decompress(res.data))["count"] == 50
@@ -0,0 +1,40 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+
+from backend.models.ensemble import EnsembleWeights, combine_predictions
+
+
+def test_equal_weights_include_gru():
+    ma, arima, gru = np.full(3, 1.0), np.full(3, 2.0), np.full(3, 6.0)
+    assert combine_predictions(ma, arima).tolist() == [1.5] * 3
+    assert combine_predictions(ma, arima, gru).tolist() == [3.0] * 3
+
+
+def test_inverse_error_weights_per_step():
+    actual = np.zeros((4, 2))
+    preds = {"ma": np.tile([1.0, 2.0], (4, 1)), "arima": np.tile([2.0, 1.0], (4, 1))}
+    weights = EnsembleWeights.fit(preds, actual)
+    w = weights.matrix(["ma", "arima"], 3)
+    # mse ma = (1, 4), arima = (4, 1): weights 4/5 and 1/5, flipped at step 2, step 3 reuses step 2
+    assert np.allclose(w, [[0.8, 0.2, 0.2], [0.2, 0.8, 0.8]])
+    assert np.allclose(combine_predictions(np.ones(3), np.zeros(3), weights=weights), [0.8, 0.2, 0.2])
+
+    # batched: (origins, horizon) inputs, one dot product per origin
+    out = combine_predictions(np.ones((5, 3)), np.zeros((5, 3)), weights=weights)
+    assert out.shape == (5, 3) and np.allclose(out, [0.8, 0.2, 0.2])
+
+    # a model without learned errors gets no weight
+    assert np.allclose(weights.matrix(["ma", "arima", "gru"], 1)[:, 0], [0.8, 0.2, 0.0])
+
+
+def test_update_decays_only_scored_steps():
+    weights = EnsembleWeights(["ma", "arima"], [[1.0, 1.0], [1.0, 1.0]], decay=0.5)
+    weights.update({"ma": np.array([3.0, 9.0]), "arima": np.array([1.0, 9.0])}, np.array([1.0, np.nan]))
+    assert weights.mse.tolist() == [[2.5, 1.0], [0.5, 1.0]]
+    assert weights.updates == 1
+
+    restored = EnsembleWeights.from_dict(weights.to_dict())
+    assert np.array_equal(restored.mse, weights.mse) and restored.decay == 0.5
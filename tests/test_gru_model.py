@@ -27,3 +27,49 @@ print("✅ Predictions (5-step):", pred)
 true_values = series[-5:] + np.random.randn(5) * 0.5
 metrics = model.evaluate(true_values, pred[-5:])
 print("📊 Evaluation metrics:", metrics)
+
+
+def keras_predict_loop(m, steps):
+    # the original per-step model.predict() inference path
+    seq = np.array(m.last_seq, dtype=np.float32)
+    preds = []
+    for _ in range(steps):
+        x = seq[-m.lookback:].reshape(1, m.lookback, 1)
+        preds.append(m.model.predict(x, verbose=0)[0, 0])
+        seq = np.append(seq, preds[-1])
+    return np.array(preds)
+
+
+def test_predict_matches_keras_predict_loop():
+    np.testing.assert_allclose(model.predict(steps=12), keras_predict_loop(model, 12), rtol=1e-5)
+
+
+def test_rollout_over_several_start_points():
+    windows = np.stack([series[i:i + model.lookback] for i in range(0, 60, 10)])
+    paths = model.rollout(windows, steps=8)
+    assert paths.shape == (len(windows), 8)
+    for w, path in zip(windows, paths):
+        single = model.rollout(w, steps=8)[0]
+        np.testing.assert_allclose(path, single, rtol=1e-4)
+
+
+def test_prepare_data_windows_match_loop():
+    X, y = model._prepare_data(series)
+    X_loop = np.array([series[i:i + model.lookback] for i in range(len(series) - model.lookback)])
+    np.testing.assert_array_equal(X[..., 0], X_loop)
+    np.testing.assert_array_equal(y, series[model.lookback:])
+    assert X.shape == (len(series) - model.lookback, model.lookback, 1)
+    assert np.shares_memory(X, series)  # a view, not a copy
+
+    X32, y32 = GRUForecaster(lookback=10, dtype="float32")._prepare_data(series)
+    assert X32.dtype == np.float32 and y32.dtype == np.float32
+
+
+def test_streaming_dataset_covers_every_window():
+    m = GRUForecaster(lookback=10, stream=True, batch_size=16)
+    xs, ys = zip(*[(x.numpy(), yb.numpy()) for x, yb in m._make_dataset(series, seed=0)])
+    assert sum(len(b) for b in ys) == len(series) - 10
+    np.testing.assert_allclose(np.sort(np.concatenate(ys)), np.sort(series[10:]).astype(np.float32))
+
+    m.epochs = 1
+    assert m.fit(series).predict(3).shape == (3,)
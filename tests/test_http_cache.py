@@ -0,0 +1,101 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from backend.data import fin_data_builder as fdb
+from backend.data.price_cache import PriceCache
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    hits = []
+    cache_control = "max-age=0"
+    body = b"<rss>v1</rss>"
+
+    def do_GET(self):
+        etag = '"v1"'
+        conditional = self.headers.get("If-None-Match")
+        self.hits.append(conditional)
+        if conditional == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", self.cache_control)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), ETagHandler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    ETagHandler.hits = []
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    ETagHandler.cache_control = "max-age=0"
+    srv.shutdown()
+
+
+def test_stale_entry_revalidates_with_etag(server, tmp_path):
+    session = fdb.requests_session_with_retries(cache_dir=str(tmp_path))
+    first = session.get(server + "/feed")
+    second = session.get(server + "/feed")
+    assert ETagHandler.hits == [None, '"v1"']
+    assert not first.from_cache and second.from_cache
+    assert second.status_code == 200 and second.content == b"<rss>v1</rss>"
+
+
+def test_fresh_entry_served_without_request(server, tmp_path):
+    ETagHandler.cache_control = "max-age=60"
+    session = fdb.requests_session_with_retries(cache_dir=str(tmp_path))
+    session.get(server + "/feed")
+    assert session.get(server + "/feed").from_cache
+    assert len(ETagHandler.hits) == 1
+
+
+def test_cache_evicts_to_size_bound(server, tmp_path):
+    from backend.data.http_cache import CachingHTTPAdapter
+    session = fdb.requests_session_with_retries(cache_dir=None)
+    session.mount("http://", CachingHTTPAdapter(cache_dir=str(tmp_path), max_bytes=30))
+    for i in range(5):
+        session.get(f"{server}/feed{i}")
+    bodies = [n for n in os.listdir(tmp_path) if n.endswith(".body")]
+    assert len(bodies) == 2  # 13 bytes each
+
+
+def bars(start, end):
+    idx = pd.date_range(start, end, freq="D", inclusive="left")
+    return pd.DataFrame({"Close": range(len(idx))}, index=idx, dtype=float)
+
+
+def test_fetch_prices_downloads_only_missing_ranges(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_download(ticker, start, end, interval="1d"):
+        calls.append((start, end))
+        return bars(start, end)
+
+    monkeypatch.setattr(fdb, "PRICE_CACHE", PriceCache(str(tmp_path)))
+    monkeypatch.setattr(fdb, "download_prices", fake_download)
+
+    assert len(fdb.fetch_prices("BTC-USD", "2025-09-10", "2025-09-20")) == 10
+    df = fdb.fetch_prices("BTC-USD", "2025-09-05", "2025-09-25")
+    assert len(df) == 20
+    assert df.index.is_monotonic_increasing and not df.index.duplicated().any()
+    assert calls == [("2025-09-10", "2025-09-20"),
+                     ("2025-09-05", "2025-09-10"),
+                     ("2025-09-19", "2025-09-25")]  # last cached day refetched
+
+    calls.clear()
+    assert len(fdb.fetch_prices("BTC-USD", "2025-09-06", "2025-09-12")) == 6
+    assert calls == []
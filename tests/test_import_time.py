@@ -0,0 +1,53 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Seconds allowed for `import backend.app` in a fresh interpreter
+IMPORT_BUDGET = float(os.getenv("IMPORT_BUDGET_SECONDS", "3.0"))
+
+HEAVY = ["tensorflow", "keras", "yfinance", "bs4", "feedparser", "vaderSentiment",
+         "statsmodels", "sklearn", "scipy.signal"]
+
+PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import backend.app
+elapsed = time.perf_counter() - t
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY,)
+
+
+def run_probe(code):
+    env = dict(os.environ, MONGO_ENSURE_INDEXES="0")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_app_import_is_lazy_and_within_budget():
+    result = run_probe(PROBE)
+    assert result["loaded"] == []
+    assert result["seconds"] < IMPORT_BUDGET
+
+
+def test_preload_imports_requested_groups():
+    result = run_probe(
+        "import json, sys\n"
+        "from backend.preload import preload\n"
+        "timings = preload(['models'])\n"
+        "print(json.dumps({'loaded': [m for m in ('statsmodels', 'sklearn', 'tensorflow') if m in sys.modules]}))"
+    )
+    assert result["loaded"] == ["statsmodels"]
+
+
+def test_app_import_does_not_touch_the_filesystem(tmp_path):
+    env = dict(os.environ, MONGO_ENSURE_INDEXES="0", PYTHONPATH=ROOT)
+    for var in ("HTTP_CACHE_DIR", "PRICE_CACHE_DIR", "SENTIMENT_CACHE_PATH", "MODEL_ARTIFACT_DIR"):
+        env.pop(var, None)
+    subprocess.run([sys.executable, "-c", "import backend.app"], cwd=tmp_path, env=env,
+                   capture_output=True, text=True, check=True)
+    assert os.listdir(tmp_path) == []
@@ -64,3 +64,182 @@ def test_ingest_to_mongo_monkeypatch(monkeypatch):
 
     # cleanup test db
     client.drop_database(test_db)
+
+
+BASE = pd.Timestamp("2025-08-01")
+
+
+def fake_build_dataset(exchange, ticker, start, end, out_path, interval="1d"):
+    from backend.data.fin_data_builder import compute_indicators
+    freq = {"1h": "h", "1d": "D"}[interval]
+    idx = pd.date_range(start, end, freq=freq, inclusive="left")
+    days = (idx - BASE) // pd.Timedelta("1" + freq)
+    close = 100 + days * 1.5 + days % 4
+    df = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1,
+                       "Close": close, "Volume": 1000.0}, index=idx)
+    df = compute_indicators(df)
+    df["headlines_concat"], df["news_sentiment"], df["headline_count"] = "", 0.0, 0
+    df.index.name = "Date"
+    out = df.reset_index()
+    out["Date"] = out["Date"].dt.strftime("%Y-%m-%d" if interval == "1d" else "%Y-%m-%dT%H:%M:%S")
+    return out
+
+
+class MemColl:
+    def __init__(self):
+        self.docs = {}
+        self.writes = 0
+        self.batches = []
+        self.fail = False
+    def create_index(self, *a, **k):
+        pass
+    def update_many(self, *_):
+        class R:
+            modified_count = 0
+        return R()
+    def find_one(self, *_, **kwargs):
+        return {"Date": max(self.docs)} if self.docs else None
+    def find_one_and_update(self, flt, update, **kwargs):
+        self.version = getattr(self, "version", 0) + 1
+        return {"_id": flt["_id"], "version": self.version}
+    def find(self, flt=None, projection=None, **kwargs):
+        if flt is None:  # fetch_close_points: latest `limit` bars, newest first
+            return [dict(d) for _, d in sorted(self.docs.items(), reverse=True)][:kwargs.get("limit")]
+        rng = flt["Date"]
+        return [dict(d) for k, d in sorted(self.docs.items()) if rng["$gte"] <= k <= rng["$lte"]]
+    def insert_one(self, doc):
+        self.inserted = getattr(self, "inserted", []) + [doc]
+    def bulk_write(self, ops, ordered=False):
+        if self.fail:
+            raise RuntimeError("write failed")
+        self.batches.append(len(ops))
+        class R:
+            upserted_count = modified_count = 0
+        r = R()
+        for op in ops:
+            doc = op._doc["$set"]
+            if doc["Date"] in self.docs:
+                r.modified_count += 1
+            else:
+                r.upserted_count += 1
+            self.docs[doc["Date"]] = dict(doc)
+        self.writes += len(ops)
+        return r
+
+
+class MemClient:
+    def __init__(self):
+        self.colls = {}
+        class Admin:
+            def command(self, *_):
+                return {"ok": 1}
+        self.admin = Admin()
+    def get_database(self, *_):
+        return self
+    def get_collection(self, name):
+        return self.colls.setdefault(name, MemColl())
+    @property
+    def coll(self):
+        return self.get_collection(ingest_module.HIST_COLLECTION)
+
+
+@pytest.fixture
+def mem_client(monkeypatch):
+    client = MemClient()
+    monkeypatch.setattr(ingest_module, "get_client", lambda *_: client)
+    monkeypatch.setattr(ingest_module, "build_dataset", fake_build_dataset)
+    return client
+
+
+def test_incremental_ingest_writes_only_new_candles(mem_client):
+    full = ingest_module.run_ingest("BTC-USD", "2025-08-01", "2025-09-01")
+    assert (full["mode"], full["written"], full["skipped"]) == ("full", 31, 0)
+
+    # re-running the same range writes nothing
+    again = ingest_module.run_ingest("BTC-USD", "2025-08-01", "2025-09-01")
+    assert (again["written"], again["skipped"]) == (0, 31)
+    assert mem_client.get_collection("api_meta").version == 1  # data version bumped only on writes
+
+    stats = ingest_module.run_ingest("BTC-USD", end="2025-09-04", incremental=True)
+    assert stats["mode"] == "incremental"
+    assert stats["start"] == "2025-08-21"  # latest stored day minus the indicator lookback
+    assert stats["fetched"] == 14
+    assert (stats["inserted"], stats["skipped"]) == (3, 1)
+    assert set(stats["timings"]) == {"fetch", "compare", "write", "total"}
+
+    # indicators for the new tail match a full rebuild
+    rebuilt = fake_build_dataset("CRYPTO", "BTC-USD", "2025-08-01", "2025-09-04", None)
+    expected = ingest_module.normalize_records_for_mongo(rebuilt)[-3:]
+    for rec in expected:
+        stored = mem_client.coll.docs[rec["Date"]]
+        assert all(ingest_module._same_value(v, stored[k]) for k, v in rec.items())
+
+
+def test_incremental_ingest_on_empty_collection_needs_start(mem_client):
+    with pytest.raises(ValueError):
+        ingest_module.run_ingest("BTC-USD", incremental=True)
+    stats = ingest_module.run_ingest("BTC-USD", start="2025-08-01", end="2025-08-11", incremental=True)
+    assert stats["mode"] == "full" and stats["inserted"] == 10
+
+
+def test_ingest_streams_chunked_bulk_writes(mem_client):
+    stats = ingest_module.run_ingest("BTC-USD", "2025-08-01", "2025-09-01", chunk_size=8)
+    assert mem_client.coll.batches == [8, 8, 8, 7]
+    assert stats["inserted"] == 31 and stats["skipped"] == 0
+
+    # one changed row in the middle: only its chunk issues a write
+    mem_client.coll.docs[datetime(2025, 8, 12)]["Close"] = -1.0
+    stats = ingest_module.run_ingest("BTC-USD", "2025-08-01", "2025-09-01", chunk_size=8)
+    assert mem_client.coll.batches[4:] == [1]
+    assert (stats["modified"], stats["skipped"]) == (1, 30)
+
+
+def test_chunk_write_failure_is_raised(mem_client):
+    mem_client.coll.fail = True
+    with pytest.raises(RuntimeError, match="write failed"):
+        ingest_module.run_ingest("BTC-USD", "2025-08-01", "2025-09-01", chunk_size=8)
+
+
+def test_hourly_ingest_with_daily_rollup(mem_client):
+    stats = ingest_module.run_ingest("BTC-USD", "2025-08-01", "2025-08-04", interval="1h", rollups=["1d"])
+    hourly = mem_client.colls["btc_historical_1h"].docs
+    daily = mem_client.colls["btc_historical"].docs
+    assert stats["interval"] == "1h" and stats["inserted"] == 72 == len(hourly)
+    assert stats["rollups"]["1d"]["inserted"] == 3
+    assert datetime(2025, 8, 1, 13) in hourly
+
+    first_day = [hourly[datetime(2025, 8, 1, h)] for h in range(24)]
+    assert daily[datetime(2025, 8, 1)]["Open"] == first_day[0]["Open"]
+    assert daily[datetime(2025, 8, 1)]["Close"] == first_day[-1]["Close"]
+    assert daily[datetime(2025, 8, 1)]["High"] == max(d["High"] for d in first_day)
+
+    with pytest.raises(ValueError):
+        ingest_module.run_ingest("BTC-USD", "2025-08-01", "2025-08-04", interval="1d", rollups=["1h"])
+
+
+def test_dashboard_ingest_then_forecast(mem_client, monkeypatch, tmp_path):
+    """The dashboard's Refresh (ingest without an interval) feeds its Forecast button."""
+    import re
+    from backend.app import app
+    from backend.models.artifacts import ArtifactStore
+    from backend.models.cache import MODEL_CACHE
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    with open(os.path.join(root, "frontend", "src", "App.jsx")) as f:
+        interval = re.search(r'const FORECAST_INTERVAL = "(\w+)"', f.read()).group(1)
+
+    MODEL_CACHE.clear()
+    monkeypatch.setattr("backend.api.forecast.get_db", lambda: mem_client)
+    monkeypatch.setattr("backend.api.forecast.use_gru", False)
+    monkeypatch.setattr("backend.api.forecast.ARTIFACT_STORE", ArtifactStore(str(tmp_path)))
+    monkeypatch.setattr("backend.api.forecast.artifact_store", lambda i: ArtifactStore(str(tmp_path / i)))
+    app.testing = True
+    with app.test_client() as client:
+        # services/api.js triggerIngestion(start, end) and getForecast(horizon, FORECAST_INTERVAL)
+        ingest = client.post("/api/ingest", json={"start": "2025-08-01", "end": "2025-10-01"})
+        assert ingest.status_code == 200
+        res = client.post("/api/forecast", json={"horizon": 5, "interval": interval})
+    assert res.status_code == 200
+    j = res.get_json()
+    assert j["interval"] == interval and len(j["predictions"]["ensemble"]) == 5
+    assert j["predictions"]["dates"][0] == "2025-10-01T00:00:00"
@@ -0,0 +1,36 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import pytest
+
+from backend.api import schema
+from backend.data import fin_data_builder as fdb
+
+
+def test_hist_collection_per_interval():
+    assert schema.hist_collection() == "btc_historical"
+    assert schema.hist_collection("5m") == "btc_historical_5m"
+    with pytest.raises(ValueError):
+        schema.hist_collection("2h")
+
+
+def test_backfill_windows_respect_yfinance_limits():
+    windows = fdb.backfill_windows("2025-08-01", "2025-09-01", "1m", now="2025-09-01 12:00")
+    # 1m bars: only the last 30 days, at most 7 days per request
+    assert windows[0][0] == pd.Timestamp("2025-08-03")
+    assert all(e - s <= pd.Timedelta(days=7) for s, e in windows)
+    assert windows[-1][1] == pd.Timestamp("2025-09-01")
+    assert all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+
+    assert fdb.backfill_windows("2015-01-01", "2025-09-01", "1d") == \
+        [(pd.Timestamp("2015-01-01"), pd.Timestamp("2025-09-01"))]
+
+
+def test_rollup_ohlcv():
+    idx = pd.date_range("2025-09-01 10:00", periods=12, freq="5min")
+    bars = pd.DataFrame({"Open": range(12), "High": range(1, 13), "Low": range(-1, 11),
+                         "Close": range(12), "Volume": [1.0] * 12}, index=idx, dtype=float)
+    hourly = fdb.rollup_ohlcv(bars, "1h")
+    assert len(hourly) == 1
+    assert hourly.iloc[0].to_dict() == {"Open": 0.0, "High": 12.0, "Low": -1.0, "Close": 11.0, "Volume": 12.0}
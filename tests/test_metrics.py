@@ -0,0 +1,59 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from sklearn.metrics import mean_absolute_error, mean_absolute_percentage_error, root_mean_squared_error
+
+from backend.models.metrics import batch_metrics, evaluate_many
+from backend.models.moving_average import MovingAverageModel
+
+
+def make_batch(models=3, origins=40, horizon=6):
+    rng = np.random.default_rng(1)
+    true = 100 + rng.normal(0, 5, (origins, horizon))
+    pred = true + rng.normal(0, 2, (models, origins, horizon))
+    return true, pred
+
+
+def test_per_step_metrics_match_sklearn():
+    true, pred = make_batch()
+    scores = batch_metrics(true, pred)
+    assert scores["rmse"].shape == (3, 6)
+    for m in range(3):
+        for h in range(6):
+            assert scores["rmse"][m, h] == pytest.approx(root_mean_squared_error(true[:, h], pred[m, :, h]), rel=1e-12)
+            assert scores["mae"][m, h] == pytest.approx(mean_absolute_error(true[:, h], pred[m, :, h]), rel=1e-12)
+            assert scores["mape"][m, h] == pytest.approx(
+                100 * mean_absolute_percentage_error(true[:, h], pred[m, :, h]), rel=1e-12)
+
+
+def test_evaluate_matches_sklearn_path():
+    true, pred = make_batch(models=1, origins=1, horizon=24)
+    true, pred = true[0], pred[0, 0]
+    scores = MovingAverageModel().evaluate(true, pred)
+    assert scores["rmse"] == pytest.approx(root_mean_squared_error(true, pred), rel=1e-12)
+    assert scores["mae"] == pytest.approx(mean_absolute_error(true, pred), rel=1e-12)
+    assert scores["mape"] == pytest.approx(100 * mean_absolute_percentage_error(true, pred), rel=1e-12)
+    assert isinstance(scores["rmse"], float)
+
+
+def test_zero_actuals_and_direction():
+    true = np.array([0.0, 2.0, 1.0, 3.0])
+    pred = np.array([1.0, 3.0, 2.0, 2.5])
+    scores = evaluate_many(true, {"a": pred, "flat": np.zeros(4)})
+    assert scores["a"]["mape"] == pytest.approx(100 * np.mean([0.5, 1.0, 1 / 6]))  # zero actual skipped
+    assert scores["a"]["direction"] == pytest.approx(100.0)  # up, down, up in both
+    assert scores["flat"]["smape"] == pytest.approx(200.0)  # the 0/0 point is skipped
+    assert evaluate_many([0.0], {"a": [0.0]})["a"]["mape"] is None
+
+    last = np.array([1.0, 1.0])
+    hit = batch_metrics(np.array([[2.0], [0.5]]), np.array([[1.5], [1.5]]), last)["direction"]
+    assert hit.tolist() == [[50.0]]
+
+
+def test_nan_forecasts_are_left_out():
+    true = np.array([[1.0, 2.0], [3.0, 4.0]])
+    pred = np.array([[2.0, np.nan], [3.0, 4.0]])
+    scores = batch_metrics(true, pred)
+    assert scores["mae"][0].tolist() == [0.5, 0.0]
@@ -0,0 +1,80 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import numpy as np
+
+from backend.models.cache import ModelCache, series_fingerprint
+from backend.models.moving_average import MovingAverageModel
+
+
+class CountingMA(MovingAverageModel):
+    fits = 0
+
+    def fit(self, series):
+        CountingMA.fits += 1
+        return super().fit(series)
+
+
+def test_fingerprint_changes_with_data():
+    s = np.arange(10, dtype=float)
+    assert series_fingerprint(s, "2025-09-01") == series_fingerprint(s.copy(), "2025-09-01")
+    assert series_fingerprint(s, "2025-09-01") != series_fingerprint(s[:-1], "2025-09-01")
+    assert series_fingerprint(s, "2025-09-01") != series_fingerprint(s, "2025-09-02")
+
+
+def test_get_or_fit_reuses_fitted_model():
+    CountingMA.fits = 0
+    cache = ModelCache()
+    s = np.arange(20, dtype=float)
+    fp = series_fingerprint(s)
+    m1, hit1 = cache.get_or_fit("btc", "ma", {"window": 5}, fp, CountingMA, s)
+    m2, hit2 = cache.get_or_fit("btc", "ma", {"window": 5}, fp, CountingMA, s)
+    assert (hit1, hit2) == (False, True)
+    assert m1 is m2
+    assert CountingMA.fits == 1
+
+    # different hyperparameters are a different entry
+    _, hit3 = cache.get_or_fit("btc", "ma", {"window": 3}, fp, CountingMA, s)
+    assert hit3 is False
+
+
+def test_lru_eviction_and_memory_ceiling():
+    s = np.arange(1000, dtype=float)  # 8000 bytes of history per model
+    cache = ModelCache(max_entries=2, max_bytes=10**9)
+    for i in range(3):
+        cache.get_or_fit("btc", "ma", {"window": i + 1}, "fp", MovingAverageModel, s)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+
+    small = ModelCache(max_entries=10, max_bytes=12000)
+    for i in range(3):
+        small.get_or_fit("btc", "ma", {"window": i + 1}, "fp", MovingAverageModel, s)
+    assert small.stats()["entries"] == 1
+    assert small.stats()["bytes"] <= 12000
+
+
+def test_invalidate_scope():
+    s = np.arange(20, dtype=float)
+    cache = ModelCache()
+    cache.get_or_fit("btc", "ma", {"window": 5}, "fp", MovingAverageModel, s)
+    cache.get_or_fit("other", "ma", {"window": 5}, "fp", MovingAverageModel, s)
+    cache.invalidate("btc")
+    assert cache.stats()["entries"] == 1
+    _, hit = cache.get_or_fit("btc", "ma", {"window": 5}, "fp", MovingAverageModel, s)
+    assert hit is False
+
+
+def test_concurrent_misses_fit_once():
+    CountingMA.fits = 0
+    cache = ModelCache()
+    s = np.arange(20, dtype=float)
+    threads = [
+        threading.Thread(target=cache.get_or_fit, args=("btc", "ma", {"window": 5}, "fp", CountingMA, s))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert CountingMA.fits == 1
@@ -0,0 +1,76 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+
+from backend.models.moving_average import MovingAverageModel
+
+
+def loop_predict(history, window, steps):
+    preds, hist = [], list(history)
+    for _ in range(steps):
+        preds.append(np.mean(hist[-window:]))
+        hist.append(preds[-1])
+    return np.array(preds)
+
+
+@pytest.mark.parametrize("length", [1, 3, 5, 100])
+@pytest.mark.parametrize("window", [1, 5, 12])
+def test_predict_matches_recursive_loop(length, window):
+    history = 30_000 + np.cumsum(np.random.default_rng(length).normal(0, 100, length))
+    model = MovingAverageModel(window=window).fit(history)
+    for steps in (1, 7, 500):
+        np.testing.assert_allclose(model.predict(steps), loop_predict(history, window, steps), rtol=1e-12)
+
+
+def test_long_horizon_is_finite_and_converges():
+    history = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    preds = MovingAverageModel(window=5).fit(history).predict(50_000)
+    assert preds.shape == (50_000,)
+    assert np.all(np.isfinite(preds))
+    # the recursion settles at the weighted mean sum(k * x_k) / sum(k) of the seed window
+    assert preds[-1] == pytest.approx(np.dot(np.arange(1, 6), history) / 15)
+
+
+def loop_paths(history, window, noise):
+    paths = []
+    for eps in noise:
+        hist = list(history)
+        for e in eps:
+            hist.append(np.mean(hist[-window:]) + e)
+        paths.append(hist[len(history):])
+    return np.array(paths)
+
+
+def test_bootstrap_intervals_match_simulated_paths():
+    history = 100 + np.cumsum(np.random.default_rng(3).normal(0, 1, 60))
+    model = MovingAverageModel(window=5).fit(history)
+    point, bands = model.predict(8, quantiles=[0.1, 0.9], n_paths=200, seed=11)
+    np.testing.assert_allclose(point, model.predict(8), rtol=1e-12)
+
+    noise = np.random.default_rng(11).choice(model.residuals(), size=(200, 8))
+    expected = np.quantile(loop_paths(history, 5, noise), [0.1, 0.9], axis=0)
+    np.testing.assert_allclose(bands, expected, rtol=1e-10)
+    assert (bands[0] < point).all() and (point < bands[1]).all()
+
+    short = MovingAverageModel(window=5).fit(history[:3])
+    assert np.isnan(short.predict(2, quantiles=[0.5])[1]).all()
+    with pytest.raises(ValueError):
+        model.predict(2, quantiles=[1.5])
+
+
+def test_save_load_roundtrip(tmp_path):
+    from backend.models.arima_model import ARIMAModel
+    from backend.models.base_model import BaseModel
+
+    history = np.arange(1.0, 50.0)
+    model = MovingAverageModel(window=7).fit(history)
+    model.save(str(tmp_path / "ma"))
+    loaded = MovingAverageModel.load(str(tmp_path / "ma"))
+    assert loaded.window == 7 and isinstance(loaded.history, np.memmap)
+    np.testing.assert_array_equal(loaded.predict(10), model.predict(10))
+    assert len(loaded.update([50.0]).history) == 50
+    assert BaseModel.read_manifest(str(tmp_path / "ma"))["model"].endswith("MovingAverageModel")
+    with pytest.raises(ValueError):
+        ARIMAModel.load(str(tmp_path / "ma"))
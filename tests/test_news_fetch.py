@@ -0,0 +1,96 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from backend.data import fin_data_builder as fdb
+from backend.data.sentiment_cache import SentimentCache
+
+RSS = """<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>
+<item><title>Bitcoin rallies on ETF news</title><pubDate>Mon, 01 Sep 2025 10:00:00 GMT</pubDate></item>
+<item><title>BTC slips as dollar firms</title><pubDate>Tue, 02 Sep 2025 10:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+PAGES = {
+    "/yahoo": "<html><body></body></html>",  # no headlines -> falls back
+    "/coindesk": "<html><body><h3><a href='#'>CoinDesk: miners expand</a></h3></body></html>",
+    "/rss": RSS,
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delays = {}
+
+    def do_GET(self):
+        path = "/" + self.path.split("/")[1].split("?")[0]
+        time.sleep(self.delays.get(path, 0))
+        body = PAGES.get(path, "").encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_sources(monkeypatch, tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(fdb, "YAHOO_NEWS_URL", base + "/yahoo/{ticker}")
+    monkeypatch.setattr(fdb, "COINDESK_URL", base + "/coindesk/{slug}")
+    monkeypatch.setattr(fdb, "GOOGLE_NEWS_RSS_URL", base + "/rss?q={query}")
+    monkeypatch.setattr(fdb, "SESSION", fdb.requests_session_with_retries(cache_dir=str(tmp_path)))
+    cache = SentimentCache(str(tmp_path / "s.sqlite3"))
+    monkeypatch.setattr(fdb, "get_sentiment_cache", lambda: cache)
+
+    def slow_prices(ticker, start, end, interval="1d"):
+        time.sleep(StubHandler.delays.get("prices", 0))
+        idx = pd.date_range("2025-09-01", periods=3, freq="D")
+        return pd.DataFrame({"Open": [1.0, 2, 3], "High": [1.0, 2, 3], "Low": [1.0, 2, 3],
+                             "Close": [1.0, 2, 3], "Volume": [10.0, 10, 10]}, index=idx)
+
+    def slow_yf_news(ticker):
+        time.sleep(StubHandler.delays.get("yfinance", 0))
+        return []
+
+    monkeypatch.setattr(fdb, "fetch_prices", slow_prices)
+    monkeypatch.setattr(fdb, "fetch_yf_news", slow_yf_news)
+    yield StubHandler
+    StubHandler.delays = {}
+    server.shutdown()
+
+
+def test_sources_fetched_concurrently_with_fallback_order(stub_sources, monkeypatch):
+    collected = []
+    aggregate = fdb.aggregate_news_by_date
+    monkeypatch.setattr(fdb, "aggregate_news_by_date", lambda items: collected.extend(items) or aggregate(items))
+    stub_sources.delays = {"/yahoo": 0.6, "/coindesk": 0.6, "/rss": 0.6, "prices": 0.6, "yfinance": 0.6}
+    started = time.perf_counter()
+    df = fdb.build_dataset("CRYPTO", "BTC-USD", "2025-09-01", "2025-09-04", None)
+    elapsed = time.perf_counter() - started
+
+    # sequentially this is >= 3s (prices + yahoo + yfinance + google + coindesk)
+    assert elapsed < 2.0
+    assert len(df) == 3
+    # Google RSS won after Yahoo/yfinance came back empty; CoinDesk is always added
+    assert [it["source"] for it in collected] == ["google_rss", "google_rss", "coindesk"]
+    assert "Bitcoin rallies" in " ".join(df["headlines_concat"])
+
+
+def test_news_deadline_bounds_ingest(stub_sources, monkeypatch):
+    monkeypatch.setattr(fdb, "NEWS_DEADLINE", 0.5)
+    stub_sources.delays = {"/yahoo": 3, "/coindesk": 3, "/rss": 3}
+    started = time.perf_counter()
+    df = fdb.build_dataset("CRYPTO", "BTC-USD", "2025-09-01", "2025-09-04", None)
+    assert time.perf_counter() - started < 1.5
+    assert len(df) == 3
+    assert (df["headline_count"] == 0).all()
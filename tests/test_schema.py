@@ -0,0 +1,97 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import datetime
+
+import pandas as pd
+from pymongo import errors
+
+from backend.api import schema
+from backend.api.db import fetch_close_series
+from backend.api.ingest import normalize_records_for_mongo
+
+
+class RecordingColl:
+    def __init__(self, name, docs=None, fail_hint=False):
+        self.name = name
+        self.docs = docs or []
+        self.fail_hint = fail_hint
+        self.indexes = {}
+        self.queries = []
+    def create_index(self, keys, **kwargs):
+        self.indexes[kwargs["name"]] = (keys, kwargs.get("unique", False))
+    def update_many(self, *_):
+        class R:
+            modified_count = 0
+        return R()
+    def find(self, **kwargs):
+        self.queries.append(kwargs)
+        if self.fail_hint and "hint" in kwargs:
+            raise errors.OperationFailure("hint provided does not correspond to an existing index")
+        return iter(self.docs[:kwargs["limit"]])
+
+
+class RecordingDB:
+    def __init__(self):
+        self.colls = {}
+    def get_collection(self, name):
+        return self.colls.setdefault(name, RecordingColl(name))
+
+
+def test_ensure_indexes_creates_unique_date_and_series_index():
+    db = RecordingDB()
+    schema.ensure_indexes(db)
+    hist = db.colls[schema.HIST_COLLECTION].indexes
+    assert hist[schema.DATE_INDEX] == ([("Date", 1)], True)
+    assert hist[schema.SERIES_INDEX][0] == [("Date", -1), ("Close", 1)]
+    assert "timestamp_desc" in db.colls[schema.FORECAST_COLLECTION].indexes
+
+
+def test_fetch_close_series_single_query_with_fallback():
+    docs = [{"Date": datetime(2025, 9, 3), "Close": 3.0},
+            {"Date": datetime(2025, 9, 2), "Close": 2.0},
+            {"Date": datetime(2025, 9, 1), "Close": 1.0}]
+    coll = RecordingColl("h", docs)
+    series, last_date = fetch_close_series(coll, limit=3)
+    assert series.tolist() == [1.0, 2.0, 3.0]
+    assert last_date == datetime(2025, 9, 3)
+    assert len(coll.queries) == 1
+    assert coll.queries[0]["hint"] == schema.SERIES_INDEX
+    assert coll.queries[0]["sort"] == [("Date", -1)]
+
+    no_index = RecordingColl("h", docs, fail_hint=True)
+    series, _ = fetch_close_series(no_index, limit=3)
+    assert series.tolist() == [1.0, 2.0, 3.0]
+
+
+def test_records_store_native_dates_and_api_lowercases():
+    df = pd.DataFrame({"Date": ["2025-09-01"], "Close": [1.5], "Volume": [float("nan")]})
+    rec = normalize_records_for_mongo(df)[0]
+    assert rec["Date"] == datetime(2025, 9, 1)
+    assert rec["Volume"] is None
+
+    out = schema.to_api_record(rec)
+    assert out == {"date": "2025-09-01T00:00:00", "close": 1.5, "volume": None}
+    assert schema.to_storage_date("2025-09-01T02:00:00+02:00") == datetime(2025, 9, 1)
+
+
+def test_timeseries_collections_created_when_enabled(monkeypatch):
+    monkeypatch.setattr(schema, "TIMESERIES", True)
+
+    class TSDB(RecordingDB):
+        def __init__(self):
+            super().__init__()
+            self.created = {}
+        def list_collection_names(self):
+            return list(self.created)
+        def create_collection(self, name, **kwargs):
+            self.created[name] = kwargs
+        def list_collections(self, filter):
+            name = filter["name"]
+            return iter([{"name": name, "type": "timeseries"}] if name in self.created else [])
+
+    db = TSDB()
+    schema.ensure_indexes(db, ["1h"])
+    assert db.created["btc_historical_1h"]["timeseries"] == {"timeField": "Date", "granularity": "hours"}
+    hist = db.colls["btc_historical_1h"].indexes
+    assert schema.DATE_INDEX not in hist and schema.SERIES_INDEX in hist
@@ -0,0 +1,58 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from backend.data import fin_data_builder as fdb
+from backend.data import sentiment_cache as sc
+
+HEADLINES = ["Bitcoin surges to record high", "Crypto exchange hacked, funds lost",
+             "BTC trades flat", "Bitcoin surges to record high"]
+
+
+def test_only_unseen_headlines_are_scored(monkeypatch, tmp_path):
+    scored = []
+    real = sc._score_chunk
+    monkeypatch.setattr(sc, "_score_chunk", lambda texts: scored.extend(texts) or real(texts))
+    cache = sc.SentimentCache(str(tmp_path / "s.sqlite3"))
+
+    first = sc.score_headlines(HEADLINES, cache=cache)
+    assert sorted(scored) == sorted(set(HEADLINES))  # duplicates scored once
+    assert first[0] == first[3] == sc.get_analyzer().polarity_scores(HEADLINES[0])["compound"]
+
+    scored.clear()
+    again = sc.score_headlines(HEADLINES + ["New: ETF approved"], cache=sc.SentimentCache(cache.path))
+    assert scored == ["New: ETF approved"]
+    assert again[:4] == first
+
+
+def test_cache_closes_its_connections(monkeypatch, tmp_path):
+    cache = sc.SentimentCache(str(tmp_path / "s.sqlite3"))
+    opened = []
+    real = cache._connect
+    monkeypatch.setattr(cache, "_connect", lambda: opened.append(real()) or opened[-1])
+
+    cache.put_many({"k": 0.5})
+    assert cache.get_many({"k"}) == {"k": 0.5}
+    assert len(opened) == 2
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_parallel_batch_matches_serial(monkeypatch):
+    monkeypatch.setattr(sc, "PARALLEL_MIN", 2)
+    texts = [f"{h} #{i}" for i, h in enumerate(HEADLINES * 5)]
+    assert sc.score_batch(texts, processes=2) == sc._score_chunk(texts)
+
+
+def test_aggregate_news_uses_cache(monkeypatch, tmp_path):
+    cache = sc.SentimentCache(str(tmp_path / "s.sqlite3"))
+    monkeypatch.setattr(fdb, "get_sentiment_cache", lambda: cache)
+    items = [{"date": pd.Timestamp("2025-09-01"), "headline": h, "source": "t"} for h in HEADLINES]
+    agg = fdb.aggregate_news_by_date(items)
+    assert agg["headline_count"].iloc[0] == 4
+    assert len(cache.get_many({sc.headline_key(h) for h in HEADLINES})) == 3
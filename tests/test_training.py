@@ -0,0 +1,194 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+
+from backend import training
+from backend.app import app
+from backend.models.artifacts import ArtifactStore
+
+
+def make_docs(n=60, offset=0.0):
+    closes = [100.0 + i + (i % 3) + offset for i in range(n)]
+    start = datetime(2025, 9, 1)
+    return [{"Date": start + timedelta(days=i), "Close": c} for i, c in enumerate(closes)][::-1]
+
+
+class DummyColl:
+    def __init__(self, docs):
+        self.docs = docs
+        self.inserted = []
+    def find(self, *_, **kwargs):
+        return iter(self.docs[:kwargs.get("limit")])
+    def insert_one(self, doc):
+        self.inserted.append(doc)
+    def find_one_and_update(self, flt, update, **kwargs):
+        return {"_id": flt["_id"], "version": len(self.inserted)}
+
+
+class DummyDB:
+    def __init__(self, docs):
+        self.coll = DummyColl(docs)
+    def get_collection(self, *_):
+        return self.coll
+
+
+@pytest.fixture(autouse=True)
+def no_gru(monkeypatch):
+    monkeypatch.setattr(training, "GRU_AVAILABLE", False)
+
+
+def test_publish_skips_unchanged_data(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    db = DummyDB(make_docs())
+    assert store.load_latest() is None
+
+    v1 = training.train_and_publish(store=store, db=db)
+    assert v1 == "v0001"
+    assert training.train_and_publish(store=store, db=db) is None
+    assert training.train_and_publish(store=store, db=db, force=True) == "v0002"
+
+    v3 = training.train_and_publish(store=store, db=DummyDB(make_docs(offset=1.0)))
+    models, meta = store.load_latest()
+    assert meta["version"] == v3 == "v0003"
+    assert set(models) == {"ma", "arima"}
+    assert meta["rows"] == 60
+
+
+def test_store_prunes_old_versions(tmp_path):
+    store = ArtifactStore(str(tmp_path), keep=2)
+    for i in range(4):
+        training.train_and_publish(store=store, db=DummyDB(make_docs(offset=i)))
+    assert store.list_versions() == ["v0003", "v0004"]
+    assert store.latest_version() == "v0004"
+
+
+def test_forecast_serves_published_models(monkeypatch, tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    db = DummyDB(make_docs())
+    version = training.train_and_publish(store=store, db=db)
+
+    monkeypatch.setattr("backend.api.forecast.ARTIFACT_STORE", store)
+    monkeypatch.setattr("backend.api.forecast.get_db", lambda: db)
+    monkeypatch.setattr("backend.api.forecast.fit_model", lambda *a, **k: pytest.fail("refit on request path"))
+
+    app.testing = True
+    with app.test_client() as client:
+        j = client.post("/api/forecast", json={"horizon": 5}).get_json()
+    assert j["model_version"] == version
+    assert j["trained_at"] == store.load_latest()[1]["trained_at"]
+    assert len(j["predictions"]["ensemble"]) == 5
+
+
+def test_forecast_advances_stale_published_models(monkeypatch, tmp_path):
+    from backend.models.cache import MODEL_CACHE
+    MODEL_CACHE.clear()
+    store = ArtifactStore(str(tmp_path))
+    docs = make_docs(n=60)
+    version = training.train_and_publish(store=store, db=DummyDB(docs[3:]))  # ends 2025-10-27
+    db = DummyDB(docs)  # ingest added three days the trainer has not seen
+
+    monkeypatch.setattr("backend.api.forecast.ARTIFACT_STORE", store)
+    monkeypatch.setattr("backend.api.forecast.get_db", lambda: db)
+    app.testing = True
+    with app.test_client() as client:
+        first = client.post("/api/forecast", json={"horizon": 2}).get_json()
+        second = client.post("/api/forecast", json={"horizon": 2}).get_json()
+
+    assert first["model"]["source"] == "extended" and first["model_version"] == version
+    assert first["model"]["published_data_end"] == "2025-10-27T00:00:00"
+    assert first["model"]["data_end"] == "2025-10-30T00:00:00"
+    assert first["predictions"]["dates"] == ["2025-10-31T00:00:00", "2025-11-01T00:00:00"]
+    models, _ = store.load(version)
+    new_obs = np.array([d["Close"] for d in docs[2::-1]])
+    for name, key in (("ma", "moving_average"), ("arima", "arima")):
+        assert np.allclose(first["predictions"][key], models[name].update(new_obs).predict(2))
+    assert first["cached"] == {"ma": False, "arima": False}
+    assert second["cached"] == {"ma": True, "arima": True}
+    assert len(store.load_latest()[0]["ma"].history) == 57  # published copy untouched
+
+    # the artifact's last bar was rewritten: it cannot be extended, refit inline
+    docs[3] = dict(docs[3], Close=docs[3]["Close"] + 5)
+    with app.test_client() as client:
+        j = client.post("/api/forecast", json={"horizon": 2}).get_json()
+    assert j["model"]["source"] == "inline" and j["model_version"] is None
+
+
+def test_forecast_refits_when_published_last_close_is_rewritten(monkeypatch, tmp_path):
+    from backend.models.cache import MODEL_CACHE
+    MODEL_CACHE.clear()
+    store = ArtifactStore(str(tmp_path))
+    docs = make_docs(n=60)
+    version = training.train_and_publish(store=store, db=DummyDB(docs))
+    db = DummyDB(docs)
+    monkeypatch.setattr("backend.api.forecast.ARTIFACT_STORE", store)
+    monkeypatch.setattr("backend.api.forecast.get_db", lambda: db)
+    app.testing = True
+    with app.test_client() as client:
+        before = client.post("/api/forecast", json={"horizon": 3}).get_json()
+        # an incremental ingest rebuilt today's candle: same date, new close
+        docs[0] = dict(docs[0], Close=500.0)
+        after = client.post("/api/forecast", json={"horizon": 3}).get_json()
+
+    assert before["model"]["source"] == "published" and before["model_version"] == version
+    assert after["model"]["source"] == "inline" and after["model_version"] is None
+    closes = np.array([d["Close"] for d in docs[::-1]])
+    assert np.allclose(after["predictions"]["moving_average"],
+                       training.MODEL_SPECS["ma"][0](**training.MODEL_SPECS["ma"][1]).fit(closes).predict(3))
+
+
+def test_new_rows_update_published_models(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    docs = make_docs(n=60)
+    training.train_and_publish(store=store, db=DummyDB(docs[3:]))  # first 57 days
+    v2 = training.train_and_publish(store=store, db=DummyDB(docs))
+
+    models, meta = store.load_latest()
+    assert meta["version"] == v2
+    assert meta["mode"] == "update" and meta["base_version"] == "v0001"
+    assert meta["arima_update"]["new_obs"] == 3
+    assert len(models["ma"].history) == 60
+
+    # a rewritten last candle cannot be appended to: full refit
+    docs[3] = dict(docs[3], Close=docs[3]["Close"] + 5)
+    training.train_and_publish(store=store, db=DummyDB(docs))
+    assert store.load_latest()[1]["mode"] == "full"
+
+
+def test_ensemble_weights_are_learned_and_updated(monkeypatch, tmp_path):
+    monkeypatch.setattr(training, "ENSEMBLE_MIN_TRAIN", 40)
+    monkeypatch.setattr(training, "ENSEMBLE_HORIZON", 5)
+    store = ArtifactStore(str(tmp_path))
+    docs = make_docs(n=60)
+    training.train_and_publish(store=store, db=DummyDB(docs[2:]))
+    learned = store.load_latest()[1]["ensemble"]
+    assert learned["names"] == ["ma", "arima"] and len(learned["mse"][0]) == 5 and learned["updates"] == 0
+
+    training.train_and_publish(store=store, db=DummyDB(docs))
+    updated = store.load_latest()[1]["ensemble"]
+    assert updated["updates"] == 1
+    assert updated["mse"][0][:2] != learned["mse"][0][:2] and updated["mse"][0][2:] == learned["mse"][0][2:]
+
+
+def test_artifacts_are_saved_models_with_manifests(tmp_path):
+    import pickle
+    from backend.models.base_model import BaseModel
+
+    store = ArtifactStore(str(tmp_path))
+    version = training.train_and_publish(store=store, db=DummyDB(make_docs()))
+    vdir = tmp_path / version
+    assert not list(vdir.glob("*.pkl"))
+    manifest = BaseModel.read_manifest(str(vdir / "arima"))
+    assert manifest["data_range"]["rows"] == 60 and manifest["data_range"]["end"] == "2025-10-30T00:00:00"
+
+    # versions published as pickles still load
+    legacy = ArtifactStore(str(tmp_path / "legacy"))
+    models, _ = store.load(version)
+    legacy_dir = tmp_path / "legacy" / "v0001"
+    legacy_dir.mkdir(parents=True)
+    (legacy_dir / "meta.json").write_text('{"version": "v0001", "models": ["ma"]}')
+    (legacy_dir / "ma.pkl").write_bytes(pickle.dumps(models["ma"]))
+    (tmp_path / "legacy" / "LATEST").write_text("v0001")
+    assert np.array_equal(legacy.load_latest()[0]["ma"].predict(3), models["ma"].predict(3))